@@ -1,7 +1,11 @@
 # auth_sig.py
 from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Optional, Tuple
+import os
+import threading
 
 from web3 import Web3
 from eth_account.messages import encode_defunct
@@ -13,6 +17,8 @@ class SigProof:
     address: str
     message: str
     signature: str
+    # set when signature is a session-key HMAC instead of a wallet signature
+    session: Optional[str] = None
 
 
 def build_action_message(*, game_id: str, chain_id: int, player_index: int, action: str, params: str, nonce: int) -> str:
@@ -28,7 +34,69 @@ def build_action_message(*, game_id: str, chain_id: int, player_index: int, acti
     )
 
 
+# ---------------- recovery (cached, optionally off-process) ----------------
+
+SIG_CACHE_SIZE = int(os.getenv("SIG_CACHE_SIZE", "4096"))
+# 0 = recover on the calling thread; N > 0 = N worker processes (no GIL contention)
+SIG_VERIFY_WORKERS = int(os.getenv("SIG_VERIFY_WORKERS", "0"))
+
+_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_cache_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _recover(message: str, signature: str) -> str:
+    # top-level so ProcessPoolExecutor can pickle it
+    recovered = Account.recover_message(encode_defunct(text=message), signature=signature)
+    return Web3.to_checksum_address(recovered)
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if SIG_VERIFY_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SIG_VERIFY_WORKERS)
+        return _pool
+
+
+def recover_address(message: str, signature: str) -> str:
+    """
+    Signer of (message, signature). Results are kept in an LRU of SIG_CACHE_SIZE
+    entries, so a client retrying the same signed request costs one dict lookup.
+    Bad signatures raise and are not cached.
+    """
+    key = (message, signature.lower())
+    with _cache_lock:
+        addr = _cache.get(key)
+        if addr is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return addr
+        _stats["misses"] += 1
+
+    pool = _get_pool()
+    addr = pool.submit(_recover, message, signature).result() if pool else _recover(message, signature)
+
+    with _cache_lock:
+        _cache[key] = addr
+        while len(_cache) > SIG_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return addr
+
+
+def sig_cache_stats() -> Dict:
+    return {
+        "entries": len(_cache),
+        "maxSize": SIG_CACHE_SIZE,
+        "workers": SIG_VERIFY_WORKERS,
+        **_stats,
+    }
+
+
 def verify_proof(proof: SigProof) -> bool:
-    msg = encode_defunct(text=proof.message)
-    recovered = Account.recover_message(msg, signature=proof.signature)
-    return Web3.to_checksum_address(recovered) == Web3.to_checksum_address(proof.address)
+    recovered = recover_address(proof.message, proof.signature)
+    return recovered == Web3.to_checksum_address(proof.address)
@@ -0,0 +1,53 @@
+# bench_auth_sig.py
+# Signature verification throughput: python bench_auth_sig.py [n] [workers]
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+import auth_sig
+from auth_sig import SigProof, build_action_message, verify_proof
+
+
+def make_proofs(n: int):
+    acct = Account.create()
+    proofs = []
+    for i in range(n):
+        msg = build_action_message(game_id="bench", chain_id=114, player_index=0, action="roll", params="", nonce=i + 1)
+        sig = acct.sign_message(encode_defunct(text=msg)).signature.hex()
+        proofs.append(SigProof(address=acct.address, message=msg, signature=sig))
+    return proofs
+
+
+def rate(label: str, n: int, seconds: float):
+    print(f"{label:<28} {n / seconds:>10.0f} verifications/s  ({seconds * 1e6 / n:.1f} us each)")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    proofs = make_proofs(n)
+
+    t = time.perf_counter()
+    assert all(verify_proof(p) for p in proofs)
+    rate("cold (1 core)", n, time.perf_counter() - t)
+
+    t = time.perf_counter()
+    assert all(verify_proof(p) for p in proofs)
+    rate("cached", n, time.perf_counter() - t)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(auth_sig._recover, ["warmup"] * workers, [proofs[0].signature] * workers))
+        t = time.perf_counter()
+        out = list(pool.map(auth_sig._recover, [p.message for p in proofs], [p.signature for p in proofs], chunksize=64))
+        dt = time.perf_counter() - t
+    assert all(a == proofs[0].address for a in out)
+    rate(f"pool ({workers} procs)", n, dt)
+    rate("pool, per core", n // workers, dt)
+
+
+if __name__ == "__main__":
+    main()
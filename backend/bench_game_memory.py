@@ -0,0 +1,39 @@
+# bench_game_memory.py
+# Memory of idle games: python bench_game_memory.py [n]
+import gc
+import sys
+import tracemalloc
+
+from game import GameState
+from game_manager import GameManager
+
+
+def per_game(label: str, n: int, make):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = [make(i) for i in range(n)]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{label:<28} {used / n:>10.0f} bytes/game  ({used / 2**20:.1f} MiB for {n})")
+    return keep
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    def bare(i: int) -> GameState:
+        g = GameState(game_id=f"bench-{i}")
+        g.reset()
+        return g
+
+    per_game("GameState", n, bare)
+
+    # what a shard holds per idle game: state + actor + its last GameView
+    games = GameManager(default_game_id="bench-default", sweep_interval_sec=1e9)
+    per_game("GameManager (state+actor)", n, lambda i: games.create(f"bench-{i}"))
+
+
+if __name__ == "__main__":
+    main()
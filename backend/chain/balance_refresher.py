@@ -0,0 +1,146 @@
+import heapq
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from chain.chain_fxrp import FxrpChain, fxrp_client
+
+
+class BalanceRefresher:
+    """
+    Keeps FXRP balances of connected wallets warm in the background.
+
+    Request paths only read the local cache (get / get_many) and never wait on
+    the RPC node. Every watched address is re-read each BALANCE_REFRESH_SEC;
+    touch() pulls an address forward right after a settlement or bank payout
+    (once now, once again after BALANCE_FOLLOWUP_SEC when the tx should be mined).
+    Addresses are watched for owners (game ids, see follow()); one nobody follows
+    any more is no longer polled.
+    """
+
+    def __init__(self, client: FxrpChain):
+        self.client = client
+        self.interval_sec = float(os.getenv("BALANCE_REFRESH_SEC", "10"))
+        self.followup_sec = float(os.getenv("BALANCE_FOLLOWUP_SEC", "6"))
+
+        self._watched: Set[str] = set()
+        self._values: Dict[str, Tuple[float, float]] = {}  # addr -> (balance, updated_at)
+        self._due: List[Tuple[float, str]] = []             # heap of (due_ts, addr)
+        self._regular: Dict[str, float] = {}                # addr -> due_ts of its periodic entry
+        self._followers: Dict[str, Set[str]] = {}           # addr -> owners following it
+        self._followed: Dict[str, Set[str]] = {}            # owner -> its addrs
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------- request side (no RPC) ----------------
+
+    def follow(self, owner: str, addresses: Iterable[Optional[str]]):
+        """Watch exactly these addresses for owner (a game id); pass none to stop."""
+        keys = {a.lower() for a in addresses if a}
+        with self._lock:
+            old = self._followed.get(owner, set())
+            if keys == old:
+                return
+            added = keys - old
+            for key in added:
+                self._followers.setdefault(key, set()).add(owner)
+                if key not in self._watched:
+                    self._watched.add(key)
+                    self._regular[key] = 0.0
+                    heapq.heappush(self._due, (0.0, key))
+            for key in old - keys:
+                followers = self._followers.get(key)
+                if followers is not None:
+                    followers.discard(owner)
+                    if not followers:
+                        # its heap entries are skipped from now on (no _regular match)
+                        del self._followers[key]
+                        self._watched.discard(key)
+                        self._regular.pop(key, None)
+                        self._values.pop(key, None)
+            if keys:
+                self._followed[owner] = keys
+            else:
+                self._followed.pop(owner, None)
+        if added:
+            self._ensure_started()
+            self._wake.set()
+
+    def forget(self, owner: str):
+        self.follow(owner, ())
+
+    def touch(self, address: Optional[str]):
+        if not address:
+            return
+        key = address.lower()
+        now = time.time()
+        with self._lock:
+            # one-off entries, not rescheduled after they fire
+            heapq.heappush(self._due, (now, key))
+            heapq.heappush(self._due, (now + self.followup_sec, key))
+        self._ensure_started()
+        self._wake.set()
+
+    def get(self, address: Optional[str]) -> Tuple[float, Optional[float]]:
+        """(balance, updated_at) from cache; (0.0, None) if never read yet."""
+        if not address:
+            return 0.0, None
+        val = self._values.get(address.lower())
+        if val is None:
+            return 0.0, None
+        return val
+
+    # ---------------- background loop ----------------
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="balance-refresher", daemon=True)
+                self._thread.start()
+
+    def _take_due(self) -> List[str]:
+        now = time.time()
+        out = []
+        with self._lock:
+            while self._due and self._due[0][0] <= now:
+                ts, addr = heapq.heappop(self._due)
+                if addr not in out:
+                    out.append(addr)
+                if self._regular.get(addr) == ts:
+                    self._regular[addr] = now + self.interval_sec
+                    heapq.heappush(self._due, (self._regular[addr], addr))
+        return out
+
+    def _next_wait(self) -> float:
+        with self._lock:
+            if not self._due:
+                return self.interval_sec
+            return max(0.0, min(self.interval_sec, self._due[0][0] - time.time()))
+
+    def refresh(self, addresses: List[str]):
+        # one batched round trip for everything that is due
+        try:
+            fresh = self.client.read_balances(addresses)
+        except Exception as e:
+            # keep the last known values, they just get older
+            print(f"Balance refresh failed for {len(addresses)} addresses: {e}")
+            return
+
+        now = time.time()
+        for addr, val in fresh.items():
+            self._values[addr] = (val, now)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+            due = self._take_due()
+            if due:
+                self.refresh(due)
+
+
+balance_refresher = BalanceRefresher(fxrp_client)
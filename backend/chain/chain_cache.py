@@ -0,0 +1,115 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+def _default_db_path() -> str:
+    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.getenv("CHAIN_CACHE_DB", os.path.join(base, "data", "chain_cache.sqlite3"))
+
+
+@dataclass(frozen=True)
+class CachedReceipt:
+    """What TxVerifier needs from a receipt: status, block and decoded FXRP Transfers."""
+    tx_hash: str
+    status: int
+    block_number: int
+    transfers: Tuple[Tuple[str, str, int], ...]  # (from, to, value)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "status": self.status,
+            "blockNumber": self.block_number,
+            "transfers": [[f, t, str(v)] for f, t, v in self.transfers],
+        })
+
+    @classmethod
+    def from_json(cls, tx_hash: str, raw: str) -> "CachedReceipt":
+        d = json.loads(raw)
+        return cls(
+            tx_hash=tx_hash,
+            status=int(d["status"]),
+            block_number=int(d["blockNumber"]),
+            transfers=tuple((f, t, int(v)) for f, t, v in d["transfers"]),
+        )
+
+
+class ReceiptCache:
+    """
+    Finalized receipts only (they never change): an in-memory LRU of
+    CHAIN_CACHE_SIZE entries in front of a SQLite file, so retries of /settle with
+    the same hash and restarts do not refetch and re-decode anything.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_size: Optional[int] = None):
+        self.db_path = db_path or _default_db_path()
+        self.max_size = max_size if max_size is not None else int(os.getenv("CHAIN_CACHE_SIZE", "10000"))
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._mem: "OrderedDict[str, CachedReceipt]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute("CREATE TABLE IF NOT EXISTS receipts (tx_hash TEXT PRIMARY KEY, data TEXT)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    @staticmethod
+    def _key(tx_hash: str) -> str:
+        h = tx_hash.lower()
+        return h if h.startswith("0x") else "0x" + h
+
+    def _remember(self, key: str, r: CachedReceipt):
+        self._mem[key] = r
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_size:
+            self._mem.popitem(last=False)
+
+    def get(self, tx_hash: str) -> Optional[CachedReceipt]:
+        key = self._key(tx_hash)
+        with self._lock:
+            r = self._mem.get(key)
+            if r is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return r
+
+            row = self._conn().execute("SELECT data FROM receipts WHERE tx_hash = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            r = CachedReceipt.from_json(key, row[0])
+            self._remember(key, r)
+            self.disk_hits += 1
+            return r
+
+    def put(self, r: CachedReceipt):
+        key = self._key(r.tx_hash)
+        with self._lock:
+            self._remember(key, r)
+            db = self._conn()
+            db.execute("INSERT OR REPLACE INTO receipts VALUES (?, ?)", (key, r.to_json()))
+            db.commit()
+
+    def stats(self) -> Dict:
+        return {
+            "memEntries": len(self._mem),
+            "maxSize": self.max_size,
+            "hits": self.hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+receipt_cache = ReceiptCache()
@@ -1,17 +1,24 @@
 import os
 import json
 import time
+from typing import Dict, List, Optional
 
 from web3 import Web3
 from dotenv import load_dotenv
 
+from chain.head_tracker import HeadTracker
+from chain.nonce_manager import NonceManager
+
 load_dotenv()
 
 class FxrpChain:
     def __init__(self):
         # 1. Connect to Coston2
         rpc_url = os.getenv("FLARE_RPC_URL", "https://coston2-api.flare.network/ext/C/rpc")
+        self.rpc_url = rpc_url
         self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        # shared latest block / gas price (see HeadTracker)
+        self.head = HeadTracker(self.w3)
         # Cache chain id to avoid RPC spam
         env_chain_id = os.getenv("FLARE_CHAIN_ID")
         if env_chain_id:
@@ -48,6 +55,7 @@ class FxrpChain:
             abi=self.abi
         )
         self._bal_cache = {}
+        self._bank_nonces: Optional[NonceManager] = None
 
     def get_balance(self, address: str) -> float:
         if not address:
@@ -66,45 +74,109 @@ class FxrpChain:
             return 0.0
 
         try:
-            raw = self.contract.functions.balanceOf(Web3.to_checksum_address(address)).call()
-            val = float(self.w3.from_wei(raw, 'ether'))
-            self._bal_cache[key] = (now, val)
-            return val
+            return self.read_balance(address)
         except Exception as e:
             print(f"Error reading balance: {e}")
             return 0.0
 
+    def read_balance(self, address: str) -> float:
+        """Uncached balanceOf; raises on RPC errors (unlike get_balance)."""
+        raw = self.contract.functions.balanceOf(Web3.to_checksum_address(address)).call()
+        val = float(self.w3.from_wei(raw, 'ether'))
+        self._bal_cache[address.lower()] = (time.time(), val)
+        return val
+
+    def get_balances(self, addresses: List[str]) -> Dict[str, float]:
+        """
+        Many balances at once: cached ones are served locally, the rest go out as
+        one JSON-RPC batch of balanceOf calls. Keyed by the addresses as passed in.
+        """
+        now = time.time()
+        ttl = float(os.getenv("BALANCE_CACHE_TTL", "10"))
+
+        out: Dict[str, float] = {}
+        missing: List[str] = []
+        for a in addresses:
+            if not a:
+                out[a] = 0.0
+                continue
+            hit = self._bal_cache.get(a.lower())
+            if hit and now - hit[0] < ttl:
+                out[a] = hit[1]
+            else:
+                missing.append(a)
+
+        if missing:
+            try:
+                fresh = self.read_balances(missing)
+            except Exception as e:
+                print(f"Error reading balances: {e}")
+                fresh = {}
+            for a in missing:
+                out[a] = fresh.get(a, 0.0)
+
+        return out
+
+    def read_balances(self, addresses: List[str]) -> Dict[str, float]:
+        """Uncached batched balanceOf (one round trip per BALANCE_BATCH_SIZE addresses)."""
+        batch_size = int(os.getenv("BALANCE_BATCH_SIZE", "100"))
+        uniq = list(dict.fromkeys(a for a in addresses if a))
+
+        out: Dict[str, float] = {}
+        for i in range(0, len(uniq), batch_size):
+            chunk = uniq[i:i + batch_size]
+            with self.w3.batch_requests() as batch:
+                for a in chunk:
+                    batch.add(self.contract.functions.balanceOf(Web3.to_checksum_address(a)))
+                raws = batch.execute()
+
+            now = time.time()
+            for a, raw in zip(chunk, raws):
+                val = float(self.w3.from_wei(raw, 'ether'))
+                self._bal_cache[a.lower()] = (now, val)
+                out[a] = val
+
+        return out
+
     def get_chain_id(self) -> int:
         """Return cached chain id (no RPC calls)."""
         return self._chain_id
 
-    def transfer_from_bank(self, to_addr: str, amount_raw: int) -> str:
-        pk = os.getenv("BANK_PRIVATE_KEY")
-        bank = os.getenv("TREASURY_WALLET")
+    def bank_configured(self) -> bool:
+        return bool(os.getenv("BANK_PRIVATE_KEY") and os.getenv("TREASURY_WALLET"))
 
-        if not pk or not bank:
-            raise ValueError("BANK_PRIVATE_KEY / BANK_WALLET not configured")
+    def bank_nonces(self) -> NonceManager:
+        """Shared local nonce allocator for the bank wallet."""
+        if self._bank_nonces is None:
+            pk = os.getenv("BANK_PRIVATE_KEY")
+            bank = os.getenv("TREASURY_WALLET")
 
-        bank = Web3.to_checksum_address(bank)
-        to = Web3.to_checksum_address(to_addr)
+            if not pk or not bank:
+                raise ValueError("BANK_PRIVATE_KEY / BANK_WALLET not configured")
 
-        nonce = self.w3.eth.get_transaction_count(bank)
+            self._bank_nonces = NonceManager(self.w3, bank, pk, self.get_chain_id(), gas_price_fn=self.head.gas_price)
+        return self._bank_nonces
 
-        tx = self.contract.functions.transfer(
-            to,
-            int(amount_raw)
-        ).build_transaction({
-            "from": bank,
-            "nonce": nonce,
-            "chainId": self.get_chain_id(),
-            "gas": 150_000,
-            "gasPrice": self.w3.eth.gas_price,
-        })
+    def build_bank_transfer(self, to_addr: str, amount_raw: int):
+        """build(nonce, gas_price) for an FXRP transfer from the bank (no RPC)."""
+        bank = self.bank_nonces().address
+        fn = self.contract.functions.transfer(Web3.to_checksum_address(to_addr), int(amount_raw))
+        chain_id = self.get_chain_id()
 
-        signed = self.w3.eth.account.sign_transaction(tx, private_key=pk)
-        tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
+        def build(nonce: int, gas_price: int) -> dict:
+            return fn.build_transaction({
+                "from": bank,
+                "nonce": nonce,
+                "chainId": chain_id,
+                "gas": 150_000,
+                "gasPrice": gas_price,
+            })
 
-        return tx_hash.hex()
+        return build
+
+    def transfer_from_bank(self, to_addr: str, amount_raw: int) -> str:
+        # nonce comes from the local allocator, so concurrent payouts never collide
+        return self.bank_nonces().send(self.build_bank_transfer(to_addr, amount_raw))
 
 
 # Create a single instance to be used by other files
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+
+from chain.chain_fxrp import FxrpChain, fxrp_client
+
+
+class AsyncFxrpChain:
+    """
+    asyncio twin of FxrpChain for `async def` endpoints.
+
+    Same RPC url / contract / ABI / chain id / balance cache as the sync client,
+    but every call goes through ONE shared aiohttp session whose connector is
+    capped at RPC_POOL_SIZE connections. A handful of slow RPC responses then
+    only park coroutines instead of eating the server threadpool.
+    """
+
+    def __init__(self, sync_client: FxrpChain):
+        self.sync = sync_client
+        self.pool_size = int(os.getenv("RPC_POOL_SIZE", "20"))
+        self.timeout_sec = float(os.getenv("RPC_TIMEOUT_SEC", "10"))
+
+        self.provider = AsyncHTTPProvider(sync_client.rpc_url)
+        self.w3 = AsyncWeb3(self.provider)
+        self.contract = self.w3.eth.contract(
+            address=Web3.to_checksum_address(sync_client.contract_address),
+            abi=sync_client.abi,
+        )
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock: Optional[asyncio.Lock] = None
+
+    # ---------------- connection pool ----------------
+
+    async def _ensure_session(self):
+        if self._session is not None and not self._session.closed:
+            return
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+        async with self._session_lock:
+            if self._session is not None and not self._session.closed:
+                return
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout_sec),
+            )
+            await self.provider.cache_async_session(self._session)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def pool_stats(self) -> Dict:
+        connector = self._session.connector if self._session else None
+        return {
+            "limit": self.pool_size,
+            "open": len(getattr(connector, "_conns", {}) or {}) if connector else 0,
+            "acquired": len(getattr(connector, "_acquired", ()) or ()) if connector else 0,
+        }
+
+    # ---------------- reads ----------------
+
+    def get_chain_id(self) -> int:
+        return self.sync.get_chain_id()
+
+    async def get_block_number(self) -> int:
+        await self._ensure_session()
+        return int(await self.w3.eth.block_number)
+
+    async def get_gas_price(self) -> int:
+        await self._ensure_session()
+        return int(await self.w3.eth.gas_price)
+
+    async def get_transaction_receipt(self, tx_hash: str):
+        await self._ensure_session()
+        return await self.w3.eth.get_transaction_receipt(tx_hash)
+
+    async def get_balance(self, address: str) -> float:
+        if not address:
+            return 0.0
+        return (await self.get_balances([address]))[address]
+
+    async def get_balances(self, addresses: List[str]) -> Dict[str, float]:
+        """Same contract as FxrpChain.get_balances: cache first, then one batched round trip."""
+        now = time.time()
+        ttl = float(os.getenv("BALANCE_CACHE_TTL", "10"))
+        cache = self.sync._bal_cache
+
+        out: Dict[str, float] = {}
+        missing: List[str] = []
+        for a in addresses:
+            if not a:
+                out[a] = 0.0
+                continue
+            hit = cache.get(a.lower())
+            if hit and now - hit[0] < ttl:
+                out[a] = hit[1]
+            else:
+                missing.append(a)
+
+        if missing:
+            try:
+                fresh = await self.read_balances(missing)
+            except Exception as e:
+                print(f"Error reading balances: {e}")
+                fresh = {}
+            for a in missing:
+                out[a] = fresh.get(a, 0.0)
+
+        return out
+
+    async def read_balances(self, addresses: List[str]) -> Dict[str, float]:
+        await self._ensure_session()
+        batch_size = int(os.getenv("BALANCE_BATCH_SIZE", "100"))
+        uniq = list(dict.fromkeys(a for a in addresses if a))
+
+        out: Dict[str, float] = {}
+        for i in range(0, len(uniq), batch_size):
+            chunk = uniq[i:i + batch_size]
+            async with self.w3.batch_requests() as batch:
+                for a in chunk:
+                    batch.add(self.contract.functions.balanceOf(Web3.to_checksum_address(a)))
+                raws = await batch.async_execute()
+
+            now = time.time()
+            for a, raw in zip(chunk, raws):
+                val = float(Web3.from_wei(raw, 'ether'))
+                self.sync._bal_cache[a.lower()] = (now, val)
+                out[a] = val
+
+        return out
+
+    # ---------------- sends ----------------
+
+    async def send_raw_transaction(self, raw_tx: bytes) -> str:
+        await self._ensure_session()
+        tx_hash = await self.w3.eth.send_raw_transaction(raw_tx)
+        return Web3.to_hex(tx_hash)
+
+    async def transfer_from_bank(self, to_addr: str, amount_raw: int) -> str:
+        # same bank nonce allocator as the sync client
+        nonces = self.sync.bank_nonces()
+        build = self.sync.build_bank_transfer(to_addr, amount_raw)
+
+        gas_price = await asyncio.to_thread(self.sync.head.gas_price)
+        nonce = await asyncio.to_thread(nonces.allocate)
+
+        signed = self.w3.eth.account.sign_transaction(build(nonce, gas_price), private_key=nonces.private_key)
+        try:
+            tx_hash = await self.send_raw_transaction(signed.raw_transaction)
+        except Exception:
+            nonces.release(nonce)
+            raise
+        nonces.mark_sent(nonce, tx_hash, build, gas_price)
+        return tx_hash
+
+
+# Shared async client (one connection pool per process)
+fxrp_async = AsyncFxrpChain(fxrp_client)
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from web3 import Web3
+
+
+class HeadTracker:
+    """
+    Latest block number / base fee / gas price, refreshed in the background every
+    HEAD_POLL_SEC. Readers get the cached values; if they are older than
+    HEAD_MAX_STALE_SEC (tracker down or not started) the reader refreshes inline once,
+    so staleness stays bounded either way.
+    """
+
+    def __init__(self, w3: Web3):
+        self.w3 = w3
+        self.poll_sec = float(os.getenv("HEAD_POLL_SEC", "2"))
+        self.max_stale_sec = float(os.getenv("HEAD_MAX_STALE_SEC", "10"))
+
+        self._block_number: Optional[int] = None
+        self._block_ts: Optional[int] = None
+        self._base_fee: Optional[int] = None
+        self._gas_price: Optional[int] = None
+        self._priority_fee: Optional[int] = None
+        self._updated_at = 0.0
+        self.errors = 0
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------- refresh ----------------
+
+    def refresh(self):
+        block = self.w3.eth.get_block("latest")
+        gas_price = int(self.w3.eth.gas_price)
+        base_fee = block.get("baseFeePerGas")
+        try:
+            tip = int(self.w3.eth.max_priority_fee)
+        except Exception:
+            # node without eth_maxPriorityFeePerGas
+            tip = max(0, gas_price - int(base_fee or 0))
+
+        with self._lock:
+            self._block_number = int(block["number"])
+            self._block_ts = int(block.get("timestamp", 0))
+            self._base_fee = int(base_fee) if base_fee is not None else None
+            self._gas_price = gas_price
+            self._priority_fee = tip
+            self._updated_at = time.time()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="head-tracker", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Head tracker error: {e}")
+            time.sleep(self.poll_sec)
+
+    def _fresh(self):
+        if time.time() - self._updated_at > self.max_stale_sec:
+            self.refresh()
+
+    # ---------------- readers ----------------
+
+    def age_sec(self) -> Optional[float]:
+        return round(time.time() - self._updated_at, 3) if self._updated_at else None
+
+    def block_number(self) -> int:
+        self._fresh()
+        return self._block_number
+
+    def gas_price(self) -> int:
+        self._fresh()
+        return self._gas_price
+
+    def fee_estimate(self) -> Dict:
+        """EIP-1559 fees: tip + 2x base fee of headroom (several full blocks)."""
+        self._fresh()
+        tip = self._priority_fee or 0
+        if self._base_fee is None:
+            return {"maxFeePerGas": self._gas_price, "maxPriorityFeePerGas": tip}
+        return {"maxFeePerGas": 2 * self._base_fee + tip, "maxPriorityFeePerGas": tip}
+
+    def status(self) -> Dict:
+        return {
+            "blockNumber": self._block_number,
+            "blockTimestamp": self._block_ts,
+            "baseFeePerGas": self._base_fee,
+            "gasPrice": self._gas_price,
+            "maxPriorityFeePerGas": self._priority_fee,
+            "ageSec": self.age_sec(),
+            "maxStaleSec": self.max_stale_sec,
+            "errors": self.errors,
+        }
@@ -0,0 +1,190 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from web3 import Web3
+
+# build(nonce, gas_price) -> unsigned tx dict
+TxBuilder = Callable[[int, int], dict]
+
+# mined nonces whose tx hashes are still kept for tried()
+TRIED_KEEP_NONCES = 1000
+
+
+@dataclass
+class Outstanding:
+    nonce: int
+    tx_hash: str
+    build: TxBuilder
+    gas_price: int
+    sent_at: float
+
+
+class NonceManager:
+    """
+    Local nonce allocator for one hot wallet (the bank / treasury).
+
+    Nonces are handed out from memory, so many transfers can be in flight at once
+    instead of all reading the same get_transaction_count. The counter is synced
+    from the chain on first use and after any send error. maintain() (called
+    periodically) drops mined txs, re-sends the lowest pending tx with a bumped gas
+    price when it is stuck, and fills nonce gaps with a 0-value self transfer.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        address: str,
+        private_key: str,
+        chain_id: int,
+        gas_price_fn: Optional[Callable[[], int]] = None,
+    ):
+        self.w3 = w3
+        self.gas_price_fn = gas_price_fn or (lambda: int(w3.eth.gas_price))
+        self.address = Web3.to_checksum_address(address)
+        self.private_key = private_key
+        self.chain_id = chain_id
+        self.stuck_after_sec = float(os.getenv("NONCE_STUCK_AFTER_SEC", "60"))
+        self.gas_bump = float(os.getenv("NONCE_GAS_BUMP", "1.125"))
+
+        self._next: Optional[int] = None
+        self._outstanding: Dict[int, Outstanding] = {}
+        # every hash sent per nonce (original first, then gas-bump replacements)
+        self._tried: Dict[int, List[str]] = {}
+        self._nonce_of: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    # ---------------- allocation ----------------
+
+    def sync(self):
+        with self._lock:
+            latest = self.w3.eth.get_transaction_count(self.address, "latest")
+            pending = self.w3.eth.get_transaction_count(self.address, "pending")
+            self._next = max(latest, pending)
+            for n in [n for n in self._outstanding if n < latest]:
+                self._outstanding.pop(n)
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self.sync()
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def mark_sent(self, nonce: int, tx_hash: str, build: TxBuilder, gas_price: int):
+        with self._lock:
+            self._outstanding[nonce] = Outstanding(nonce, tx_hash, build, gas_price, time.time())
+            self._record(nonce, tx_hash)
+
+    def _record(self, nonce: int, tx_hash: str):
+        self._tried.setdefault(nonce, []).append(tx_hash)
+        self._nonce_of[tx_hash] = nonce
+
+    def release(self, nonce: int):
+        """The tx using `nonce` was never accepted: give it back / resync."""
+        with self._lock:
+            if self._next is not None and nonce == self._next - 1:
+                self._next = nonce
+            else:
+                # later nonces are already out - let the next sync find the gap
+                self._next = None
+
+    def nonce_of(self, tx_hash: str) -> Optional[int]:
+        with self._lock:
+            return self._nonce_of.get(tx_hash)
+
+    def tried(self, tx_hash: str) -> List[str]:
+        """Every hash sent with tx_hash's nonce: any one of them may be the one that gets mined."""
+        with self._lock:
+            nonce = self._nonce_of.get(tx_hash)
+            return list(self._tried[nonce]) if nonce is not None else [tx_hash]
+
+    def confirmed_nonce(self) -> int:
+        """Nonces below this one are used up by mined txs."""
+        return self.w3.eth.get_transaction_count(self.address, "latest")
+
+    # ---------------- sending ----------------
+
+    def _sign_and_send(self, tx: dict) -> str:
+        signed = self.w3.eth.account.sign_transaction(tx, private_key=self.private_key)
+        return Web3.to_hex(self.w3.eth.send_raw_transaction(signed.raw_transaction))
+
+    def send(self, build: TxBuilder, gas_price: Optional[int] = None) -> str:
+        gas_price = int(gas_price if gas_price is not None else self.gas_price_fn())
+        nonce = self.allocate()
+        try:
+            tx_hash = self._sign_and_send(build(nonce, gas_price))
+        except Exception:
+            self.release(nonce)
+            raise
+        self.mark_sent(nonce, tx_hash, build, gas_price)
+        return tx_hash
+
+    # ---------------- maintenance ----------------
+
+    def pending_count(self) -> int:
+        return len(self._outstanding)
+
+    def maintain(self):
+        with self._lock:
+            if self._next is None:
+                self.sync()
+            if not self._outstanding:
+                return
+
+            latest = self.confirmed_nonce()
+            for n in [n for n in self._outstanding if n < latest]:
+                self._outstanding.pop(n)
+            for n in [n for n in self._tried if n < latest - TRIED_KEEP_NONCES]:
+                for h in self._tried.pop(n):
+                    self._nonce_of.pop(h, None)
+
+            # a missing nonce below the ones in flight blocks all of them
+            if self._outstanding and latest not in self._outstanding and latest < self._next:
+                self._fill_gap(latest)
+                return
+
+            head = self._outstanding.get(latest)
+            if head and time.time() - head.sent_at >= self.stuck_after_sec:
+                self._replace(head)
+
+    def _replace(self, o: Outstanding):
+        gas_price = max(int(o.gas_price * self.gas_bump) + 1, int(self.gas_price_fn()))
+        try:
+            new_hash = self._sign_and_send(o.build(o.nonce, gas_price))
+        except Exception as e:
+            if "nonce too low" in str(e).lower():
+                # the original got mined in the meantime
+                self._outstanding.pop(o.nonce, None)
+                return
+            print(f"Replacement of nonce {o.nonce} failed: {e}")
+            return
+        self._record(o.nonce, new_hash)
+        self._outstanding[o.nonce] = Outstanding(o.nonce, new_hash, o.build, gas_price, time.time())
+
+    def _fill_gap(self, nonce: int):
+        chain_id = self.chain_id
+
+        def build(n: int, gp: int) -> dict:
+            return {
+                "from": self.address,
+                "to": self.address,
+                "value": 0,
+                "nonce": n,
+                "gas": 21_000,
+                "gasPrice": gp,
+                "chainId": chain_id,
+            }
+
+        gas_price = int(self.gas_price_fn())
+        try:
+            tx_hash = self._sign_and_send(build(nonce, gas_price))
+        except Exception as e:
+            print(f"Nonce gap fill {nonce} failed: {e}")
+            self._next = None
+            return
+        self._outstanding[nonce] = Outstanding(nonce, tx_hash, build, gas_price, time.time())
+        self._record(nonce, tx_hash)
@@ -0,0 +1,273 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+from chain.chain_fxrp import FxrpChain, fxrp_client
+
+TRANSFER_TOPIC = Web3.keccak(text="Transfer(address,address,uint256)")
+
+
+def _default_db_path() -> str:
+    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.getenv("TRANSFER_INDEX_DB", os.path.join(base, "data", "transfers.sqlite3"))
+
+
+def _topic_to_addr(topic) -> str:
+    return Web3.to_checksum_address(HexBytes(topic)[-20:])
+
+
+@dataclass(frozen=True)
+class IndexedTransfer:
+    tx_hash: str
+    log_index: int
+    block_number: int
+    block_hash: str
+    from_addr: str
+    to_addr: str
+    value: int
+
+    def to_front(self) -> Dict:
+        return {
+            "txHash": self.tx_hash,
+            "logIndex": self.log_index,
+            "blockNumber": self.block_number,
+            "from": self.from_addr,
+            "to": self.to_addr,
+            "valueRaw": str(self.value),
+        }
+
+
+class TransferIndex:
+    """
+    Local SQLite copy of every FXRP Transfer event.
+
+    sync_once() walks forward from the stored cursor in INDEX_LOG_CHUNK block steps.
+    Before that it compares the stored hash of the cursor block with the chain; on a
+    mismatch it walks back over the recorded block hashes (up to INDEX_REORG_DEPTH)
+    to the fork point and drops everything above it. Lookups by tx hash / from / to /
+    block are then plain indexed queries instead of RPC scans.
+
+    RPC calls run without any lock readers take: the sync thread holds _sync_lock
+    for a whole pass, _lock only around its SQLite writes, and readers use their
+    own connection (WAL) under _read_lock.
+    """
+
+    def __init__(self, client: FxrpChain, db_path: Optional[str] = None):
+        self.client = client
+        self.db_path = db_path or _default_db_path()
+        self.chunk = int(os.getenv("INDEX_LOG_CHUNK", "30"))
+        self.reorg_depth = int(os.getenv("INDEX_REORG_DEPTH", "64"))
+        self.lookback = int(os.getenv("INDEX_LOOKBACK_BLOCKS", "1000"))
+        self.poll_sec = float(os.getenv("INDEX_POLL_SEC", "2"))
+
+        self.head: Optional[int] = None
+        self.reorgs = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._read_db: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._read_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------- storage ----------------
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS transfers ("
+                " tx_hash TEXT, log_index INTEGER, block_number INTEGER, block_hash TEXT,"
+                " from_addr TEXT, to_addr TEXT, value TEXT, PRIMARY KEY (tx_hash, log_index))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS transfers_from ON transfers(from_addr, block_number)")
+            db.execute("CREATE INDEX IF NOT EXISTS transfers_to ON transfers(to_addr, block_number)")
+            db.execute("CREATE INDEX IF NOT EXISTS transfers_block ON transfers(block_number)")
+            db.execute("CREATE TABLE IF NOT EXISTS blocks (number INTEGER PRIMARY KEY, hash TEXT)")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _reader(self) -> sqlite3.Connection:
+        # caller holds self._read_lock
+        if self._read_db is None:
+            with self._lock:
+                self._conn()  # schema
+            self._read_db = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._read_db
+
+    def _meta(self, key: str) -> Optional[str]:
+        with self._read_lock:
+            row = self._reader().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self._conn().execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def cursor(self) -> Optional[int]:
+        """Last block whose Transfer logs are fully stored."""
+        v = self._meta("cursor")
+        return int(v) if v is not None else None
+
+    def confirmed_block(self, min_conf: Optional[int] = None) -> Optional[int]:
+        """Highest indexed block with at least MIN_CONFIRMATIONS."""
+        min_conf = int(os.getenv("MIN_CONFIRMATIONS", "1")) if min_conf is None else min_conf
+        cur = self.cursor
+        if cur is None or self.head is None:
+            return None
+        return min(cur, self.head - (min_conf - 1))
+
+    # ---------------- sync ----------------
+
+    def _block_hash(self, number: int) -> str:
+        return Web3.to_hex(self.client.w3.eth.get_block(number)["hash"])
+
+    def _rollback_to(self, number: int):
+        with self._lock:
+            db = self._conn()
+            db.execute("DELETE FROM transfers WHERE block_number > ?", (number,))
+            db.execute("DELETE FROM blocks WHERE number > ?", (number,))
+            self._set_meta("cursor", number)
+            db.commit()
+
+    def _check_reorg(self, cursor: int) -> int:
+        with self._read_lock:
+            stored = self._reader().execute(
+                "SELECT number, hash FROM blocks WHERE number <= ? ORDER BY number DESC LIMIT ?",
+                (cursor, self.reorg_depth),
+            ).fetchall()
+        if not stored or self._block_hash(stored[0][0]) == stored[0][1]:
+            return cursor
+
+        # walk back to the newest block that is still canonical
+        fork = stored[-1][0] - 1
+        for number, h in stored[1:]:
+            if self._block_hash(number) == h:
+                fork = number
+                break
+
+        self.reorgs += 1
+        print(f"⚠️ Reorg detected: rolling transfer index back to block {fork}")
+        self._rollback_to(fork)
+        return fork
+
+    def _store(self, logs: Iterable, to_block: int, to_hash: str):
+        hashes = {to_block: to_hash}
+        rows = []
+        for log in logs:
+            topics = log["topics"]
+            if len(topics) < 3:
+                continue
+            bn = int(log["blockNumber"])
+            bh = Web3.to_hex(log["blockHash"])
+            hashes[bn] = bh
+            rows.append((
+                Web3.to_hex(log["transactionHash"]),
+                int(log["logIndex"]),
+                bn,
+                bh,
+                _topic_to_addr(topics[1]),
+                _topic_to_addr(topics[2]),
+                str(int.from_bytes(HexBytes(log["data"]), "big")),
+            ))
+        with self._lock:
+            db = self._conn()
+            db.executemany("INSERT OR REPLACE INTO transfers VALUES (?,?,?,?,?,?,?)", rows)
+            db.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?)", list(hashes.items()))
+            db.execute("DELETE FROM blocks WHERE number < ?", (to_block - self.reorg_depth,))
+            self._set_meta("cursor", to_block)
+            db.commit()
+
+    def sync_once(self) -> int:
+        """Index up to the current head; returns the new cursor."""
+        with self._sync_lock:
+            head = int(self.client.head.block_number())
+            self.head = head
+
+            cursor = self.cursor
+            if cursor is None:
+                start = os.getenv("INDEX_START_BLOCK")
+                cursor = int(start) - 1 if start else max(0, head - self.lookback)
+            else:
+                cursor = self._check_reorg(cursor)
+
+            address = Web3.to_checksum_address(self.client.contract_address)
+            while cursor < head:
+                to_block = min(head, cursor + self.chunk)
+                logs = self.client.w3.eth.get_logs({
+                    "address": address,
+                    "fromBlock": cursor + 1,
+                    "toBlock": to_block,
+                    "topics": [Web3.to_hex(TRANSFER_TOPIC)],
+                })
+                self._store(logs, to_block, self._block_hash(to_block))
+                cursor = to_block
+
+            return cursor
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="transfer-index", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.sync_once()
+            except Exception as e:
+                print(f"❌ Transfer index error: {e}")
+            time.sleep(self.poll_sec)
+
+    # ---------------- queries ----------------
+
+    def _rows(self, sql: str, args=()) -> List[IndexedTransfer]:
+        with self._read_lock:
+            rows = self._reader().execute(
+                "SELECT tx_hash, log_index, block_number, block_hash, from_addr, to_addr, value FROM transfers " + sql,
+                args,
+            ).fetchall()
+        return [IndexedTransfer(r[0], r[1], r[2], r[3], r[4], r[5], int(r[6])) for r in rows]
+
+    def by_tx(self, tx_hash: str) -> List[IndexedTransfer]:
+        h = tx_hash.lower() if tx_hash.startswith("0x") else "0x" + tx_hash.lower()
+        return self._rows("WHERE tx_hash = ? ORDER BY log_index", (h,))
+
+    def transfers_to(self, recipients: List[str], from_block: int, to_block: int) -> List[IndexedTransfer]:
+        if not recipients:
+            return []
+        addrs = [Web3.to_checksum_address(a) for a in recipients]
+        marks = ",".join("?" * len(addrs))
+        return self._rows(
+            f"WHERE to_addr IN ({marks}) AND block_number BETWEEN ? AND ? ORDER BY block_number, log_index",
+            (*addrs, from_block, to_block),
+        )
+
+    def history(self, address: str, limit: int = 50, before_block: Optional[int] = None) -> List[IndexedTransfer]:
+        a = Web3.to_checksum_address(address)
+        before = before_block if before_block is not None else 2 ** 62
+        return self._rows(
+            "WHERE (from_addr = ? OR to_addr = ?) AND block_number < ?"
+            " ORDER BY block_number DESC, log_index DESC LIMIT ?",
+            (a, a, before, int(limit)),
+        )
+
+    def status(self) -> Dict:
+        return {
+            "cursor": self.cursor,
+            "head": self.head,
+            "confirmedBlock": self.confirmed_block(),
+            "reorgs": self.reorgs,
+        }
+
+
+transfer_index = TransferIndex(fxrp_client)
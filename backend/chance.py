@@ -1,29 +1,41 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 import random
 
 from player import Player
 
-@dataclass
+@dataclass(frozen=True)
 class ChanceEvent:
     delta: int
     text: str
 
+
+# the one deck table, shared by every game
+CHANCE_EVENTS: Tuple[ChanceEvent, ...] = (
+    ChanceEvent(+250, "Airdrop reward"),
+    ChanceEvent(+150, "Validator reward"),
+    ChanceEvent(+100, "Referral bonus"),
+    ChanceEvent(-100, "Gas spike fee"),
+    ChanceEvent(-200, "Slashed for downtime"),
+)
+
+# unseeded decks share one generator (a Random is ~2.5 KB); games tape their
+# draws, so replays never depend on its state
+_shared_rng = random.Random()
+
+
 class ChanceDeck:
     """
     Your notebook: '4 classes call action(): news'
     This is the 'news/chance' action generator.
     """
+    __slots__ = ("rng",)
+
+    events = CHANCE_EVENTS
+
     def __init__(self, seed: int | None = None):
-        self.rng = random.Random(seed)
-        self.events = [
-            ChanceEvent(+250, "Airdrop reward"),
-            ChanceEvent(+150, "Validator reward"),
-            ChanceEvent(+100, "Referral bonus"),
-            ChanceEvent(-100, "Gas spike fee"),
-            ChanceEvent(-200, "Slashed for downtime"),
-        ]
+        self.rng = _shared_rng if seed is None else random.Random(seed)
 
     def draw(self) -> ChanceEvent:
         return self.rng.choice(self.events)
@@ -41,3 +53,5 @@ class ChanceDeck:
             "payoutFxrp": 2  # FXRP (human units)
         }
 
+
+chance_deck = ChanceDeck()
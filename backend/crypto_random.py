@@ -1,53 +1,113 @@
 import time
 import json
+import os
+from dataclasses import dataclass
 from web3 import Web3
 
+from chain.chain_fxrp import fxrp_client
+
 # --- Configuration ---
 RPC_URL = "https://coston2-api.flare.network/ext/C/rpc"
 CONTRACT_ADDRESS = "0x9a9d81b42Fa28E5C8d73273Abb53650cF4E58873"
-PRIVATE_KEY = "95ffb6e01235ec644af8ee1e5340cce9f105588771f84fcb37736cbb8052b67f"
-WALLET_ADDRESS = "0xB33Eb1F350fBf4Bb204EAD57A0078F573e18cD45"
+# Dice roller wallet; every shard behind router.py needs its own (SHARD_<i>_DICE_PRIVATE_KEY)
+PRIVATE_KEY = os.getenv("DICE_PRIVATE_KEY", "95ffb6e01235ec644af8ee1e5340cce9f105588771f84fcb37736cbb8052b67f")
 
 w3 = Web3(Web3.HTTPProvider(RPC_URL))
-with open("SecureDiceRoller.json", "r") as f:
+WALLET_ADDRESS = w3.eth.account.from_key(PRIVATE_KEY).address
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "SecureDiceRoller.json"), "r") as f:
     contract_abi = json.load(f)["abi"]
 contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=contract_abi)
 
-def roll_dice():
+# Flare RandomNumberV2 (only the view we need)
+RANDOM_V2_ABI = [{
+    "type": "function",
+    "name": "getRandomNumber",
+    "stateMutability": "view",
+    "inputs": [],
+    "outputs": [
+        {"name": "_randomNumber", "type": "uint256"},
+        {"name": "_isSecureRandom", "type": "bool"},
+        {"name": "_randomTimestamp", "type": "uint256"},
+    ],
+}]
+_random_v2 = None
+
+
+class RandomNotReady(Exception):
+    """Flare SRN is between rounds (contract reverts with 'not secure')."""
+
+
+@dataclass(frozen=True)
+class DiceRoll:
+    die1: int
+    die2: int
+    request_id: int
+    tx_hash: str
+    block_number: int
+    rolled_at: float
+
+    def to_front(self):
+        return {
+            "dice": [self.die1, self.die2],
+            "requestId": self.request_id,
+            "txHash": self.tx_hash,
+            "blockNumber": self.block_number,
+        }
+
+
+@dataclass(frozen=True)
+class SrnValue:
+    value: int
+    is_secure: bool
+    timestamp: int
 
-    while True:
-        try:
-            # Check gas and nonce
-            nonce = w3.eth.get_transaction_count(WALLET_ADDRESS)
 
-            # Build transaction
-            tx = contract.functions.rollDice().build_transaction({
-                'from': WALLET_ADDRESS,
-                'nonce': nonce,
-                'gas': 250000,
-                'gasPrice': w3.eth.gas_price,
-                'chainId': 114
-            })
+def read_srn() -> SrnValue:
+    """Current SRN round value via eth_call (no tx, no gas)."""
+    global _random_v2
+    if _random_v2 is None:
+        _random_v2 = w3.eth.contract(address=contract.functions.randomV2().call(), abi=RANDOM_V2_ABI)
+    value, is_secure, ts = _random_v2.functions.getRandomNumber().call()
+    return SrnValue(value=int(value), is_secure=bool(is_secure), timestamp=int(ts))
 
-            # Sign and Send
-            signed_tx = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
 
+def roll_dice_verified() -> DiceRoll:
+    """One on-chain rollDice; keeps the DiceRolled request id + tx hash for auditing."""
+    try:
+        # Check gas and nonce
+        nonce = w3.eth.get_transaction_count(WALLET_ADDRESS)
 
-            # Wait for receipt
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        # Build transaction
+        tx = contract.functions.rollDice().build_transaction({
+            'from': WALLET_ADDRESS,
+            'nonce': nonce,
+            'gas': 250000,
+            'gasPrice': fxrp_client.head.gas_price(),
+            'chainId': 114
+        })
 
-            # Parse Events
-            logs = contract.events.DiceRolled().process_receipt(receipt)
-            res = logs[0]['args']
+        # Sign and Send
+        signed_tx = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
+        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
 
-            return res['die1'], res['die2']
+        # Wait for receipt
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    except Exception as e:
+        if "not secure" in str(e):
+            raise RandomNotReady(str(e))
+        raise
 
-        except Exception as e:
-            if "not secure" in str(e):
-                print("⏳ Flare is between rounds. Waiting 20 seconds...")
-                time.sleep(20)
-            else:
-                print(f"❌ Error: {e}")
-                break
+    # Parse Events
+    logs = contract.events.DiceRolled().process_receipt(receipt)
+    if not logs:
+        raise ValueError("rollDice tx has no DiceRolled event")
+    res = logs[0]['args']
 
+    return DiceRoll(
+        die1=int(res['die1']),
+        die2=int(res['die2']),
+        request_id=int(res['requestId']),
+        tx_hash=Web3.to_hex(tx_hash),
+        block_number=int(receipt['blockNumber']),
+        rolled_at=time.time(),
+    )
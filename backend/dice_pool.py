@@ -0,0 +1,127 @@
+# dice_pool.py
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+import os
+import threading
+import time
+
+import crypto_random
+from crypto_random import DiceRoll, RandomNotReady
+
+
+class DicePoolEmpty(RuntimeError):
+    """No verified roll buffered right now; the request should be retried."""
+
+
+class DicePool:
+    """
+    Buffer of already verified secure dice rolls.
+
+    A background producer keeps DICE_POOL_SIZE DiceRolled results ready (each one
+    with its on-chain request id + tx hash), so a /roll only pops from memory.
+    Waiting for SRN rounds and tx receipts happens in the producer, never in a
+    request: take() runs under a game lock on a shared actor thread, so it never
+    waits and raises DicePoolEmpty instead (a retryable 503 for the client).
+    With target 0 nothing is buffered: an empty ready() / take() asks the producer
+    for one roll, which the retried request then gets.
+    """
+
+    def __init__(
+        self,
+        producer: Callable[[], DiceRoll] = crypto_random.roll_dice_verified,
+        target: Optional[int] = None,
+    ):
+        self.producer = producer
+        self.target = target if target is not None else int(os.getenv("DICE_POOL_SIZE", "8"))
+        self.retry_sec = float(os.getenv("DICE_RETRY_SEC", "20"))
+
+        self._rolls: Deque[DiceRoll] = deque()
+        # a roll was asked for while empty (what keeps a target 0 pool producing)
+        self._demand = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+        # metrics
+        self._produced_at: Deque[float] = deque(maxlen=256)
+        self.produced_total = 0
+        self.consumed_total = 0
+        self.empty_takes = 0
+        self.errors = 0
+        self.not_ready = 0
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="dice-pool", daemon=True)
+            self._thread.start()
+
+    def ready(self) -> bool:
+        """A take() right now would succeed (counted as an empty take when not)."""
+        self.start()
+        if self._rolls:
+            return True
+        self._want()
+        return False
+
+    def _want(self):
+        with self._cond:
+            self.empty_takes += 1
+            self._demand = 1
+            self._cond.notify_all()
+
+    def take(self) -> DiceRoll:
+        self.start()
+        with self._cond:
+            if not self._rolls:
+                self._want()
+                raise DicePoolEmpty("No secure dice roll available yet, try again")
+            roll = self._rolls.popleft()
+            self.consumed_total += 1
+            # wake the producer
+            self._cond.notify_all()
+        return roll
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._rolls) < max(self.target, self._demand))
+
+            try:
+                roll = self.producer()
+            except RandomNotReady:
+                self.not_ready += 1
+                time.sleep(self.retry_sec)
+                continue
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Dice producer error: {e}")
+                time.sleep(self.retry_sec)
+                continue
+
+            with self._cond:
+                self._rolls.append(roll)
+                self._demand = 0
+                self.produced_total += 1
+                self._produced_at.append(roll.rolled_at)
+                self._cond.notify_all()
+
+    def metrics(self) -> Dict:
+        now = time.time()
+        recent = [t for t in self._produced_at if now - t <= 600]
+        return {
+            "depth": len(self._rolls),
+            "target": self.target,
+            "producedTotal": self.produced_total,
+            "consumedTotal": self.consumed_total,
+            "refillPerMin": round(len(recent) / 10.0, 2),
+            "lastProducedAgoSec": round(now - self._produced_at[-1], 1) if self._produced_at else None,
+            "emptyTakes": self.empty_takes,
+            "notReady": self.not_ready,
+            "errors": self.errors,
+        }
+
+
+dice_pool = DicePool()
+# DICE_MODE=direct: one rollDice tx per /roll, sent when the roll is asked for
+direct_dice = DicePool(target=0)
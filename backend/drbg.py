@@ -0,0 +1,163 @@
+# drbg.py
+"""
+Dice derived from one Flare SRN value per round.
+
+The round is the first secure one published after the roll was first asked for
+(SrnSeedSource.round_for), so no one knows its value when the roll is requested
+and waiting for a favourable round does not help.
+
+roll = HMAC-DRBG(SHA-256) instantiated with
+    entropy         = SRN value (32 bytes, big endian)
+    nonce           = SRN round timestamp (8 bytes, big endian)
+    personalization = "FlarePoly|<game id>|<turn index>"
+and two unbiased d6 taken from its output (bytes >= 252 are rejected).
+
+Everything is public, so anyone can recompute a roll with verify_roll().
+"""
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+import crypto_random
+from crypto_random import SrnValue
+from dice_pool import DicePoolEmpty
+
+# secure rounds kept to answer round_for(); rolls asked for longer ago than this are forgotten
+SRN_ROUNDS_KEPT = 64
+SRN_REQUEST_TTL_SEC = 3600
+
+
+class HmacDrbg:
+    """NIST SP 800-90A HMAC_DRBG (SHA-256), no reseeding, no prediction resistance."""
+
+    def __init__(self, entropy: bytes, nonce: bytes = b"", personalization: bytes = b""):
+        self.k = b"\x00" * 32
+        self.v = b"\x01" * 32
+        self._update(entropy + nonce + personalization)
+
+    def _hmac(self, key: bytes, data: bytes) -> bytes:
+        return hmac.new(key, data, hashlib.sha256).digest()
+
+    def _update(self, provided: bytes = b""):
+        self.k = self._hmac(self.k, self.v + b"\x00" + provided)
+        self.v = self._hmac(self.k, self.v)
+        if provided:
+            self.k = self._hmac(self.k, self.v + b"\x01" + provided)
+            self.v = self._hmac(self.k, self.v)
+
+    def generate(self, n: int) -> bytes:
+        out = b""
+        while len(out) < n:
+            self.v = self._hmac(self.k, self.v)
+            out += self.v
+        self._update()
+        return out[:n]
+
+
+def _drbg_for(srn_value: int, srn_timestamp: int, game_id: str, turn_index: int) -> HmacDrbg:
+    return HmacDrbg(
+        entropy=int(srn_value).to_bytes(32, "big"),
+        nonce=int(srn_timestamp).to_bytes(8, "big"),
+        personalization=f"FlarePoly|{game_id}|{int(turn_index)}".encode(),
+    )
+
+
+def roll_from_srn(srn_value: int, srn_timestamp: int, game_id: str, turn_index: int) -> Tuple[int, int]:
+    drbg = _drbg_for(srn_value, srn_timestamp, game_id, turn_index)
+    dice = []
+    while len(dice) < 2:
+        for b in drbg.generate(32):
+            if b < 252:  # 252 = 6 * 42, keeps every face equally likely
+                dice.append(b % 6 + 1)
+                if len(dice) == 2:
+                    break
+    return dice[0], dice[1]
+
+
+def verify_roll(srn_value: int, srn_timestamp: int, game_id: str, turn_index: int, die1: int, die2: int) -> bool:
+    """Recompute a logged roll from its public inputs."""
+    return roll_from_srn(srn_value, srn_timestamp, game_id, turn_index) == (int(die1), int(die2))
+
+
+class SrnSeedSource:
+    """
+    Secure SRN rounds, read in the background (a free eth_call every SRN_POLL_SEC)
+    like HeadTracker does for the head, so a roll never waits on the RPC.
+    round_for() binds a (game, turn) roll to the first secure round newer than the
+    moment it was first asked for.
+    """
+
+    def __init__(self, reader: Callable[[], SrnValue] = crypto_random.read_srn):
+        self.reader = reader
+        self.poll_sec = float(os.getenv("SRN_POLL_SEC", "15"))
+
+        self._rounds: Deque[SrnValue] = deque(maxlen=SRN_ROUNDS_KEPT)
+        self._asked: "OrderedDict[Tuple[str, int], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.errors = 0
+
+    def refresh(self):
+        srn = self.reader()
+        with self._lock:
+            if srn.is_secure and (not self._rounds or srn.timestamp > self._rounds[-1].timestamp):
+                self._rounds.append(srn)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="srn-source", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.errors += 1
+                print(f"SRN read failed: {e}")
+            time.sleep(self.poll_sec)
+
+    def asked_at(self, game_id: str, turn_index: int) -> float:
+        """When the roll for (game, turn) was first asked for (now, on the first call)."""
+        key = (game_id, int(turn_index))
+        now = time.time()
+        with self._lock:
+            while self._asked and next(iter(self._asked.values())) < now - SRN_REQUEST_TTL_SEC:
+                self._asked.popitem(last=False)
+            return self._asked.setdefault(key, now)
+
+    def round_for(self, game_id: str, turn_index: int) -> Optional[SrnValue]:
+        """First secure round after the roll was asked for; None until it is published."""
+        self.start()
+        asked = self.asked_at(game_id, turn_index)
+        with self._lock:
+            return next((srn for srn in self._rounds if srn.timestamp > asked), None)
+
+    def ready(self, game_id: str, turn_index: int) -> bool:
+        return self.round_for(game_id, turn_index) is not None
+
+
+def drbg_roll(source: "SrnSeedSource", game_id: str, turn_index: int) -> Tuple[int, int, Dict]:
+    """Dice for (game, turn) from the round bound to it + the proof to store with them."""
+    srn = source.round_for(game_id, turn_index)
+    if srn is None:
+        raise DicePoolEmpty("Waiting for the next secure random round, try again")
+    d1, d2 = roll_from_srn(srn.value, srn.timestamp, game_id, turn_index)
+    proof = {
+        "mode": "drbg",
+        "dice": [d1, d2],
+        "srnValue": hex(srn.value),
+        "srnTimestamp": srn.timestamp,
+        "askedAt": int(source.asked_at(game_id, turn_index)),
+        "gameId": game_id,
+        "turn": turn_index,
+    }
+    return d1, d2, proof
+
+
+srn_source = SrnSeedSource()
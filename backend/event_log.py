@@ -0,0 +1,264 @@
+# event_log.py
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import glob
+import json
+import os
+import threading
+import time
+
+
+def _default_dir() -> str:
+    base = os.path.dirname(os.path.abspath(__file__))
+    return os.getenv("EVENT_LOG_DIR", os.path.join(base, "data", "events"))
+
+
+def event_log_enabled() -> bool:
+    return os.getenv("EVENT_LOG", "1").strip() not in ("0", "false", "False")
+
+
+@dataclass
+class GameEvent:
+    """
+    One accepted game action. `tape` holds everything the action read from outside
+    the game (dice, clock, generated ids, which nonce a signature consumed), so
+    replaying it against the same state gives the same result without RPC calls.
+    `outcome` is GameState.outcome() right after the action, for divergence checks.
+    """
+    seq: int
+    ts: float
+    game_id: str
+    kind: str
+    args: List[Any] = field(default_factory=list)
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    tape: Dict[str, Any] = field(default_factory=dict)
+    failed: bool = False
+    outcome: Optional[Dict[str, Any]] = None
+
+    def to_line(self) -> str:
+        row = [self.seq, round(self.ts, 3), self.game_id, self.kind, self.args, self.kwargs, self.tape]
+        if self.failed or self.outcome is not None:
+            row.append(1 if self.failed else 0)
+        if self.outcome is not None:
+            row.append(self.outcome)
+        return json.dumps(row, separators=(",", ":")) + "\n"
+
+    @classmethod
+    def from_line(cls, line: str) -> "GameEvent":
+        row = json.loads(line)
+        return cls(
+            row[0], row[1], row[2], row[3], row[4], row[5], row[6],
+            len(row) > 7 and bool(row[7]),
+            row[8] if len(row) > 8 else None,
+        )
+
+
+class EventLog:
+    """
+    Append-only journal of game events plus periodic full snapshots.
+
+    append() only buffers; a writer thread writes the buffer and fsyncs it every
+    EVENT_FSYNC_MS, so one fsync covers every action of that window. Events go to
+    segment files events-<first seq>.log. snapshot() starts a new segment, dumps
+    every game (with the seq of the last event it contains) to snapshot-<seq>.json
+    and deletes the older segments and snapshots. restore() loads
+    the newest snapshot and replays the segments after it.
+    """
+
+    def __init__(self, dir_path: Optional[str] = None):
+        self.dir = dir_path or _default_dir()
+        self.fsync_ms = float(os.getenv("EVENT_FSYNC_MS", "50"))
+        self.snapshot_sec = float(os.getenv("EVENT_SNAPSHOT_SEC", "300"))
+        self.snapshot_events = int(os.getenv("EVENT_SNAPSHOT_EVENTS", "50000"))
+
+        self.seq = 0
+        self.events_since_snapshot = 0
+        self.last_snapshot_at: Optional[float] = None
+        self.fsyncs = 0
+
+        self._buf: List[str] = []
+        self._file = None
+        self._segment: Optional[str] = None
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------- writing ----------------
+
+    def _open_segment(self, first_seq: int):
+        os.makedirs(self.dir, exist_ok=True)
+        if self._file is not None:
+            self._file.close()
+        self._segment = os.path.join(self.dir, f"events-{first_seq:016d}.log")
+        self._file = open(self._segment, "a", encoding="utf-8")
+
+    def append(self, game_id: str, kind: str, args=None, kwargs=None, tape=None, failed: bool = False, outcome=None) -> int:
+        with self._lock:
+            self.seq += 1
+            ev = GameEvent(self.seq, time.time(), game_id, kind, args or [], kwargs or {}, tape or {}, failed, outcome)
+            self._buf.append(ev.to_line())
+            self.events_since_snapshot += 1
+            return self.seq
+
+    def flush(self):
+        with self._io_lock:
+            with self._lock:
+                lines, self._buf = self._buf, []
+            if not lines:
+                return
+            if self._file is None:
+                self._open_segment(GameEvent.from_line(lines[0]).seq)
+            self._file.write("".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+
+    # ---------------- snapshots ----------------
+
+    def _snapshots(self) -> List[Tuple[int, str]]:
+        out = []
+        for p in glob.glob(os.path.join(self.dir, "snapshot-*.json")):
+            out.append((int(os.path.basename(p)[9:-5]), p))
+        return sorted(out)
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        out = []
+        for p in glob.glob(os.path.join(self.dir, "events-*.log")):
+            out.append((int(os.path.basename(p)[7:-4]), p))
+        return sorted(out)
+
+    def snapshot(self, games) -> str:
+        """Write every game of a GameManager to a new snapshot; returns its path."""
+        with self._snapshot_lock:
+            with self._io_lock:
+                # everything before this point is in older segments
+                with self._lock:
+                    lines, self._buf = self._buf, []
+                    start_seq = self.seq
+                    self.events_since_snapshot = 0
+                if lines:
+                    if self._file is None:
+                        self._open_segment(GameEvent.from_line(lines[0]).seq)
+                    self._file.write("".join(lines))
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                self._open_segment(start_seq + 1)
+
+            # each dict is a command of the game's actor, queued after whatever journaled
+            # the events <= start_seq, so it holds them (later ones are skipped on restore
+            # by the game's lastSeq)
+            data = {
+                "seq": start_seq,
+                "createdAt": time.time(),
+                "games": games.to_dicts(),
+            }
+            path = os.path.join(self.dir, f"snapshot-{start_seq:016d}.json")
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+
+            with self._io_lock:
+                for first, p in self._segments():
+                    if first <= start_seq:
+                        os.remove(p)
+                for s, p in self._snapshots():
+                    if s < start_seq:
+                        os.remove(p)
+
+        self.last_snapshot_at = time.time()
+        return path
+
+    # ---------------- restore ----------------
+
+    def latest_snapshot(self) -> Tuple[int, Optional[Dict]]:
+        """(seq, snapshot data) of the newest snapshot, or (0, None)."""
+        snaps = self._snapshots()
+        if not snaps:
+            return 0, None
+        seq, path = snaps[-1]
+        with open(path, encoding="utf-8") as f:
+            return seq, json.load(f)
+
+    def read_events(self, after_seq: int = 0) -> Iterator[GameEvent]:
+        for _, p in self._segments():
+            with open(p, encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break  # torn write at the tail of a crashed segment
+                    ev = GameEvent.from_line(line)
+                    if ev.seq > after_seq:
+                        yield ev
+
+    def restore(self, games) -> Dict:
+        """Rebuild every game of a GameManager from disk; call before serving."""
+        t0 = time.time()
+        snap_seq, restored, replayed, failed = 0, 0, 0, 0
+        last_seq: Dict[str, int] = {}
+
+        snap_seq, data = self.latest_snapshot()
+        if data is not None:
+            for d in data["games"]:
+                games.restore(d)
+                last_seq[d["gameId"]] = d["lastSeq"]
+                restored += 1
+
+        top = snap_seq
+        for ev in self.read_events(snap_seq):
+            top = max(top, ev.seq)
+            if ev.seq <= last_seq.get(ev.game_id, 0):
+                continue
+            try:
+                games.apply_event(ev)
+                replayed += 1
+            except Exception as e:
+                failed += 1
+                print(f"❌ Event {ev.seq} ({ev.game_id}/{ev.kind}) failed to replay: {e}")
+
+        with self._lock:
+            self.seq = max(self.seq, top)
+        self._open_segment(self.seq + 1)
+        return {
+            "snapshotSeq": snap_seq,
+            "gamesFromSnapshot": restored,
+            "eventsReplayed": replayed,
+            "eventsFailed": failed,
+            "seq": self.seq,
+            "sec": round(time.time() - t0, 3),
+        }
+
+    # ---------------- background ----------------
+
+    def start(self, games):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(games,), name="event-log", daemon=True)
+        self._thread.start()
+
+    def _run(self, games):
+        self.last_snapshot_at = self.last_snapshot_at or time.time()
+        while True:
+            time.sleep(self.fsync_ms / 1000)
+            try:
+                self.flush()
+                due = time.time() - self.last_snapshot_at >= self.snapshot_sec
+                if self.events_since_snapshot and (due or self.events_since_snapshot >= self.snapshot_events):
+                    self.snapshot(games)
+            except Exception as e:
+                print(f"❌ Event log error: {e}")
+
+    def status(self) -> Dict:
+        return {
+            "seq": self.seq,
+            "segment": os.path.basename(self._segment) if self._segment else None,
+            "buffered": len(self._buf),
+            "fsyncs": self.fsyncs,
+            "eventsSinceSnapshot": self.events_since_snapshot,
+            "lastSnapshotAt": self.last_snapshot_at,
+        }
+
+
+event_log = EventLog()
@@ -1,36 +1,73 @@
-from transactions import PendingSettlement, TxVerifier
+from transactions import PendingSettlement, settled_txs, settlement_ttl_sec, tx_verifier
 from web3 import Web3
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Literal
+from array import array
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Literal
+import functools
+import hashlib
+import json
+import threading
 import time
 import uuid
 import os
 
-import crypto_random
+from dice_pool import DicePool, DicePoolEmpty, dice_pool, direct_dice
+from payouts import payout_queue
+from drbg import drbg_roll, srn_source
 from board import BOARD_LEN, TILES_BY_ID, BUYABLE_PROPERTY_IDS, CHANCE_IDS
-from chance import ChanceDeck
+from chance import chance_deck
+from rules import (
+    GOTO_PRISON_TILE_ID,
+    PRISON_TILE_ID,
+    PRISON_WAIT_TURNS,
+    START_BONUS_FC,
+    START_TILE_ID,
+    STARTING_BALANCE_FC,
+)
 from wallet import Wallet as FcWallet
 from player import Player
 
+from message_log import MessageLog
+from offer_book import OFFER_TTL_SEC, OfferBook, OfferType, TradeOffer
 from auth_sig import SigProof, build_action_message, verify_proof
+from session_keys import SESSION_TTL_SEC, SessionKey, new_session, verify_session_mac
 from chain.chain_fxrp import fxrp_client  # <-- use your real on-chain client :contentReference[oaicite:3]{index=3}
+from chain.balance_refresher import balance_refresher
 
 
 
-OfferType = Literal["sell", "buy"]
-
-START_TILE_ID = 0
-START_BONUS_FC = 200
 START_BONUS_FXRP = float(os.getenv("START_BONUS_FXRP", "0"))
-PRISON_WAIT_TURNS = 1
-PRISON_TILE_ID = 6
-GOTO_PRISON_TILE_ID = 18
 
 
 # GameFXRP is almost certainly 18 decimals (wei-style). Keep it explicit.
 FXRP_DECIMALS = int(os.getenv("FXRP_DECIMALS", "18"))
 
+# Per-player columns of GameState: (attribute, to_dict key, array typecode, value
+# at reset). "q" for anything money/nonce-like, "b" for small counters and flags.
+_SEATS = (
+    ("player_pos", "playerPos", "b", START_TILE_ID),
+    ("balances", "balances", "q", STARTING_BALANCE_FC),
+    ("eliminated", "eliminated", "b", False),
+    ("skip_turns", "skipTurns", "b", 0),
+    ("nonces", "nonces", "q", 0),
+)
+
+
+def _dice_mode() -> str:
+    # pool = pre-fetched verified rolls (default), direct = one rollDice tx per /roll
+    # (sent in the background, the /roll is retried), drbg = derived from the SRN
+    # (no tx at all, see drbg.py)
+    return os.getenv("DICE_MODE", "pool").strip().lower()
+
+
+def _dice_source() -> Optional[DicePool]:
+    # None for drbg (srn_source instead)
+    mode = _dice_mode()
+    if mode == "drbg":
+        return None
+    return direct_dice if mode == "direct" else dice_pool
+
 
 def _require_sig_enabled() -> bool:
     return os.getenv("REQUIRE_SIG", "1").strip() not in ("0", "false", "False")
@@ -40,89 +77,295 @@ def _to_checksum(a: str) -> str:
     return Web3.to_checksum_address(a)
 
 
-@dataclass
+# ---------------- event journal (see event_log.py) ----------------
+
+# a failed action is still journaled if it got this far (consumed a nonce / expired offers)
+_DIRTY_ON_ERROR = ("nonce", "expired")
+
+
+def _encode_arg(v):
+    # proofs are checked once, live; a replay only needs to know who signed
+    if isinstance(v, SigProof):
+        return {"$proof": v.address}
+    return v
+
+
+def _decode_arg(v):
+    if isinstance(v, dict) and "$proof" in v:
+        return SigProof(address=v["$proof"], message="", signature="")
+    return v
+
+
+def journaled(fn):
+    """
+    GameState action: runs under the game lock and, with a journal attached, is
+    appended to it once it returns (not when it returns False = nothing happened).
+    Calls made from inside another action, or during a replay, belong to that event.
+    """
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            if self._tape is not None or self.journal is None:
+                return fn(self, *args, **kwargs)
+            self._tape, self._cursor = {}, {}
+            try:
+                result = fn(self, *args, **kwargs)
+            except Exception:
+                if any(k in self._tape for k in _DIRTY_ON_ERROR):
+                    self._write_event(fn.__name__, args, kwargs, failed=True)
+                raise
+            else:
+                if result is not False:
+                    self._write_event(fn.__name__, args, kwargs)
+                return result
+            finally:
+                self._tape = None
+
+    wrapper.journaled = True
+    return wrapper
+
+
+@dataclass(slots=True)
 class Message:
     user: str
     text: str
     type: str = "chat"
     delta: Optional[int] = None
 
-
-@dataclass
-class TradeOffer:
-    id: str
-    type: OfferType
-    from_player: int
-    to_player: int
-    tile_id: int
-    price_fc: int
-    created_at: int
+    def to_front(self):
+        return {"user": self.user, "text": self.text, "type": self.type, "delta": self.delta}
+
+
+@dataclass(frozen=True, slots=True)
+class GameView:
+    """
+    What a game looked like at one commit. Built by the game's writer (see
+    game_actor.py) and never changed afterwards, so any thread can serve it
+    without a lock. `front` is the _last_front dict of that commit (commit()
+    replaces it instead of mutating it).
+    """
+    game_id: str
+    version: int
+    reset_version: int
+    front: Dict[str, Any]
+    key_versions: Dict[str, int]
+    messages: MessageLog
+    created_at: float
+
+    def _balances_age_sec(self) -> List[Optional[float]]:
+        now_ms = time.time() * 1000
+        return [
+            round((now_ms - ts) / 1000, 1) if ts else None
+            for ts in self.front.get("balancesFXRPUpdatedAt", [])
+        ]
 
     def to_front(self):
         return {
-            "id": self.id,
-            "type": self.type,
-            "from": self.from_player,
-            "to": self.to_player,
-            "tileId": self.tile_id,
-            "priceFC": self.price_fc,
-            "createdAt": self.created_at,
+            **self.front,
+            "balancesFXRPAgeSec": self._balances_age_sec(),
+            # only the newest SNAPSHOT_MESSAGES; older ones via /messages?before=
+            "messages": self.messages.tail(),
+            "version": self.version,
+        }
+
+    def to_delta(self, since: Optional[int]):
+        """
+        Only what changed after `since`: changed top-level keys + new messages.
+        Falls back to a full snapshot (full=True) when the client is too far behind
+        (unknown version, a reset happened in between, or messages it misses
+        already left the in-memory ring).
+        """
+        if since is None or since < self.reset_version or since > self.version:
+            return {**self.to_front(), "full": True}
+
+        new_messages = self.messages.since_version(since)
+        if new_messages is None:
+            return {**self.to_front(), "full": True}
+        return {
+            "version": self.version,
+            "since": since,
+            "full": False,
+            "changed": {k: self.front[k] for k, v in self.key_versions.items() if v > since},
+            "messages": new_messages,
+            "messagesFrom": new_messages[0]["id"] if new_messages else None,
+            "balancesFXRPAgeSec": self._balances_age_sec(),
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class GameState:
+    """
+    One table's rules state. Slotted, with the per-player columns (player_pos,
+    balances, eliminated, skip_turns, nonces; array typecodes in _SEATS) as
+    fixed-width arrays of players_count entries, and no per-game copies of
+    anything shared: board tables, the chance deck and the tx verifier are
+    module singletons. bench_game_memory.py measures what a game costs.
+    """
     players_count: int = 3
+    game_id: str = field(default_factory=lambda: os.getenv("GAME_ID", "local"))
 
     dice: List[int] = field(default_factory=lambda: [1, 1])
-    player_pos: List[int] = field(default_factory=lambda: [0, 0, 0, 0])
+    # audit trail of the last secure roll (requestId / txHash, or DRBG inputs)
+    dice_proof: Optional[Dict] = None
+    # rolls made so far by this game; never reset so DRBG inputs never repeat
+    turn_index: int = 0
+    player_pos: array = field(init=False)
     active_player: int = 0
 
-    eliminated: List[bool] = field(default_factory=lambda: [False, False, False, False])
+    eliminated: array = field(init=False)
     game_over: bool = False
     winner: Optional[int] = None
-    chance_deck: ChanceDeck = field(default_factory=ChanceDeck)
-    skip_turns: List[int] = field(default_factory=lambda: [0, 0, 0, 0])
+    skip_turns: array = field(init=False)
 
     ownership: Dict[int, int] = field(default_factory=dict)
     buy_prompt: Optional[Dict] = None
 
     # In-game FC (for bankruptcy/winner logic)
-    balances: List[int] = field(default_factory=lambda: [1000, 1000, 1000])
+    balances: array = field(init=False)
 
-    trade_offers: List[TradeOffer] = field(default_factory=list)
+    trade_offers: OfferBook = field(default_factory=OfferBook)
 
-    messages: List[Message] = field(default_factory=lambda: [Message("System", "Welcome to FlarePoly Testnet!", "system")])
+    # bounded, id-stamped log (older entries spill to SQLite, see message_log.py)
+    messages: MessageLog = field(init=False, repr=False)
 
     # Wallet mapping + signature nonces
-    player_wallets: List[Optional[str]] = field(default_factory=lambda: [None, None, None, None])
-    nonces: List[int] = field(default_factory=lambda: [0, 0, 0, 0])
+    player_wallets: List[Optional[str]] = field(init=False)
+    nonces: array = field(init=False)
+    # player index -> active session key (see session_keys.py)
+    sessions: Dict[int, SessionKey] = field(default_factory=dict, repr=False)
 
     # Pending settlement: we require an on-chain FXRP transfer before finalizing buy/trade
     pending_settlement: Optional[PendingSettlement] = None
-    tx_verifier: TxVerifier = field(default_factory=TxVerifier)
 
+    # Delta sync: state version and version at which each front key last changed
+    # (messages carry their own commit version in the MessageLog)
+    version: int = 0
+    _reset_version: int = field(default=0, init=False, repr=False)
+    _key_versions: Dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    _last_front: Dict[str, Any] = field(default_factory=dict, init=False, repr=False)
+
+    # Event journal: hook(game_id, kind, args, kwargs, tape, failed) -> seq, seq of the
+    # last journaled event, and the tape of the action in progress (external inputs)
+    journal: Optional[Callable[..., int]] = field(default=None, init=False, repr=False, compare=False)
+    last_seq: int = field(default=0, init=False, repr=False)
+    _tape: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+    _cursor: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _replaying: bool = field(default=False, init=False, repr=False, compare=False)
+    _lock: Any = field(default_factory=threading.RLock, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._seat_players()
+        self.messages = MessageLog(self.game_id)
+        self.add_message("System", "Welcome to FlarePoly Testnet!", "system")
+
+    def _seat_players(self, d: Optional[Dict[str, Any]] = None):
+        """Per-player columns for players_count seats: fresh, or from to_dict() output."""
+        n = self.players_count
+        for name, key, typecode, start in _SEATS:
+            setattr(self, name, array(typecode, d[key] if d else [start] * n))
+        self.player_wallets = list(d["playerWallets"]) if d else [None] * n
+
+    @journaled
     def reset(self):
         self.dice = [1, 1]
-        self.player_pos = [0] * self.players_count
+        self.dice_proof = None
         self.active_player = 0
 
         self.ownership = {}
         self.buy_prompt = None
 
-        self.balances = [1000, 1000, 1000][: self.players_count]
-        self.trade_offers = []
-        self.messages = [Message("System", "Welcome to FlarePoly Testnet!", "system")]
+        self._seat_players()
+        self.trade_offers.clear()
+        self.messages.clear()
+        self.add_message("System", "Welcome to FlarePoly Testnet!", "system")
 
-        self.eliminated = [False] * self.players_count
         self.game_over = False
         self.winner = None
-        self.skip_turns = [0] * self.players_count
 
-        self.player_wallets = [None] * self.players_count
-        self.nonces = [0] * self.players_count
+        self.sessions = {}
         self.pending_settlement = None
 
+        # clients holding an older version must resync from a full snapshot
+        self._reset_version = self.version + 1
+        self._last_front = {}
+
+    # ---------------- journal / replay ----------------
+
+    def _external(self, key: str, produce: Callable[[], Any], many: bool = False):
+        """
+        A value from outside the game (dice, clock, ids). Recorded on the tape of
+        the current action; a replay reads it back instead of calling produce().
+        many=True: the action may need several (a list, consumed in order).
+        """
+        tape = self._tape
+        if tape is None:
+            return produce()
+        if many:
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            values = tape.setdefault(key, []) if not self._replaying else tape.get(key, [])
+            if i < len(values):
+                return values[i]
+        elif key in tape:
+            return tape[key]
+        if self._replaying:
+            raise ValueError(f"replay: '{key}' missing from the event")
+
+        value = produce()
+        if many:
+            tape[key].append(value)
+        else:
+            tape[key] = value
+        return value
+
+    def _mark(self, key: str, value: Any = 1):
+        if self._tape is not None and not self._replaying:
+            self._tape[key] = value
+
+    def _now(self) -> float:
+        # one wall-clock reading per action, so a replay sees the same time
+        return self._external("now", time.time)
+
+    def _write_event(self, kind: str, args, kwargs, failed: bool = False):
+        self.last_seq = self.journal(
+            self.game_id,
+            kind,
+            [_encode_arg(a) for a in args],
+            {k: _encode_arg(v) for k, v in kwargs.items()},
+            self._tape,
+            failed,
+            self.outcome(),
+        )
+
+    def outcome(self) -> Dict[str, Any]:
+        """Short fingerprint of the rule state: a few readable fields + a digest of the rest."""
+        ps = self.pending_settlement
+        rules = [
+            self.dice, list(self.player_pos), self.active_player, list(self.balances), list(self.skip_turns),
+            self._eliminated(), self.game_over, self.winner, sorted(self.ownership.items()),
+            self.buy_prompt, list(self.nonces), [o.id for o in self.trade_offers],
+            [ps.kind, ps.tile_id, str(ps.amount_raw), ps.offer_id] if ps else None,
+            self.messages.next_id, self.turn_index,
+        ]
+        digest = hashlib.sha1(json.dumps(rules, separators=(",", ":"), default=str).encode()).hexdigest()[:16]
+        return {"active": self.active_player, "pos": list(self.player_pos), "balances": list(self.balances), "digest": digest}
+
+    def apply_event(self, ev):
+        """Replay one journaled action (an event_log.GameEvent) against this state."""
+        fn = getattr(type(self), ev.kind, None)
+        if not getattr(fn, "journaled", False):
+            raise ValueError(f"Unknown event kind: {ev.kind}")
+        with self._lock:
+            self._tape, self._cursor, self._replaying = ev.tape, {}, True
+            try:
+                fn(self, *[_decode_arg(a) for a in ev.args], **{k: _decode_arg(v) for k, v in ev.kwargs.items()})
+            except Exception:
+                if not ev.failed:
+                    raise
+            finally:
+                self._tape, self._replaying = None, False
+                self.last_seq = ev.seq
+
     # ---------------- helpers ----------------
     def _bank_pay_fxrp(self, player_index: int, fxrp_amount: float, reason: str):
         if fxrp_amount <= 0:
@@ -139,20 +382,20 @@ class GameState:
 
         amount_raw = int(round(fxrp_amount * (10 ** FXRP_DECIMALS)))
 
-        try:
-            txh = fxrp_client.transfer_from_bank(addr, amount_raw)
-            self.add_message(
-                "System",
-                f"Bank paid {fxrp_amount} FXRP for {reason} (tx={txh[:10]}...)",
-                "system",
-            )
-        except Exception as e:
-            self.add_message(
-                "System",
-                f"Bank payout failed ({reason}): {e}",
-                "system",
-            )
+        # Sent in the background by the payout worker; status shows up in state.payouts.
+        # The queue is durable on its own, so a replay only needs the id back.
+        payout_id = self._external(
+            "payouts",
+            lambda: payout_queue.enqueue(self.game_id, player_index, addr, amount_raw, reason).id,
+            many=True,
+        )
+        self.add_message(
+            "System",
+            f"Bank payout queued: {fxrp_amount} FXRP for {reason} (id={payout_id[:8]})",
+            "system",
+        )
 
+    @journaled
     def chat(self, text: str, proof: Optional[SigProof] = None):
         text = (text or "").strip()
         if not text:
@@ -165,7 +408,10 @@ class GameState:
         self.add_message(f"P{p+1}", text, "chat")
 
     def add_message(self, user: str, text: str, msg_type: str = "chat", delta: Optional[int] = None):
-        self.messages.append(Message(user, text, msg_type, delta))
+        self.messages.append(Message(user, text, msg_type, delta).to_front())
+
+    def _eliminated(self) -> List[bool]:
+        return [bool(e) for e in self.eliminated]
 
     def _alive_players(self) -> List[int]:
         return [i for i in range(self.players_count) if not self.eliminated[i]]
@@ -188,7 +434,7 @@ class GameState:
             self.winner = alive[0]
             self.add_message("System", f"P{self.winner+1} wins! 🎉", "system")
             self.buy_prompt = None
-            self.trade_offers = []
+            self.trade_offers.clear()
             self.pending_settlement = None
             return
 
@@ -196,7 +442,27 @@ class GameState:
             self._advance_to_next_alive()
 
     def incoming_offers_for_active(self) -> List[TradeOffer]:
-        return [o for o in self.trade_offers if o.to_player == self.active_player]
+        return self.trade_offers.for_recipient(self.active_player)
+
+    @journaled
+    def expire_offers(self, now_ms: Optional[int] = None) -> bool:
+        """Drop offers past OFFER_TTL_SEC (never the one a pending trade settles)."""
+        if not len(self.trade_offers):
+            return False
+        keep = self.pending_settlement.offer_id if self.pending_settlement else None
+        now_ms = int(self._now() * 1000) if now_ms is None else now_ms
+        expired = self.trade_offers.expire(now_ms, keep=keep)
+        if expired:
+            self._mark("expired")
+        for o in expired:
+            self.add_message("System", f"Offer expired: {TILES_BY_ID[o.tile_id].name} P{o.from_player+1} → P{o.to_player+1}", "system")
+        return bool(expired)
+
+    def _set_owner(self, tile_id: int, player: int, keep_offer: Optional[str] = None):
+        self.ownership[tile_id] = player
+        # offers on this tile were made against the previous owner
+        if self.trade_offers.invalidate_tile(tile_id, keep=keep_offer):
+            self.add_message("System", f"Open offers for {TILES_BY_ID[tile_id].name} cancelled: owner changed", "system")
 
     def next_player(self):
         if self.game_over:
@@ -211,13 +477,30 @@ class GameState:
             raise ValueError("Active player eliminated")
         if self.buy_prompt is not None:
             raise ValueError("Blocked: buyPrompt pending")
-        if len(self.incoming_offers_for_active()) > 0:
+        self.expire_offers()
+        if self.trade_offers.has_incoming(self.active_player):
             raise ValueError("Blocked: incoming offers pending")
         if self.pending_settlement is not None:
             raise ValueError("Blocked: pending on-chain settlement")
 
+    def _draw_dice(self) -> List:
+        source = _dice_source()
+        if source is None:
+            d1, d2, proof = drbg_roll(srn_source, self.game_id, self.turn_index)
+            return [d1, d2, proof]
+        roll = source.take()
+        return [roll.die1, roll.die2, roll.to_front()]
+
+    def _dice_ready(self) -> bool:
+        source = _dice_source()
+        if source is None:
+            # the first call also fixes which SRN round this turn's dice come from
+            return srn_source.ready(self.game_id, self.turn_index)
+        return source.ready()
+
     def _roll_dice(self) -> List[int]:
-        d1, d2 = crypto_random.roll_dice()
+        d1, d2, self.dice_proof = self._external("dice", self._draw_dice)
+        self.turn_index += 1
         self.dice = [d1, d2]
         return self.dice
 
@@ -255,8 +538,12 @@ class GameState:
             wallet=w,
         )
 
-        result = self.chance_deck.apply(pl)
-        self.balances[player_index] = pl.wallet.balance
+        def draw():
+            res = chance_deck.apply(pl)
+            return [pl.wallet.balance - self.balances[player_index], res]
+
+        delta_fc, result = self._external("chance", draw)
+        self.balances[player_index] += delta_fc
 
         # In-game message
         self.add_message(
@@ -269,29 +556,7 @@ class GameState:
         # --- ON-CHAIN BANK → PLAYER PAYOUT ---
         payout_fxrp = result.get("payoutFxrp")
         if payout_fxrp and payout_fxrp > 0:
-            addr = self.player_wallets[player_index]
-
-            if not addr:
-                self.add_message(
-                    "System",
-                    "Chance payout skipped (wallet not connected)",
-                    "system",
-                )
-            else:
-                amount_raw = int(payout_fxrp * (10 ** FXRP_DECIMALS))
-                try:
-                    txh = fxrp_client.transfer_from_bank(addr, amount_raw)
-                    self.add_message(
-                        "System",
-                        f"Bank paid {payout_fxrp} FXRP on-chain (tx={txh[:10]}...)",
-                        "system",
-                    )
-                except Exception as e:
-                    self.add_message(
-                        "System",
-                        f"Bank payout failed: {e}",
-                        "system",
-                    )
+            self._bank_pay_fxrp(player_index, float(payout_fxrp), "chance")
 
         self._check_bankruptcy_and_win()
 
@@ -299,33 +564,37 @@ class GameState:
 
 
 
+    @journaled
     def connect_wallet(self, player_index: int, proof: SigProof, expected_message: str):
         if player_index < 0 or player_index >= self.players_count:
             raise ValueError("Invalid player index")
-        if proof.message != expected_message:
-            raise ValueError("Message mismatch")
-        if not verify_proof(proof):
-            raise ValueError("Invalid signature")
+        if not self._replaying:
+            if proof.message != expected_message:
+                raise ValueError("Message mismatch")
+            if not verify_proof(proof):
+                raise ValueError("Invalid signature")
 
         self.player_wallets[player_index] = proof.address
+        self.sessions.pop(player_index, None)
         self.add_message("System", f"P{player_index+1} connected wallet {proof.address}", "system")
 
-    def _require_sig(self, action: str, params: str, proof: Optional[SigProof]):
-        if not _require_sig_enabled():
+    def _check_proof(self, p: int, action: str, params: str, proof: Optional[SigProof], allow_session: bool = True):
+        """Checks a nonce-bound action proof of player p and consumes the nonce."""
+        if self._replaying:
+            if self._tape.get("nonce") == p:
+                self.nonces[p] += 1
             return
-
         if proof is None:
             raise ValueError("Missing signature proof")
 
-        p = self.active_player
         addr = self.player_wallets[p]
         if not addr:
-            raise ValueError("Active player has no connected wallet")
+            raise ValueError("Player has no connected wallet")
         if proof.address.lower() != addr.lower():
             raise ValueError("Signature wallet != connected wallet")
 
         expected = build_action_message(
-            game_id=os.getenv("GAME_ID", "local"),
+            game_id=self.game_id,
             chain_id=fxrp_client.get_chain_id(),
             player_index=p,
             action=action,
@@ -334,10 +603,45 @@ class GameState:
         )
         if proof.message != expected:
             raise ValueError("Bad signed message (nonce/params mismatch)")
-        if not verify_proof(proof):
+
+        if proof.session:
+            # cheap path: HMAC with the session key instead of ecrecover
+            session = self.sessions.get(p)
+            if not allow_session or session is None or session.session_id != proof.session:
+                raise ValueError("Unknown session")
+            if session.expired():
+                self.sessions.pop(p, None)
+                raise ValueError("Session expired")
+            if not verify_session_mac(session, expected, proof.signature):
+                raise ValueError("Invalid session signature")
+        elif not verify_proof(proof):
             raise ValueError("Invalid signature")
 
         self.nonces[p] += 1
+        self._mark("nonce", p)
+
+    def _require_sig(self, action: str, params: str, proof: Optional[SigProof]):
+        if not _require_sig_enabled() and not self._replaying:
+            return
+        self._check_proof(self.active_player, action, params, proof)
+
+    @journaled
+    def start_session(self, player_index: int, proof: SigProof) -> Optional[SessionKey]:
+        """
+        One wallet signature over START_SESSION (params ttl=SESSION_TTL_SEC) unlocks
+        a session key; later actions can carry an HMAC of the same nonce-bound
+        message instead of a personal_sign.
+        """
+        if player_index < 0 or player_index >= self.players_count:
+            raise ValueError("Invalid player index")
+        self._check_proof(player_index, "START_SESSION", f"ttl={SESSION_TTL_SEC}", proof, allow_session=False)
+        if self._replaying:
+            # only the nonce is replayed; the secret never left that one response
+            return None
+
+        session = new_session(player_index, self.player_wallets[player_index])
+        self.sessions[player_index] = session
+        return session
 
     # ---------------- economics (keep deterministic + simple) ----------------
 
@@ -353,19 +657,23 @@ class GameState:
     # ---------------- settlement verification (on-chain) ----------------
 
 
+    @journaled
     def roll(self, proof: Optional[SigProof] = None):
         self._advance_to_next_alive()
 
         # prison skip
         if self.skip_turns[self.active_player] > 0:
             p = self.active_player
-            self.skip_turns[p] -= 1
             self._require_sig("SKIP_TURN", "reason=prison", proof)
+            self.skip_turns[p] -= 1
             self.add_message("System", f"P{p + 1} skips this turn (Prison)", "system")
             self.next_player()
             return
 
         self._guard_turn_not_blocked()
+        # no roll at hand fails the roll before the signature's nonce is spent
+        if not self._replaying and not self._dice_ready():
+            raise DicePoolEmpty("No secure dice roll available yet, try again")
         self._require_sig("ROLL", "", proof)
 
         d1, d2 = self._roll_dice()
@@ -401,6 +709,7 @@ class GameState:
 
         self.next_player()
 
+    @journaled
     def buy(self, proof: Optional[SigProof] = None, tile_id: Optional[int] = None):
         if self.buy_prompt is None:
             raise ValueError("No buy prompt")
@@ -426,25 +735,29 @@ class GameState:
             raise ValueError("Tile has no price")
 
         buyer_addr = self.player_wallets[p]
-        if _require_sig_enabled() and not buyer_addr:
+        if self._external("requireSig", _require_sig_enabled) and not buyer_addr:
             raise ValueError("Wallet not connected")
 
         cost_raw = self._usd_to_fxrp_raw(float(tile.price))
 
-        to_addr = os.getenv("TREASURY_WALLET")
+        to_addr = self._external("treasury", lambda: os.getenv("TREASURY_WALLET"))
         if not to_addr:
             raise ValueError("TREASURY_WALLET not configured")
 
+        now = self._now()
         self.pending_settlement = PendingSettlement(
             kind="buy",
             from_addr=buyer_addr,
             to_addr=to_addr,
             amount_raw=cost_raw,
             tile_id=prompt_tile,
+            created_at=now,
+            expires_at=now + settlement_ttl_sec(),
         )
 
-        self.add_message("System", f"Payment required: send FXRP(raw={cost_raw}) then submit tx hash via /settle", "system")
+        self.add_message("System", f"Payment required: send FXRP(raw={cost_raw}), it is picked up automatically (or submit the tx hash via /settle)", "system")
 
+    @journaled
     def skip_buy(self, proof: Optional[SigProof] = None):
         if self.buy_prompt is None:
             raise ValueError("No buy prompt")
@@ -457,7 +770,10 @@ class GameState:
         self.buy_prompt = None
         self.next_player()
 
+    @journaled
     def create_offer(self, proof: Optional[SigProof], offer_type: OfferType, to_player: int, tile_id: int, price_fc: int):
+        if to_player < 0 or to_player >= self.players_count:
+            raise ValueError("Invalid player index")
         self._guard_turn_not_blocked()
         self._require_sig("CREATE_OFFER", f"type={offer_type}&to={to_player}&tileId={tile_id}&priceFC={price_fc}", proof)
 
@@ -480,16 +796,18 @@ class GameState:
             if owner != to_player:
                 raise ValueError("Target must be the current owner")
 
+        now_ms = int(self._now() * 1000)
         offer = TradeOffer(
-            id=str(uuid.uuid4()),
+            id=self._external("offerId", lambda: str(uuid.uuid4())),
             type=offer_type,
             from_player=self.active_player,
             to_player=to_player,
             tile_id=tile_id,
             price_fc=int(price_fc),
-            created_at=int(time.time() * 1000),
+            created_at=now_ms,
+            expires_at=now_ms + int(OFFER_TTL_SEC * 1000) if OFFER_TTL_SEC > 0 else None,
         )
-        self.trade_offers.insert(0, offer)
+        self.trade_offers.add(offer)
 
         if offer_type == "sell":
             self.add_message("System", f"P{offer.from_player+1} offers to SELL {tile.name} to P{offer.to_player+1} for {offer.price_fc} FC", "system")
@@ -497,15 +815,17 @@ class GameState:
             self.add_message("System", f"P{offer.from_player+1} offers to BUY {tile.name} from P{offer.to_player+1} for {offer.price_fc} FC", "system")
 
     def _find_offer(self, offer_id: str) -> TradeOffer:
-        for o in self.trade_offers:
-            if o.id == offer_id:
-                return o
-        raise ValueError("Offer not found")
+        offer = self.trade_offers.get(offer_id)
+        if offer is None:
+            raise ValueError("Offer not found")
+        return offer
 
     def _remove_offer(self, offer_id: str):
-        self.trade_offers = [o for o in self.trade_offers if o.id != offer_id]
+        self.trade_offers.remove(offer_id)
 
+    @journaled
     def accept_offer(self, proof: Optional[SigProof], offer_id: str):
+        self.expire_offers()
         offer = self._find_offer(offer_id)
         if self.active_player != offer.to_player:
             raise ValueError("Accept offers only on your turn")
@@ -528,10 +848,11 @@ class GameState:
 
         buyer_addr = self.player_wallets[buyer]
         seller_addr = self.player_wallets[seller]
-        if _require_sig_enabled() and (not buyer_addr or not seller_addr):
+        if self._external("requireSig", _require_sig_enabled) and (not buyer_addr or not seller_addr):
             raise ValueError("Both players must have connected wallets")
 
         amount_raw = self._fc_to_fxrp_raw(offer.price_fc)
+        now = self._now()
         self.pending_settlement = PendingSettlement(
             kind="trade",
             from_addr=buyer_addr,
@@ -539,10 +860,13 @@ class GameState:
             amount_raw=amount_raw,
             tile_id=offer.tile_id,
             offer_id=offer_id,
+            created_at=now,
+            expires_at=now + settlement_ttl_sec(),
         )
 
-        self.add_message("System", f"Trade settlement required: send FXRP(raw={amount_raw}) then submit tx hash via /settle", "system")
+        self.add_message("System", f"Trade settlement required: send FXRP(raw={amount_raw}), it is picked up automatically (or submit the tx hash via /settle)", "system")
 
+    @journaled
     def decline_offer(self, proof: Optional[SigProof], offer_id: str):
         offer = self._find_offer(offer_id)
         if self.active_player != offer.to_player:
@@ -554,6 +878,7 @@ class GameState:
         self._remove_offer(offer_id)
         self.next_player()
 
+    @journaled
     def settle(self, proof: Optional[SigProof], tx_hash: str):
         if not self.pending_settlement:
             raise ValueError("No pending settlement")
@@ -562,26 +887,83 @@ class GameState:
 
         ps = self.pending_settlement
 
-        self.tx_verifier.verify_fxrp_transfer(
-            tx_hash=tx_hash,
-            expected_from=ps.from_addr,
-            expected_to=ps.to_addr,
-            expected_amount_raw=int(ps.amount_raw),
-        )
+        if not self._replaying:
+            tx_verifier.verify_fxrp_transfer(
+                tx_hash=tx_hash,
+                expected_from=ps.from_addr,
+                expected_to=ps.to_addr,
+                expected_amount_raw=int(ps.amount_raw),
+            )
+        if not self._claim_and_finalize(tx_hash):
+            raise ValueError("tx already used for another settlement")
+
+    @journaled
+    def settle_from_transfer(
+        self, tx_hash: str, from_addr: str, to_addr: str, amount_raw: int, block_ts: Optional[int] = None
+    ) -> bool:
+        """
+        Called by the Transfer-log watcher: finalize the pending settlement if this
+        on-chain transfer pays it. No signature needed, the transfer itself is the proof.
+        A transfer mined before the settlement existed pays for something else.
+        """
+        ps = self.pending_settlement
+        if ps is None or not ps.matches(from_addr, to_addr, amount_raw):
+            return False
+        # block timestamps are whole seconds
+        if block_ts is not None and int(block_ts) < int(ps.created_at):
+            return False
+        return self._claim_and_finalize(tx_hash)
+
+    def _claim_and_finalize(self, tx_hash: str) -> bool:
+        # claims live in SQLite; a replay finds its own hash already claimed
+        if not settled_txs.claim(tx_hash) and not self._replaying:
+            return False
+        try:
+            self._finalize_settlement(tx_hash)
+        except Exception:
+            # the payment settled nothing, so it stays usable
+            if not self._replaying:
+                settled_txs.release(tx_hash)
+            raise
+        return True
+
+    @journaled
+    def expire_settlement(self, now: Optional[float] = None) -> bool:
+        ps = self.pending_settlement
+        if ps is None or not ps.expired(self._now() if now is None else now):
+            return False
+
+        tile = TILES_BY_ID[ps.tile_id]
+        self.pending_settlement = None
+        if ps.kind == "buy":
+            self.buy_prompt = None
+            self.add_message("System", f"Payment window expired: {tile.name} not bought", "system")
+        else:
+            if ps.offer_id:
+                self._remove_offer(ps.offer_id)
+            self.add_message("System", f"Payment window expired: trade for {tile.name} cancelled", "system")
+        self.next_player()
+        return True
+
+    def _finalize_settlement(self, tx_hash: str):
+        ps = self.pending_settlement
+        if not self._replaying:
+            balance_refresher.touch(ps.from_addr)
+            balance_refresher.touch(ps.to_addr)
 
-        tile = TILES_BY_ID[ps["tileId"]]
+        tile = TILES_BY_ID[ps.tile_id]
 
-        if ps["kind"] == "buy":
+        if ps.kind == "buy":
             p = self.active_player
-            self.ownership[ps["tileId"]] = p
-            self.add_message("System", f"Buy settled: P{p+1} bought {tile.name} (paid on-chain)", "system")
+            self._set_owner(ps.tile_id, p)
+            self.add_message("System", f"Buy settled: P{p+1} bought {tile.name} (paid on-chain, tx={tx_hash[:10]}...)", "system")
             self.buy_prompt = None
             self.pending_settlement = None
             self.next_player()
             return
 
-        if ps["kind"] == "trade":
-            offer_id = ps["offerId"]
+        if ps.kind == "trade":
+            offer_id = ps.offer_id
             offer = self._find_offer(offer_id)
 
             seller = offer.from_player if offer.type == "sell" else offer.to_player
@@ -596,8 +978,8 @@ class GameState:
                 self.pending_settlement = None
                 return
 
-            self.ownership[offer.tile_id] = buyer
-            self.add_message("System", f"Trade settled: {tile.name} P{seller+1} → P{buyer+1} (paid on-chain)", "system")
+            self._set_owner(offer.tile_id, buyer, keep_offer=offer_id)
+            self.add_message("System", f"Trade settled: {tile.name} P{seller+1} → P{buyer+1} (paid on-chain, tx={tx_hash[:10]}...)", "system")
             self._remove_offer(offer_id)
             self.pending_settlement = None
             self.next_player()
@@ -607,34 +989,139 @@ class GameState:
 
     # ---------------- serialization ----------------
 
-    def to_front(self):
-        # On-chain FXRP balances via your chain_fxrp client
+    def to_dict(self) -> Dict[str, Any]:
+        """Full rule state for event-log snapshots (no sessions, no delta-sync bookkeeping)."""
+        with self._lock:
+            self.commit()
+            ps = self.pending_settlement
+            return {
+                "gameId": self.game_id,
+                "playersCount": self.players_count,
+                "lastSeq": self.last_seq,
+                "version": self.version,
+                "dice": list(self.dice),
+                "diceProof": self.dice_proof,
+                "turnIndex": self.turn_index,
+                "playerPos": list(self.player_pos),
+                "activePlayer": self.active_player,
+                "eliminated": self._eliminated(),
+                "gameOver": self.game_over,
+                "winner": self.winner,
+                "skipTurns": list(self.skip_turns),
+                "ownership": [[k, v] for k, v in self.ownership.items()],
+                "buyPrompt": dict(self.buy_prompt) if self.buy_prompt else None,
+                "balances": list(self.balances),
+                "tradeOffers": self.trade_offers.to_dict(),
+                "messages": self.messages.to_dict(),
+                "playerWallets": list(self.player_wallets),
+                "nonces": list(self.nonces),
+                "pendingSettlement": asdict(ps) if ps else None,
+            }
+
+    def load_dict(self, d: Dict[str, Any]):
+        with self._lock:
+            self.players_count = int(d["playersCount"])
+            self.last_seq = int(d["lastSeq"])
+            self.dice = list(d["dice"])
+            self.dice_proof = d["diceProof"]
+            self.turn_index = int(d["turnIndex"])
+            self.active_player = int(d["activePlayer"])
+            self.game_over = bool(d["gameOver"])
+            self.winner = d["winner"]
+            self._seat_players(d)
+            self.ownership = {int(k): int(v) for k, v in d["ownership"]}
+            self.buy_prompt = d["buyPrompt"]
+            self.trade_offers.load_dict(d["tradeOffers"])
+            self.messages.load_dict(d["messages"])
+            self.sessions = {}
+            ps = d["pendingSettlement"]
+            self.pending_settlement = PendingSettlement(**ps) if ps else None
+
+            # versions keep counting up; anything a client holds is stale now
+            self.version = int(d["version"])
+            self._reset_version = self.version + 1
+            self._last_front = {}
+            self._key_versions = {}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "GameState":
+        game = cls(players_count=int(d["playersCount"]), game_id=d["gameId"])
+        game.load_dict(d)
+        return game
+
+    def _front_fields(self) -> Dict[str, Any]:
+        # Fresh copies only: commit() compares these against the previous call.
+        # FXRP balances come from the background refresher cache, never from RPC here.
         balances_fxrp = []
-        for a in self.player_wallets[: self.players_count]:
-            balances_fxrp.append(fxrp_client.get_balance(a) if a else 0.0)
+        balances_at = []
+        wallets = self.player_wallets[: self.players_count]
+        # a finished game's wallets are not polled any more
+        balance_refresher.follow(self.game_id, () if self.game_over else wallets)
+        for a in wallets:
+            val, ts = balance_refresher.get(a)
+            balances_fxrp.append(val)
+            balances_at.append(int(ts * 1000) if ts else None)
 
         return {
-            "dice": self.dice,
-            "playerPos": self.player_pos,
+            "dice": list(self.dice),
+            "diceProof": self.dice_proof,
+            "playerPos": list(self.player_pos),
             "activePlayer": self.active_player,
             "ownership": {str(k): v for k, v in self.ownership.items()},
-            "buyPrompt": self.buy_prompt,
+            "buyPrompt": dict(self.buy_prompt) if self.buy_prompt else None,
 
             # Gameplay currency
-            "balances": self.balances,
+            "balances": list(self.balances),
 
             # Real on-chain balance for UI
             "balancesFXRP": balances_fxrp,
-            "playerWallets": self.player_wallets,
+            "balancesFXRPUpdatedAt": balances_at,
+            "playerWallets": list(self.player_wallets),
+            # next action message uses nonces[p] + 1 (lets session clients skip /action_message)
+            "nonces": list(self.nonces),
             "pendingSettlement": self.pending_settlement.to_front() if self.pending_settlement else None,
 
+            "tradeOffers": self.trade_offers.to_front(),
 
-            "tradeOffers": [o.to_front() for o in self.trade_offers],
-            "messages": [{"user": m.user, "text": m.text, "type": m.type, "delta": m.delta} for m in self.messages],
-
-            "eliminated": self.eliminated,
+            "eliminated": self._eliminated(),
             "gameOver": self.game_over,
             "winner": self.winner,
-            "skipTurns": self.skip_turns,
+            "skipTurns": list(self.skip_turns),
+            "payouts": payout_queue.for_game(self.game_id),
         }
 
+    def commit(self) -> int:
+        """Bump the version if anything visible changed since the last commit."""
+        front = self._front_fields()
+        changed = [k for k, v in front.items() if k not in self._last_front or self._last_front[k] != v]
+
+        if changed or self.messages.has_pending():
+            self.version += 1
+            # replaced, not updated: frozen views share these two dicts
+            self._key_versions = {**self._key_versions, **dict.fromkeys(changed, self.version)}
+            self.messages.commit(self.version)
+
+        if changed:
+            # unchanged: keep the dict the current view already shares
+            self._last_front = front
+        return self.version
+
+    def freeze(self) -> "GameView":
+        """Commit, then an immutable view of the result (what readers are served)."""
+        with self._lock:
+            self.commit()
+            return GameView(
+                game_id=self.game_id,
+                version=self.version,
+                reset_version=self._reset_version,
+                front=self._last_front,
+                key_versions=self._key_versions,
+                messages=self.messages.freeze(),
+                created_at=time.time(),
+            )
+
+    def to_front(self):
+        return self.freeze().to_front()
+
+    def to_delta(self, since: Optional[int]):
+        return self.freeze().to_delta(since)
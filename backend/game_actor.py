@@ -0,0 +1,181 @@
+# game_actor.py
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+
+from game import GameState, GameView
+
+ACTOR_WORKERS = int(os.getenv("ACTOR_WORKERS", "32"))
+# commands one actor runs before it lets other games have the thread
+ACTOR_BATCH = int(os.getenv("ACTOR_BATCH", "32"))
+# a read of an older view queues a commit (FXRP balances / payouts change on their own)
+VIEW_MAX_AGE_SEC = float(os.getenv("VIEW_MAX_AGE_SEC", "2"))
+
+actor_pool = ThreadPoolExecutor(max_workers=ACTOR_WORKERS, thread_name_prefix="game-actor")
+
+_current = threading.local()
+
+Command = Tuple[Optional[Future], Callable[..., Any], tuple, Dict[str, Any]]
+
+
+class ActorClosed(RuntimeError):
+    """The game left this actor (parked or moved to another shard); look it up again."""
+
+
+class GameActor:
+    """
+    The only writer of one GameState.
+
+    Every mutation (HTTP actions, the settlement watcher, payout updates) is a
+    command in this actor's mailbox. At most one pool thread drains a mailbox at a
+    time, so commands of one game never interleave, while different games run on
+    different pool threads. After each command the writer publishes a new
+    immutable GameView; readers take `view` (or read()) without any lock.
+    """
+
+    __slots__ = (
+        "game", "pool", "on_view", "view", "commands_total",
+        "_mailbox", "_lock", "_scheduled", "_refresh_queued", "closed",
+    )
+
+    def __init__(self, game: GameState, pool: ThreadPoolExecutor = actor_pool):
+        self.game = game
+        self.pool = pool
+        # called with every new GameView whose version moved (websocket push)
+        self.on_view: Optional[Callable[[GameView], None]] = None
+
+        self.view: GameView = game.freeze()
+        self.commands_total = 0
+        # created on demand: idle games (most of them) hold no deque
+        self._mailbox: Optional[Deque[Command]] = None
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._refresh_queued = False
+        # set by retire(): no command is accepted after the final one
+        self.closed = False
+
+    # ---------------- writing ----------------
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) (normally a bound GameState method); the future has its result."""
+        fut: Future = Future()
+        self._enqueue((fut, fn, args, kwargs))
+        return fut
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """submit() and wait. From inside this actor's own command it just runs fn."""
+        if getattr(_current, "actor", None) is self:
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def ask(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """submit() and await, without holding an event loop thread."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def retire(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Queue fn as the final command: it runs after everything already queued, and
+        any later submit() raises ActorClosed, so nothing lands on a game that was
+        handed off (e.g. fn is game.to_dict for parking or a shard move).
+        """
+        fut: Future = Future()
+        self._enqueue((fut, fn, args, kwargs), final=True)
+        return fut
+
+    def refresh(self):
+        """Queue a plain commit (at most one pending) so background changes reach the view."""
+        with self._lock:
+            if self._refresh_queued or self.closed:
+                return
+            self._refresh_queued = True
+        try:
+            self._enqueue((None, self._refreshed, (), {}))
+        except ActorClosed:
+            pass
+
+    def _refreshed(self):
+        self._refresh_queued = False
+
+    def _enqueue(self, cmd: Command, final: bool = False):
+        with self._lock:
+            if self.closed:
+                raise ActorClosed(self.game.game_id)
+            self.closed = final
+            if self._mailbox is None:
+                self._mailbox = deque()
+            self._mailbox.append(cmd)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.pool.submit(self._drain)
+
+    def _drain(self):
+        _current.actor = self
+        try:
+            for _ in range(ACTOR_BATCH):
+                with self._lock:
+                    if not self._mailbox:
+                        self._mailbox = None
+                        self._scheduled = False
+                        return
+                    fut, fn, args, kwargs = self._mailbox.popleft()
+                self._run(fut, fn, args, kwargs)
+        finally:
+            _current.actor = None
+
+        # more queued: go to the back of the pool queue, behind other games
+        self.pool.submit(self._drain)
+
+    def _run(self, fut: Optional[Future], fn, args, kwargs):
+        if fut is not None and not fut.set_running_or_notify_cancel():
+            return
+        game = self.game
+        with game._lock:
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                result, error = None, e
+            else:
+                error = None
+            try:
+                self._publish(game.freeze())
+            except Exception as e:
+                print(f"❌ Game {game.game_id}: view update failed: {e}")
+        self.commands_total += 1
+
+        # resolve after the view is out, so the caller's response includes its own change
+        if fut is None:
+            return
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def _publish(self, view: GameView):
+        prev, self.view = self.view, view
+        if self.on_view is None or view.version == prev.version:
+            return
+        try:
+            self.on_view(view)
+        except Exception as e:
+            print(f"❌ Game {view.game_id}: view push failed: {e}")
+
+    # ---------------- reading ----------------
+
+    def read(self) -> GameView:
+        view = self.view
+        if time.time() - view.created_at > VIEW_MAX_AGE_SEC:
+            self.refresh()
+        return view
+
+    def status(self) -> Dict:
+        return {
+            "gameId": self.game.game_id,
+            "version": self.view.version,
+            "queued": len(self._mailbox or ()),
+            "commandsTotal": self.commands_total,
+        }
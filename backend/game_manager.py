@@ -0,0 +1,343 @@
+# game_manager.py
+from typing import Callable, Dict, List, Optional
+import os
+import threading
+import time
+import uuid
+
+from chain.balance_refresher import balance_refresher
+from game import GameState, GameView
+from game_actor import ActorClosed, GameActor
+from parked_games import ParkedGames, parked_games
+from payouts import payout_queue
+
+
+def _idle_ttl_sec() -> float:
+    return float(os.getenv("GAME_IDLE_TTL", "3600"))
+
+
+def _max_games() -> int:
+    return int(os.getenv("MAX_GAMES", "10000"))
+
+
+class GameManager:
+    """
+    Registry of live tables keyed by game id.
+
+    Every game is its own GameState, so nothing is shared between tables, and is
+    mutated only through its GameActor (one writer per game, see game_actor.py).
+    The game id is the same one that goes into signed action messages.
+    Games that were not touched for GAME_IDLE_TTL seconds are parked: their
+    state goes to the ParkedGames table and they leave memory until the next
+    lookup adopts them back (never the default one or games waiting for an
+    on-chain settlement). A background thread (start()) does the sweeping.
+    """
+
+    def __init__(
+        self,
+        default_game_id: Optional[str] = None,
+        sweep_interval_sec: float = 30.0,
+        parked: ParkedGames = parked_games,
+    ):
+        self.default_game_id = default_game_id or os.getenv("GAME_ID", "local")
+        self.sweep_interval_sec = sweep_interval_sec
+        self.parked = parked
+
+        self._games: Dict[str, GameState] = {}
+        self._actors: Dict[str, GameActor] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # one unpark at a time, so two lookups never adopt the same row twice
+        self._unpark_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.parked_total = 0
+        self.unparked_total = 0
+
+        # event journal hook (EventLog.append), set by attach_journal()
+        self.journal: Optional[Callable[..., int]] = None
+        # gets every new GameView (websocket push), set by attach_publisher()
+        self.publisher: Optional[Callable[[GameView], None]] = None
+
+        self.create(self.default_game_id)
+
+    # ---------------- registry ----------------
+
+    def create(self, game_id: Optional[str] = None, players_count: int = 3) -> GameState:
+        game_id = game_id or uuid.uuid4().hex[:12]
+        parked = self.parked.has(game_id)
+        with self._lock:
+            if game_id in self._games or parked:
+                raise ValueError("Game already exists")
+            if len(self._games) >= _max_games():
+                raise ValueError("Too many games")
+
+            game = GameState(players_count=players_count, game_id=game_id)
+            game.reset()
+            self._add(game)
+            if self.journal is not None:
+                game.journal = self.journal
+                game.last_seq = self.journal(game_id, "create", [], {"playersCount": players_count}, {}, False)
+            return game
+
+    def get(self, game_id: str) -> GameState:
+        return self._lookup(self._games, game_id)
+
+    def get_or_none(self, game_id: str) -> Optional[GameState]:
+        try:
+            return self.get(game_id)
+        except KeyError:
+            return None
+
+    def actor(self, game_id: str) -> GameActor:
+        return self._lookup(self._actors, game_id)
+
+    def actor_or_none(self, game_id: str) -> Optional[GameActor]:
+        try:
+            return self.actor(game_id)
+        except KeyError:
+            return None
+
+    def _lookup(self, table: Dict, game_id: str):
+        # a parked game comes back on first use
+        for _ in range(2):
+            with self._lock:
+                found = table.get(game_id)
+                if found is not None:
+                    self._last_seen[game_id] = time.time()
+                    return found
+            if not self._unpark(game_id):
+                break
+        raise KeyError(game_id)
+
+    def _add(self, game: GameState):
+        # caller holds self._lock
+        actor = GameActor(game)
+        actor.on_view = self.publisher
+        self._games[game.game_id] = game
+        self._actors[game.game_id] = actor
+        self._last_seen[game.game_id] = time.time()
+
+    def _drop(self, game_id: str) -> bool:
+        # caller holds self._lock
+        payout_queue.forget(game_id)
+        balance_refresher.forget(game_id)
+        self._last_seen.pop(game_id, None)
+        self._actors.pop(game_id, None)
+        return self._games.pop(game_id, None) is not None
+
+    def list(self) -> List[Dict]:
+        now = time.time()
+        with self._lock:
+            live = [
+                {
+                    "gameId": gid,
+                    "playersCount": g.players_count,
+                    "gameOver": g.game_over,
+                    "idleSec": round(now - self._last_seen.get(gid, now), 1),
+                }
+                for gid, g in self._games.items()
+            ]
+        return live + [p for p in self.parked.list() if p["gameId"] not in self._games]
+
+    def all_games(self) -> List[GameState]:
+        """Every live game, without counting as activity (for background workers)."""
+        with self._lock:
+            return list(self._games.values())
+
+    def all_actors(self) -> List[GameActor]:
+        with self._lock:
+            return list(self._actors.values())
+
+    def to_dicts(self) -> List[Dict]:
+        """Every live game's to_dict() (for snapshots), each run as a command of its actor."""
+        futs = []
+        for actor in self.all_actors():
+            try:
+                futs.append(actor.submit(actor.game.to_dict))
+            except ActorClosed:
+                pass  # parked or moved meanwhile: the parked row / new shard has it
+        return [f.result() for f in futs]
+
+    def evict(self, game_id: str) -> bool:
+        if game_id == self.default_game_id:
+            raise ValueError("Cannot evict the default game")
+        with self._lock:
+            gone = self._drop(game_id)
+        gone = self.parked.delete(game_id) or gone
+        if gone:
+            self._journal_drop(game_id)
+        return gone
+
+    def release(self, game_id: str) -> bool:
+        """
+        Let go of a game that moved to another shard. Like evict(), except the
+        default game, which every process keeps: it is replaced by a fresh copy.
+        """
+        if game_id != self.default_game_id:
+            return self.evict(game_id)
+        with self._lock:
+            self._fresh_default()
+        self._journal_drop(game_id)
+        return True
+
+    def _fresh_default(self):
+        # caller holds self._lock
+        self._drop(self.default_game_id)
+        game = GameState(game_id=self.default_game_id)
+        game.reset()
+        game.journal = self.journal
+        self._add(game)
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._games
+
+    # ---------------- event journal ----------------
+
+    def attach_journal(self, journal: Callable[..., int]):
+        """Start journaling; games created or restored from now on are journaled too."""
+        with self._lock:
+            self.journal = journal
+            for g in self._games.values():
+                g.journal = journal
+
+    def attach_publisher(self, publisher: Callable[[GameView], None]):
+        """Hand every new GameView of every game (now and later) to `publisher`."""
+        with self._lock:
+            self.publisher = publisher
+            for a in self._actors.values():
+                a.on_view = publisher
+
+    def refresh_views(self):
+        """Re-freeze every view after games were changed outside their actors (restore at boot)."""
+        for a in self.all_actors():
+            a.view = a.game.freeze()
+
+    def _journal_drop(self, game_id: str, kind: str = "evict"):
+        if self.journal is not None:
+            self.journal(game_id, kind, [], {}, {}, False)
+
+    def restore(self, d: Dict) -> GameState:
+        """Put a game back from GameState.to_dict() (in place for games that exist)."""
+        with self._lock:
+            game = self._games.get(d["gameId"])
+            if game is None:
+                game = GameState.from_dict(d)
+                self._add(game)
+            else:
+                game.load_dict(d)
+                self._last_seen[game.game_id] = time.time()
+            game.journal = self.journal
+            return game
+
+    def adopt(self, d: Dict) -> GameState:
+        """Take over a game another shard exported or that was parked (journaled as an "import" event)."""
+        with self._lock:
+            have = self._games.get(d["gameId"])
+            # an untouched default game is the boot copy; the moved one replaces it
+            if have is not None and not (have.game_id == self.default_game_id and have.last_seq == 0):
+                raise ValueError("Game already exists")
+        game = self.restore(d)
+        if self.journal is not None:
+            # from here on its lastSeq counts in this shard's journal
+            game.last_seq = self.journal(game.game_id, "import", [], {"state": d}, {}, False)
+        self.actor(game.game_id).refresh()
+        return game
+
+    def apply_event(self, ev):
+        """Replay one event_log.GameEvent (create / import / evict / any journaled action)."""
+        if ev.kind == "import":
+            game = self.restore(ev.kwargs["state"])
+            game.last_seq = ev.seq
+            return
+        if ev.kind == "create":
+            with self._lock:
+                game = GameState(players_count=int(ev.kwargs["playersCount"]), game_id=ev.game_id)
+                game.reset()
+                game.journal = self.journal
+                game.last_seq = ev.seq
+                self._add(game)
+            return
+        if ev.kind in ("evict", "park"):
+            with self._lock:
+                if ev.game_id == self.default_game_id:
+                    self._fresh_default()
+                else:
+                    self._drop(ev.game_id)
+            return
+
+        with self._lock:
+            game = self._games.get(ev.game_id)
+        if game is None:
+            raise KeyError(ev.game_id)
+        game.apply_event(ev)
+
+    # ---------------- idle games ----------------
+
+    def evict_idle(self, max_idle_sec: Optional[float] = None) -> List[str]:
+        """Park every game idle for longer than GAME_IDLE_TTL; returns their ids."""
+        ttl = _idle_ttl_sec() if max_idle_sec is None else max_idle_sec
+        cutoff = time.time() - ttl
+
+        with self._lock:
+            stale = [
+                gid for gid, ts in self._last_seen.items()
+                if ts < cutoff
+                and gid != self.default_game_id
+                and self._games[gid].pending_settlement is None
+            ]
+        return [gid for gid in stale if self._park(gid)]
+
+    def _park(self, game_id: str) -> bool:
+        with self._lock:
+            actor = self._actors.get(game_id)
+        if actor is None:
+            return False
+        try:
+            # the final command: whatever was queued before it is in the dict
+            d = actor.retire(actor.game.to_dict).result()
+        except ActorClosed:
+            return False
+        # stored before the game leaves memory, so a lookup in between finds one of them
+        self.parked.put(d)
+        with self._lock:
+            if self._actors.get(game_id) is actor:
+                self._drop(game_id)
+        self._journal_drop(game_id, "park")
+        self.parked_total += 1
+        return True
+
+    def _unpark(self, game_id: str) -> bool:
+        with self._unpark_lock:
+            with self._lock:
+                if game_id in self._games:
+                    return True
+            d = self.parked.get(game_id)
+            if d is None:
+                return False
+            self.adopt(d)
+            self.parked.delete(game_id)
+        self.unparked_total += 1
+        return True
+
+    def parked_ids(self) -> List[str]:
+        return self.parked.ids()
+
+    def start(self):
+        """Sweep idle games every sweep_interval_sec on a background thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="game-sweeper", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.sweep_interval_sec)
+            try:
+                parked = self.evict_idle()
+                if parked:
+                    print(f"💤 Parked {len(parked)} idle games")
+            except Exception as e:
+                print(f"❌ Game sweep error: {e}")
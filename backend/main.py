@@ -4,20 +4,84 @@ from pathlib import Path
 
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
 
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Literal, Optional
-
-from state import GAME, snapshot
-from auth_sig import SigProof, build_action_message
+from web3 import Web3
+
+from game_actor import ActorClosed, GameActor
+from event_log import event_log, event_log_enabled
+from state import GAMES, snapshot
+from push import HUB, encode
+from dice_pool import DicePoolEmpty, dice_pool
+from drbg import verify_roll
+from markov import board_odds
+from message_log import message_store
+from payouts import payout_queue
+from settlement_watcher import SettlementWatcher
+from shard_api import shard_api
+from auth_sig import SigProof, build_action_message, sig_cache_stats
 
 # IMPORTANT: same chain client used by GameState signature checks
 from chain.chain_fxrp import fxrp_client
+from chain.chain_fxrp_async import fxrp_async
+from chain.transfer_index import transfer_index
+
+
+
+def _publish_game(game_id: str):
+    # background workers (payouts, ...) changed something visible in this game
+    actor = GAMES.actor_or_none(game_id)
+    if actor is not None:
+        actor.refresh()
+
+
+settlement_watcher = SettlementWatcher(GAMES)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if event_log_enabled():
+        # bring back every game from the last snapshot + the events after it
+        restored = event_log.restore(GAMES)
+        GAMES.refresh_views()
+        print(f"♻️ Restored games from event log: {restored}")
+        GAMES.attach_journal(event_log.append)
+        event_log.start(GAMES)
+    # every game actor pushes its new views to the websocket hub
+    GAMES.attach_publisher(HUB.publish)
+    GAMES.start()
+    payout_queue.on_change = _publish_game
+    fxrp_client.head.start()
+    payout_queue.start()
+    transfer_index.start()
+    settlement_watcher.start()
+    yield
+    # release the pooled RPC connections
+    await fxrp_async.close()
+    if event_log_enabled():
+        event_log.snapshot(GAMES)
+    message_store.flush()
 
 
+app = FastAPI(title="FlarePoly Backend", version="0.3", lifespan=lifespan)
 
-app = FastAPI(title="FlarePoly Backend", version="0.3")
+
+@app.exception_handler(ActorClosed)
+async def actor_closed(request: Request, exc: ActorClosed):
+    # the game was parked / handed to another shard while this request waited: retry
+    return JSONResponse(status_code=503, content={"detail": "Game is moving, retry"}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(DicePoolEmpty)
+async def dice_pool_empty(request: Request, exc: DicePoolEmpty):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "2"})
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +98,7 @@ class ProofBody(BaseModel):
     address: str
     message: str
     signature: str
+    session: Optional[str] = None  # session id when signature is a session HMAC
 
 
 class ConnectWalletBody(BaseModel):
@@ -42,6 +107,11 @@ class ConnectWalletBody(BaseModel):
     expectedMessage: str
 
 
+class StartSessionBody(BaseModel):
+    playerIndex: int = Field(..., ge=0, le=3)
+    proof: ProofBody
+
+
 class SignedActionBody(BaseModel):
     proof: ProofBody
 
@@ -69,6 +139,11 @@ class SignedChatBody(BaseModel):
     text: str
 
 
+class CreateGameBody(BaseModel):
+    gameId: Optional[str] = Field(None, min_length=1, max_length=64, pattern=r"^[A-Za-z0-9_-]+$")
+    playersCount: int = Field(3, ge=2, le=4)
+
+
 # ---------- HELPERS ----------
 
 def _sigproof_from_body(pb: ProofBody) -> SigProof:
@@ -80,6 +155,29 @@ def _current_chain_id() -> int:
     return fxrp_client.get_chain_id()
 
 
+def _actor(game_id: str = GAMES.default_game_id) -> GameActor:
+    # Path param under /games/{game_id}/..., falls back to the default game on legacy routes.
+    # Actions go through actor.ask(), reads use actor.read() (see game_actor.py).
+    try:
+        return GAMES.actor(game_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Game not found")
+
+
+def _check_player_index(actor: GameActor, index: int):
+    # seat arrays hold exactly players_count entries
+    if not 0 <= index < actor.game.players_count:
+        raise HTTPException(status_code=400, detail="Invalid player index")
+
+
+def _after_action(actor: GameActor, since: Optional[int] = None):
+    # the actor already pushed the new view to websocket subscribers
+    return snapshot(actor.view, since)
+
+
+# Same handlers are mounted twice: at the root (default game) and under /games/{game_id}
+game_router = APIRouter()
+
 
 # ---------- ENDPOINTS ----------
 
@@ -88,36 +186,162 @@ def health_check():
     return {"status": "online"}
 
 
-@app.get("/state")
-def get_state():
-    return snapshot()
-
-
 @app.get("/chain")
-def chain_info():
+async def chain_info():
     # Handy for debugging MetaMask network mismatch
     cid = _current_chain_id()
+    head = fxrp_client.head.status()
+    return {
+        "chainId": cid,
+        "latestBlock": head["blockNumber"],
+        "head": head,
+        "rpcPool": fxrp_async.pool_stats(),
+    }
+
+
+@app.get("/dice/metrics")
+def dice_metrics():
+    return dice_pool.metrics()
+
+
+@app.get("/sig/metrics")
+def sig_metrics():
+    return sig_cache_stats()
+
+
+@app.get("/dice/verify")
+def dice_verify(srnValue: str, srnTimestamp: int, gameId: str, turn: int, die1: int, die2: int):
+    """Recompute a DRBG roll from the inputs logged in its diceProof."""
     try:
-        net = fxrp_client.w3.eth.get_block("latest").get("number")
-    except Exception:
-        net = None
-    return {"chainId": cid, "latestBlock": net}
+        srn = int(srnValue, 0)
+        return {"valid": verify_roll(srn, srnTimestamp, gameId, turn, die1, die2)}
+    except (ValueError, OverflowError):
+        # not a number, or outside the 256-bit value / 64-bit timestamp a roll is built from
+        raise HTTPException(status_code=400, detail="Invalid srnValue / srnTimestamp")
+
+
+@app.get("/board/odds")
+def board_odds_table():
+    """Exact per-roll landing odds and expected rent per tile/family (markov.py)."""
+    return board_odds().to_front()
 
 
-@app.get("/action_message")
-def action_message(playerIndex: int, action: str, params: str = ""):
+@app.get("/games")
+def list_games():
+    return {"games": GAMES.list(), "defaultGameId": GAMES.default_game_id}
+
+
+@app.post("/games")
+def create_game(body: CreateGameBody):
+    try:
+        game = GAMES.create(body.gameId, players_count=body.playersCount)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"gameId": game.game_id, "state": snapshot(GAMES.actor(game.game_id).view)}
+
+
+@app.delete("/games/{game_id}")
+def evict_game(game_id: str):
+    try:
+        evicted = GAMES.evict(game_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"gameId": game_id, "evicted": evicted}
+
+
+@game_router.get("/state")
+def get_state(since: Optional[int] = None, actor: GameActor = Depends(_actor)):
+    """
+    Full state by default. With ?since=<version> only the changed keys and new messages
+    (all POST actions accept the same ?since=).
+    """
+    return snapshot(actor.read(), since)
+
+
+@game_router.get("/actor")
+def actor_status(actor: GameActor = Depends(_actor)):
+    return actor.status()
+
+
+@game_router.websocket("/ws")
+async def game_ws(ws: WebSocket, game_id: str = GAMES.default_game_id):
+    """
+    Push channel for players and spectators: first a full snapshot, then one
+    delta per state change (same shape as /state?since=).
+    """
+    actor = GAMES.actor_or_none(game_id)
+    if actor is None:
+        await ws.close(code=4404)
+        return
+
+    await ws.accept()
+    q = HUB.subscribe(game_id)
+    reader = None
+    try:
+        first = actor.read().to_front()
+        await ws.send_text(encode({**first, "full": True}))
+        HUB.mark_sent(game_id, q, first["version"])
+
+        # reader only exists to notice the client going away
+        reader = asyncio.create_task(_drain_ws(ws))
+        while True:
+            getter = asyncio.create_task(q.get())
+            done, _ = await asyncio.wait({getter, reader}, return_when=asyncio.FIRST_COMPLETED)
+            if reader in done:
+                getter.cancel()
+                return
+            data = getter.result()
+            if data is None:
+                await ws.close(code=1013)
+                return
+            await ws.send_text(data)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if reader is not None:
+            reader.cancel()
+        HUB.unsubscribe(game_id, q)
+
+
+async def _drain_ws(ws: WebSocket):
+    try:
+        while True:
+            await ws.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+@game_router.get("/messages")
+def messages(
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    actor: GameActor = Depends(_actor),
+):
+    """Page through the chat/system log by message id (snapshots only carry the newest ones)."""
+    items = actor.read().messages.page(before=before, after=after, limit=limit)
+    return {
+        "messages": items,
+        "oldestId": items[0]["id"] if items else None,
+        "newestId": items[-1]["id"] if items else None,
+    }
+
+
+@game_router.get("/action_message")
+def action_message(playerIndex: int = Query(..., ge=0), action: str = Query(...), params: str = "", actor: GameActor = Depends(_actor)):
     """
     Frontend calls this to get the EXACT message to sign for the next action.
-    Nonce is taken from GAME.nonces[playerIndex] + 1.
+    Nonce is taken from the game's nonces[playerIndex] + 1.
 
     IMPORTANT:
     chain_id must match the chain_id used inside GameState signature validation,
     otherwise you'll get "Bad signed message (nonce/params mismatch)".
     """
-    nonce = GAME.nonces[playerIndex] + 1
+    _check_player_index(actor, playerIndex)
+    nonce = actor.read().front["nonces"][playerIndex] + 1
 
     msg = build_action_message(
-        game_id="local",
+        game_id=actor.game.game_id,
         chain_id=_current_chain_id(),
         player_index=playerIndex,
         action=action,
@@ -127,87 +351,143 @@ def action_message(playerIndex: int, action: str, params: str = ""):
     return {"message": msg, "nonce": nonce}
 
 
-@app.post("/connect")
-def connect_wallet(body: ConnectWalletBody):
-    GAME.connect_wallet(
+@game_router.post("/connect")
+async def connect_wallet(body: ConnectWalletBody, since: Optional[int] = None, actor: GameActor = Depends(_actor)):
+    await actor.ask(
+        actor.game.connect_wallet,
         player_index=body.playerIndex,
         proof=_sigproof_from_body(body.proof),
         expected_message=body.expectedMessage,
     )
-    return snapshot()
+    return _after_action(actor, since)
 
 
-@app.post("/reset")
-def reset():
-    GAME.reset()
-    return snapshot()
+@game_router.post("/session")
+async def start_session(body: StartSessionBody, since: Optional[int] = None, actor: GameActor = Depends(_actor)):
+    """
+    Sign /action_message?action=START_SESSION&params=ttl=<SESSION_TTL_SEC> once;
+    the returned secret HMACs later action messages (proof.session = sessionId).
+    """
+    session = await actor.ask(actor.game.start_session, body.playerIndex, _sigproof_from_body(body.proof))
+    return {**_after_action(actor, since), "session": session.to_front()}
+
 
+@game_router.post("/reset")
+async def reset(since: Optional[int] = None, actor: GameActor = Depends(_actor)):
+    await actor.ask(actor.game.reset)
+    return _after_action(actor, since)
 
-@app.post("/chat")
-def chat(body: SignedChatBody):
-    GAME.chat(body.text, _sigproof_from_body(body.proof))
-    return snapshot()
 
+@game_router.post("/chat")
+async def chat(body: SignedChatBody, since: Optional[int] = None, actor: GameActor = Depends(_actor)):
+    await actor.ask(actor.game.chat, body.text, _sigproof_from_body(body.proof))
+    return _after_action(actor, since)
 
-@app.post("/roll")
-def roll(body: SignedActionBody):
-    GAME.roll(_sigproof_from_body(body.proof))
-    return snapshot()
 
+@game_router.post("/roll")
+async def roll(body: SignedActionBody, since: Optional[int] = None, actor: GameActor = Depends(_actor)):
+    await actor.ask(actor.game.roll, _sigproof_from_body(body.proof))
+    return _after_action(actor, since)
 
-@app.post("/buy")
-def buy(body: SignedBuyBody):
+
+@game_router.post("/buy")
+async def buy(body: SignedBuyBody, since: Optional[int] = None, actor: GameActor = Depends(_actor)):
     """
     Stage 1: creates pendingSettlement for a property purchase.
     Frontend then asks user to send FXRP on-chain.
     """
-    GAME.buy(proof=_sigproof_from_body(body.proof), tile_id=body.tileId)
-    return snapshot()
+    await actor.ask(actor.game.buy, proof=_sigproof_from_body(body.proof), tile_id=body.tileId)
+    return _after_action(actor, since)
 
 
-@app.post("/skip_buy")
-def skip_buy(body: SignedActionBody):
-    GAME.skip_buy(_sigproof_from_body(body.proof))
-    return snapshot()
+@game_router.post("/skip_buy")
+async def skip_buy(body: SignedActionBody, since: Optional[int] = None, actor: GameActor = Depends(_actor)):
+    await actor.ask(actor.game.skip_buy, _sigproof_from_body(body.proof))
+    return _after_action(actor, since)
 
 
-@app.post("/offers")
-def create_offer(body: SignedOfferCreateBody):
-    GAME.create_offer(
+@game_router.post("/offers")
+async def create_offer(body: SignedOfferCreateBody, since: Optional[int] = None, actor: GameActor = Depends(_actor)):
+    _check_player_index(actor, body.to)
+    await actor.ask(
+        actor.game.create_offer,
         _sigproof_from_body(body.proof),
         offer_type=body.type,
         to_player=body.to,
         tile_id=body.tileId,
         price_fc=body.priceFC,
     )
-    return snapshot()
+    return _after_action(actor, since)
+
+
+@game_router.post("/offers/{offer_id}/accept")
+async def accept_offer(offer_id: str, body: SignedActionBody, since: Optional[int] = None, actor: GameActor = Depends(_actor)):
+    await actor.ask(actor.game.accept_offer, _sigproof_from_body(body.proof), offer_id)
+    return _after_action(actor, since)
+
+
+@game_router.post("/offers/{offer_id}/decline")
+async def decline_offer(offer_id: str, body: SignedActionBody, since: Optional[int] = None, actor: GameActor = Depends(_actor)):
+    await actor.ask(actor.game.decline_offer, _sigproof_from_body(body.proof), offer_id)
+    return _after_action(actor, since)
+
 
+@app.get("/settlements/watcher")
+def settlement_watcher_status():
+    return {**settlement_watcher.status(), "index": transfer_index.status()}
 
-@app.post("/offers/{offer_id}/accept")
-def accept_offer(offer_id: str, body: SignedActionBody):
-    GAME.accept_offer(_sigproof_from_body(body.proof), offer_id)
-    return snapshot()
 
+@app.get("/events/status")
+def events_status():
+    return {"enabled": event_log_enabled(), **event_log.status()}
 
-@app.post("/offers/{offer_id}/decline")
-def decline_offer(offer_id: str, body: SignedActionBody):
-    GAME.decline_offer(_sigproof_from_body(body.proof), offer_id)
-    return snapshot()
 
+@app.get("/transfers")
+def transfer_history(address: str, limit: int = 50, beforeBlock: Optional[int] = None):
+    """FXRP transfer history of an address, served from the local index."""
+    if not Web3.is_address(address):
+        raise HTTPException(status_code=400, detail="Invalid address")
+    rows = transfer_index.history(address, limit=min(limit, 500), before_block=beforeBlock)
+    return {"address": address, "transfers": [t.to_front() for t in rows], "index": transfer_index.status()}
 
-@app.post("/settle")
-def settle(body: SignedSettleBody):
+
+@game_router.post("/settle")
+async def settle(body: SignedSettleBody, since: Optional[int] = None, actor: GameActor = Depends(_actor)):
     """
     Stage 2: verify the on-chain FXRP transfer and finalize the buy/trade.
+    Optional: the settlement watcher finalizes it on its own once the transfer is mined.
     """
-    GAME.settle(_sigproof_from_body(body.proof), tx_hash=body.txHash)
-    return snapshot()
+    await actor.ask(actor.game.settle, _sigproof_from_body(body.proof), tx_hash=body.txHash)
+    return _after_action(actor, since)
 
 
 @app.get("/player/{address}/balance")
-def get_balance(address: str):
+async def get_balance(address: str):
     """
     Wallet balance (FXRP / native) for UI.
     """
-    bal = fxrp_client.get_balance(address)
+    bal = await fxrp_async.get_balance(address)
     return {"address": address, "balance": bal}
+
+
+@app.get("/balances")
+async def get_balances(addresses: str):
+    """
+    Several wallet balances in one call (one batched RPC round trip):
+    /balances?addresses=0xabc...,0xdef...
+    """
+    addrs = [a.strip() for a in addresses.split(",") if a.strip()]
+    if not addrs:
+        raise HTTPException(status_code=400, detail="No addresses")
+    if len(addrs) > int(os.getenv("BALANCES_MAX_ADDRESSES", "200")):
+        raise HTTPException(status_code=400, detail="Too many addresses")
+    for a in addrs:
+        if not Web3.is_address(a):
+            raise HTTPException(status_code=400, detail=f"Invalid address: {a}")
+
+    return {"balances": await fxrp_async.get_balances(addrs)}
+
+
+app.include_router(game_router)
+app.include_router(game_router, prefix="/games/{game_id}")
+app.include_router(shard_api)
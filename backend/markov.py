@@ -0,0 +1,160 @@
+# markov.py
+# Exact landing odds for the board. Movement is a Markov chain: 2d6 per roll,
+# SYSTEM BUG and the prison tile both leave the player in prison for
+# PRISON_WAIT_TURNS skipped turns. Solving that chain's stationary distribution
+# gives how often each tile is landed on, without simulating (see simulate.py
+# for everything that depends on money and bots).
+from dataclasses import asdict, dataclass
+from fractions import Fraction
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import json
+
+from board import TILES, Tile
+from rules import GOTO_PRISON_TILE_ID, PRISON_TILE_ID, PRISON_WAIT_TURNS
+
+# sum of two dice -> probability
+DICE: Dict[int, Fraction] = {s: Fraction(6 - abs(s - 7), 36) for s in range(2, 13)}
+
+# (tile, skipped turns still to serve)
+State = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class BoardOdds:
+    """
+    Lookup tables for one board definition, per roll of a player (a prison skip
+    is a turn but not a roll). landing[t] counts SYSTEM BUG itself, not the
+    prison tile the player is moved to. Rent figures are what one opponent roll
+    is expected to pay the owner of a tile / a whole family.
+    """
+    board_hash: str
+    landing_exact: Tuple[Fraction, ...]
+    landing: Tuple[float, ...]
+    rolls_per_turn: float
+    rent_per_roll: Dict[int, float]
+    rent_per_family: Dict[str, float]
+    # rent_per_roll / price, for tiles with a price
+    yield_per_roll: Dict[int, float]
+
+    def to_front(self) -> Dict:
+        return {
+            "boardHash": self.board_hash,
+            "rollsPerTurn": self.rolls_per_turn,
+            "tiles": [
+                {
+                    "tileId": t,
+                    "landing": p,
+                    "rentPerRoll": self.rent_per_roll.get(t),
+                    "yieldPerRoll": self.yield_per_roll.get(t),
+                }
+                for t, p in enumerate(self.landing)
+            ],
+            "rentPerFamily": self.rent_per_family,
+        }
+
+
+def board_hash(tiles: Sequence[Tile] = TILES) -> str:
+    rules = [GOTO_PRISON_TILE_ID, PRISON_TILE_ID, PRISON_WAIT_TURNS]
+    blob = json.dumps([[asdict(t) for t in tiles], rules], sort_keys=True)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+
+def _after_roll(tile: int, steps: int, n: int) -> Tuple[int, State]:
+    """(tile landed on, state the turn ends in)"""
+    landed = (tile + steps) % n
+    if landed in (GOTO_PRISON_TILE_ID, PRISON_TILE_ID):
+        return landed, (PRISON_TILE_ID, PRISON_WAIT_TURNS)
+    return landed, (landed, 0)
+
+
+def _transitions(n: int) -> Dict[State, Dict[State, Fraction]]:
+    states: List[State] = [(t, 0) for t in range(n)] + [(PRISON_TILE_ID, s) for s in range(1, PRISON_WAIT_TURNS + 1)]
+    out: Dict[State, Dict[State, Fraction]] = {}
+    for tile, skip in states:
+        row: Dict[State, Fraction] = {}
+        if skip:
+            row[(tile, skip - 1)] = Fraction(1)
+        else:
+            for steps, p in DICE.items():
+                _, nxt = _after_roll(tile, steps, n)
+                row[nxt] = row.get(nxt, Fraction(0)) + p
+        out[(tile, skip)] = row
+    return out
+
+
+def _stationary(trans: Dict[State, Dict[State, Fraction]]) -> Dict[State, Fraction]:
+    """Solve pi = pi P, sum(pi) = 1 exactly (Gauss-Jordan over Fractions)."""
+    states = list(trans)
+    idx = {s: i for i, s in enumerate(states)}
+    k = len(states)
+
+    # (P^T - I) pi = 0, with the last equation replaced by sum(pi) = 1
+    a = [[Fraction(0)] * (k + 1) for _ in range(k)]
+    for s, row in trans.items():
+        for nxt, p in row.items():
+            a[idx[nxt]][idx[s]] += p
+    for i in range(k):
+        a[i][i] -= 1
+    a[k - 1] = [Fraction(1)] * k + [Fraction(1)]
+
+    for col in range(k):
+        piv = next(r for r in range(col, k) if a[r][col] != 0)
+        a[col], a[piv] = a[piv], a[col]
+        lead = a[col][col]
+        a[col] = [v / lead for v in a[col]]
+        for r in range(k):
+            if r != col and a[r][col] != 0:
+                f = a[r][col]
+                a[r] = [v - f * w for v, w in zip(a[r], a[col])]
+    return {s: a[idx[s]][k] for s in states}
+
+
+def _compute(tiles: Sequence[Tile], key: str) -> BoardOdds:
+    n = len(tiles)
+    pi = _stationary(_transitions(n))
+
+    rolling = sum(p for (_, skip), p in pi.items() if skip == 0)
+    landing = [Fraction(0)] * n
+    for (tile, skip), p in pi.items():
+        if skip:
+            continue
+        for steps, q in DICE.items():
+            landed, _ = _after_roll(tile, steps, n)
+            landing[landed] += p * q / rolling
+
+    rent_per_roll: Dict[int, float] = {}
+    rent_per_family: Dict[str, float] = {}
+    yield_per_roll: Dict[int, float] = {}
+    for t in tiles:
+        if t.rent is None:
+            continue
+        r = float(landing[t.id] * t.rent)
+        rent_per_roll[t.id] = r
+        if t.family:
+            rent_per_family[t.family] = rent_per_family.get(t.family, 0.0) + r
+        if t.price:
+            yield_per_roll[t.id] = r / t.price
+
+    return BoardOdds(
+        board_hash=key,
+        landing_exact=tuple(landing),
+        landing=tuple(float(p) for p in landing),
+        rolls_per_turn=float(rolling),
+        rent_per_roll=rent_per_roll,
+        rent_per_family=rent_per_family,
+        yield_per_roll=yield_per_roll,
+    )
+
+
+_cache: Dict[str, BoardOdds] = {}
+
+
+def board_odds(tiles: Optional[Sequence[Tile]] = None) -> BoardOdds:
+    """Tables for `tiles` (default board.TILES), computed once per board definition."""
+    tiles = TILES if tiles is None else tiles
+    key = board_hash(tiles)
+    odds = _cache.get(key)
+    if odds is None:
+        odds = _cache[key] = _compute(tiles, key)
+    return odds
@@ -0,0 +1,243 @@
+# message_log.py
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import os
+import sqlite3
+import threading
+
+MESSAGE_LOG_SIZE = int(os.getenv("MESSAGE_LOG_SIZE", "200"))
+SNAPSHOT_MESSAGES = int(os.getenv("SNAPSHOT_MESSAGES", "50"))
+MESSAGE_FLUSH_MS = float(os.getenv("MESSAGE_FLUSH_MS", "200"))
+
+
+def _default_db_path() -> str:
+    base = os.path.dirname(os.path.abspath(__file__))
+    return os.getenv("MESSAGE_DB", os.path.join(base, "data", "messages.sqlite3"))
+
+
+class MessageStore:
+    """
+    SQLite home of messages that fell out of a game's in-memory ring.
+
+    spill() and drop() are called under a game lock, so they only queue the
+    write; a writer thread applies the queue every MESSAGE_FLUSH_MS in one
+    transaction. Reads flush first, so they always see every queued write.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or _default_db_path()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # (game_id, rows to insert, or None = delete the game's rows), in call order
+        self._queue: List[Tuple[str, Optional[List[Tuple[int, int, Dict]]]]] = []
+        self._queue_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " game_id TEXT, id INTEGER, version INTEGER, data TEXT, PRIMARY KEY (game_id, id))"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def spill(self, game_id: str, rows: List[Tuple[int, int, Dict]]):
+        self._enqueue(game_id, list(rows))
+
+    def drop(self, game_id: str):
+        self._enqueue(game_id, None)
+
+    def _enqueue(self, game_id: str, rows: Optional[List[Tuple[int, int, Dict]]]):
+        with self._queue_lock:
+            self._queue.append((game_id, rows))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="message-store", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Write every queued spill / drop (one commit)."""
+        with self._lock:
+            with self._queue_lock:
+                queue, self._queue = self._queue, []
+            if not queue:
+                return
+            db = self._conn()
+            for game_id, rows in queue:
+                if rows is None:
+                    db.execute("DELETE FROM messages WHERE game_id = ?", (game_id,))
+                else:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?)",
+                        [(game_id, mid, ver, json.dumps(m)) for mid, ver, m in rows],
+                    )
+            db.commit()
+
+    def _run(self):
+        while True:
+            self._wake.wait(MESSAGE_FLUSH_MS / 1000)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Message store error: {e}")
+
+    def page(self, game_id: str, before: Optional[int], after: Optional[int], limit: int, forward: bool) -> List[Dict]:
+        sql = "SELECT data FROM messages WHERE game_id = ?"
+        args: list = [game_id]
+        if before is not None:
+            sql += " AND id < ?"
+            args.append(before)
+        if after is not None:
+            sql += " AND id > ?"
+            args.append(after)
+        # newest first when paging backwards, oldest first when paging forwards
+        sql += " ORDER BY id " + ("ASC" if forward else "DESC") + " LIMIT ?"
+        args.append(limit)
+        self.flush()
+        with self._lock:
+            rows = self._conn().execute(sql, args).fetchall()
+        out = [json.loads(r[0]) for r in rows]
+        return sorted(out, key=lambda m: m["id"])
+
+    def dump(self, game_id: str) -> List[Tuple[int, int, Dict]]:
+        """Every spilled row of a game as spill() takes them (moving a game to another shard)."""
+        self.flush()
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT id, version, data FROM messages WHERE game_id = ? ORDER BY id", (game_id,)
+            ).fetchall()
+        return [(mid, ver, json.loads(data)) for mid, ver, data in rows]
+
+
+message_store = MessageStore()
+
+
+class MessageLog:
+    """
+    A game's chat/system log: the last MESSAGE_LOG_SIZE messages in memory, older
+    ones spilled to the MessageStore. Every message gets a stable increasing id and
+    the state version it was committed in, which is what delta sync and
+    /messages?before=&after= page by.
+    """
+
+    __slots__ = ("game_id", "capacity", "store", "next_id", "_pending", "_ring", "_spilled", "_spilled_version")
+
+    def __init__(self, game_id: str, capacity: int = MESSAGE_LOG_SIZE, store: MessageStore = message_store):
+        self.game_id = game_id
+        self.capacity = capacity
+        self.store = store
+        self.next_id = 1
+        self._pending: List[Dict] = []
+        # (id, version, front dict), oldest first; a tuple in frozen copies
+        self._ring: Sequence[Tuple[int, int, Dict]] = []
+        self._spilled = False
+        # commit version of the newest spilled message: deltas from before it are incomplete
+        self._spilled_version = 0
+
+    def __len__(self) -> int:
+        return len(self._ring) + len(self._pending)
+
+    def append(self, front: Dict) -> int:
+        mid = self.next_id
+        self.next_id += 1
+        self._pending.append({"id": mid, **front})
+        return mid
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def commit(self, version: int):
+        """Stamp pending messages with `version`; spill whatever overflows the ring."""
+        for m in self._pending:
+            self._ring.append((m["id"], version, m))
+        self._pending = []
+
+        cut = len(self._ring) - self.capacity
+        if cut > 0:
+            overflow = self._ring[:cut]
+            del self._ring[:cut]
+            if not self._spilled:
+                # rows left over from an earlier game with the same id
+                self.store.drop(self.game_id)
+                self._spilled = True
+            self.store.spill(self.game_id, overflow)
+            self._spilled_version = overflow[-1][1]
+
+    def clear(self):
+        # ids keep counting so cursors from before a reset never match new messages
+        self._pending = []
+        self._ring.clear()
+        if self._spilled:
+            self.store.drop(self.game_id)
+            self._spilled = False
+        self._spilled_version = 0
+
+    def to_dict(self) -> Dict:
+        # pending messages belong to the next commit; callers commit first
+        return {
+            "nextId": self.next_id,
+            "spilled": self._spilled,
+            "items": [[mid, ver, m] for mid, ver, m in self._ring],
+        }
+
+    def load_dict(self, d: Dict):
+        self.next_id = int(d["nextId"])
+        self._spilled = bool(d["spilled"])
+        self._pending = []
+        self._ring = [(int(mid), int(ver), m) for mid, ver, m in d["items"]]
+        # a load bumps the reset version, so no delta reaches back past it anyway
+        self._spilled_version = 0
+
+    def freeze(self) -> "MessageLog":
+        """Read-only copy of the committed messages (for GameView); never append to it."""
+        out = MessageLog(self.game_id, self.capacity, self.store)
+        out.next_id = self.next_id
+        out._ring = tuple(self._ring)
+        out._spilled = self._spilled
+        out._spilled_version = self._spilled_version
+        return out
+
+    # ---------------- reads ----------------
+
+    def tail(self, n: int = SNAPSHOT_MESSAGES) -> List[Dict]:
+        return [m for _, _, m in self._ring[-n:]] if n > 0 else []
+
+    def since_version(self, version: int) -> Optional[List[Dict]]:
+        """Messages committed after `version`; None when some of them were already spilled."""
+        if version < self._spilled_version:
+            return None
+        out = []
+        for mid, ver, m in reversed(self._ring):
+            if ver <= version:
+                break
+            out.append(m)
+        out.reverse()
+        return out
+
+    def page(self, before: Optional[int] = None, after: Optional[int] = None, limit: int = 50) -> List[Dict]:
+        """Up to `limit` committed messages with after < id < before, oldest first."""
+        forward = after is not None and before is None
+        in_ring = [
+            m for mid, _, m in self._ring
+            if (before is None or mid < before) and (after is None or mid > after)
+        ]
+        first_ring_id = self._ring[0][0] if self._ring else self.next_id
+        upper = min(before, first_ring_id) if before is not None else first_ring_id
+
+        if forward:
+            older = []
+            if self._spilled and after < first_ring_id - 1:
+                older = self.store.page(self.game_id, upper, after, limit, forward=True)
+            return (older + in_ring)[:limit]
+
+        picked = in_ring[-limit:]
+        need = limit - len(picked)
+        if need > 0 and self._spilled and (after is None or after < first_ring_id - 1):
+            picked = self.store.page(self.game_id, upper, after, need, forward=False) + picked
+        return picked
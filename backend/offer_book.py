@@ -0,0 +1,128 @@
+# offer_book.py
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Literal, Optional, Set
+import heapq
+import os
+import time
+
+OfferType = Literal["sell", "buy"]
+
+# 0 = offers never expire
+OFFER_TTL_SEC = float(os.getenv("OFFER_TTL_SEC", "300"))
+
+
+@dataclass
+class TradeOffer:
+    id: str
+    type: OfferType
+    from_player: int
+    to_player: int
+    tile_id: int
+    price_fc: int
+    created_at: int
+    expires_at: Optional[int] = None  # ms, like created_at
+
+    def expired(self, now_ms: Optional[int] = None) -> bool:
+        if self.expires_at is None:
+            return False
+        return (now_ms or int(time.time() * 1000)) >= self.expires_at
+
+    def to_front(self):
+        return {
+            "id": self.id,
+            "type": self.type,
+            "from": self.from_player,
+            "to": self.to_player,
+            "tileId": self.tile_id,
+            "priceFC": self.price_fc,
+            "createdAt": self.created_at,
+            "expiresAt": self.expires_at,
+        }
+
+
+class OfferBook:
+    """
+    Open trade offers indexed by id, recipient and tile, plus a heap ordered by
+    expires_at so expiry only looks at offers that are actually due. Iterates
+    newest first (the order the frontend shows them in).
+    """
+
+    __slots__ = ("_by_id", "_by_recipient", "_by_tile", "_expiry")
+
+    def __init__(self):
+        self._by_id: Dict[str, TradeOffer] = {}
+        self._by_recipient: Dict[int, Set[str]] = {}
+        self._by_tile: Dict[int, Set[str]] = {}
+        self._expiry: List = []  # (expires_at, id); stale entries are skipped lazily
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[TradeOffer]:
+        return reversed(list(self._by_id.values()))
+
+    def add(self, offer: TradeOffer):
+        self._by_id[offer.id] = offer
+        self._by_recipient.setdefault(offer.to_player, set()).add(offer.id)
+        self._by_tile.setdefault(offer.tile_id, set()).add(offer.id)
+        if offer.expires_at is not None:
+            heapq.heappush(self._expiry, (offer.expires_at, offer.id))
+
+    def get(self, offer_id: str) -> Optional[TradeOffer]:
+        return self._by_id.get(offer_id)
+
+    def remove(self, offer_id: str) -> Optional[TradeOffer]:
+        offer = self._by_id.pop(offer_id, None)
+        if offer is None:
+            return None
+        self._by_recipient[offer.to_player].discard(offer_id)
+        self._by_tile[offer.tile_id].discard(offer_id)
+        return offer
+
+    def clear(self):
+        self._by_id.clear()
+        self._by_recipient.clear()
+        self._by_tile.clear()
+        self._expiry = []
+
+    def has_incoming(self, player: int) -> bool:
+        return bool(self._by_recipient.get(player))
+
+    def for_recipient(self, player: int) -> List[TradeOffer]:
+        ids = self._by_recipient.get(player, ())
+        return sorted((self._by_id[i] for i in ids), key=lambda o: o.created_at, reverse=True)
+
+    def invalidate_tile(self, tile_id: int, keep: Optional[str] = None) -> List[TradeOffer]:
+        """Drop every offer on `tile_id` (its owner changed), except `keep`."""
+        ids = [i for i in self._by_tile.get(tile_id, ()) if i != keep]
+        return [self.remove(i) for i in ids]
+
+    def expire(self, now_ms: Optional[int] = None, keep: Optional[str] = None) -> List[TradeOffer]:
+        """Remove offers whose expires_at has passed; `keep` (e.g. one under settlement) survives."""
+        now_ms = now_ms or int(time.time() * 1000)
+        out = []
+        kept = []
+        while self._expiry and self._expiry[0][0] <= now_ms:
+            entry = heapq.heappop(self._expiry)
+            offer = self._by_id.get(entry[1])
+            if offer is None or offer.expires_at != entry[0]:
+                continue
+            if entry[1] == keep:
+                kept.append(entry)
+                continue
+            out.append(self.remove(entry[1]))
+        for entry in kept:
+            heapq.heappush(self._expiry, entry)
+        return out
+
+    def to_front(self) -> List[Dict]:
+        return [o.to_front() for o in self]
+
+    def to_dict(self) -> List[Dict]:
+        # oldest first, so load_dict() rebuilds the same order
+        return [asdict(o) for o in self._by_id.values()]
+
+    def load_dict(self, items: List[Dict]):
+        self.clear()
+        for d in items:
+            self.add(TradeOffer(**d))
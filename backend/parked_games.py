@@ -0,0 +1,79 @@
+# parked_games.py
+from typing import Dict, List, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def _default_db_path() -> str:
+    base = os.path.dirname(os.path.abspath(__file__))
+    return os.getenv("PARKED_GAMES_DB", os.path.join(base, "data", "parked_games.sqlite3"))
+
+
+class ParkedGames:
+    """
+    SQLite home of idle games taken out of memory (GameManager.evict_idle).
+    A row is GameState.to_dict() at the moment it was parked; the next lookup of
+    the game id adopts it back into memory and deletes the row.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or _default_db_path()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS parked ("
+                " game_id TEXT PRIMARY KEY, players_count INTEGER, game_over INTEGER, parked_at REAL, state TEXT)"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def put(self, d: Dict):
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO parked VALUES (?, ?, ?, ?, ?)",
+                (d["gameId"], d["playersCount"], int(d["gameOver"]), time.time(), json.dumps(d)),
+            )
+            db.commit()
+
+    def get(self, game_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn().execute("SELECT state FROM parked WHERE game_id = ?", (game_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def has(self, game_id: str) -> bool:
+        with self._lock:
+            return self._conn().execute("SELECT 1 FROM parked WHERE game_id = ?", (game_id,)).fetchone() is not None
+
+    def delete(self, game_id: str) -> bool:
+        with self._lock:
+            db = self._conn()
+            gone = db.execute("DELETE FROM parked WHERE game_id = ?", (game_id,)).rowcount > 0
+            db.commit()
+        return gone
+
+    def list(self) -> List[Dict]:
+        now = time.time()
+        with self._lock:
+            rows = self._conn().execute("SELECT game_id, players_count, game_over, parked_at FROM parked").fetchall()
+        return [
+            {"gameId": gid, "playersCount": n, "gameOver": bool(over), "parked": True, "parkedSec": round(now - at, 1)}
+            for gid, n, over, at in rows
+        ]
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn().execute("SELECT game_id FROM parked").fetchall()]
+
+
+parked_games = ParkedGames()
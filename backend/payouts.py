@@ -0,0 +1,388 @@
+# payouts.py
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from chain.chain_fxrp import FxrpChain, fxrp_client
+from chain.balance_refresher import balance_refresher
+from chain.transfer_index import transfer_index
+
+# queued -> sending -> sent -> confirmed | failed (queued again with backoff on send errors)
+PAYOUT_STATUSES = ("queued", "sending", "sent", "confirmed", "failed")
+
+# payouts per game shown in the game state
+RECENT_PAYOUTS = 20
+
+_COLUMNS = (
+    "id, game_id, player_index, to_addr, amount_raw, reason, status, attempts, tx_hash, last_error,"
+    " created_at, updated_at, next_attempt_at, nonce, from_addr, tx_hashes"
+)
+
+
+def _default_db_path() -> str:
+    base = os.path.dirname(os.path.abspath(__file__))
+    return os.getenv("PAYOUT_DB", os.path.join(base, "data", "payouts.sqlite3"))
+
+
+@dataclass
+class Payout:
+    id: str
+    game_id: str
+    player_index: int
+    to_addr: str
+    amount_raw: int
+    reason: str
+    status: str = "queued"
+    attempts: int = 0
+    tx_hash: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    next_attempt_at: float = 0.0
+    # bank nonce the transfer used, its sender and every hash sent with that nonce
+    # (tx_hash is the newest of them)
+    nonce: Optional[int] = None
+    from_addr: Optional[str] = None
+    tx_hashes: List[str] = field(default_factory=list)
+
+    def to_front(self) -> Dict:
+        return {
+            "id": self.id,
+            "playerIndex": self.player_index,
+            "to": self.to_addr,
+            "amountRaw": int(self.amount_raw),
+            "reason": self.reason,
+            "status": self.status,
+            "attempts": self.attempts,
+            "txHash": self.tx_hash,
+            "error": self.last_error,
+        }
+
+
+class PayoutQueue:
+    """
+    Durable bank -> player FXRP payouts.
+
+    Game code only enqueue()s (one local SQLite insert). A worker thread signs and
+    sends the transfers, retries failures with exponential backoff and follows
+    each tx until its receipt is in. Status per payout is kept in SQLite so a
+    restart resumes where it stopped.
+    """
+
+    def __init__(self, client: FxrpChain, db_path: Optional[str] = None):
+        self.client = client
+        self.db_path = db_path or _default_db_path()
+        self.max_attempts = int(os.getenv("PAYOUT_MAX_ATTEMPTS", "6"))
+        self.backoff_base_sec = float(os.getenv("PAYOUT_BACKOFF_SEC", "2"))
+        self.backoff_max_sec = float(os.getenv("PAYOUT_BACKOFF_MAX_SEC", "120"))
+        self.poll_sec = float(os.getenv("PAYOUT_POLL_SEC", "2"))
+
+        # called with game_id whenever one of its payouts changes status
+        self.on_change: Optional[Callable[[str], None]] = None
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # held by the worker from claiming a payout until its outcome is saved (export_game waits on it)
+        self._send_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # newest RECENT_PAYOUTS per game in memory, loaded from the table on first use
+        # and dropped with forget() when the game leaves memory
+        self._recent: Dict[str, Deque[Payout]] = {}
+
+    # ---------------- storage ----------------
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS payouts ("
+                " id TEXT PRIMARY KEY, game_id TEXT, player_index INTEGER, to_addr TEXT,"
+                " amount_raw TEXT, reason TEXT, status TEXT, attempts INTEGER, tx_hash TEXT,"
+                " last_error TEXT, created_at REAL, updated_at REAL, next_attempt_at REAL,"
+                " nonce INTEGER, from_addr TEXT, tx_hashes TEXT)"
+            )
+            # tables from before the nonce / tx_hashes columns
+            cols = {r[1] for r in db.execute("PRAGMA table_info(payouts)")}
+            for name, kind in (("nonce", "INTEGER"), ("from_addr", "TEXT"), ("tx_hashes", "TEXT")):
+                if name not in cols:
+                    db.execute(f"ALTER TABLE payouts ADD COLUMN {name} {kind}")
+            db.execute("CREATE INDEX IF NOT EXISTS payouts_status ON payouts(status, next_attempt_at)")
+            db.execute("CREATE INDEX IF NOT EXISTS payouts_game ON payouts(game_id, created_at)")
+            # a crash between signing and recording the hash leaves 'sending' rows behind:
+            # resending could pay twice, so they need a manual look
+            db.execute(
+                "UPDATE payouts SET status='failed', last_error='interrupted while sending, reconcile on-chain'"
+                " WHERE status='sending'"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _save(self, p: Payout, new: bool = False):
+        p.updated_at = time.time()
+        db = self._conn()
+        row = (p.id, p.game_id, p.player_index, p.to_addr, str(p.amount_raw), p.reason, p.status,
+               p.attempts, p.tx_hash, p.last_error, p.created_at, p.updated_at, p.next_attempt_at,
+               p.nonce, p.from_addr, json.dumps(p.tx_hashes))
+        if new:
+            db.execute("INSERT OR REPLACE INTO payouts (" + _COLUMNS + ") VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", row)
+        else:
+            # an update only: a payout exported to another shard must not come back
+            db.execute(
+                "UPDATE payouts SET " + ", ".join(c + "=?" for c in _COLUMNS.split(", ")[1:]) + " WHERE id=?",
+                row[1:] + row[:1],
+            )
+        db.commit()
+
+        recent = self._recent.get(p.game_id)
+        if recent is None:
+            return  # not cached: the next for_game() reads it from the table
+        for i, old in enumerate(recent):
+            if old.id == p.id:
+                recent[i] = p
+                break
+        else:
+            recent.append(p)
+
+    def _load(self, where: str, args=()) -> List[Payout]:
+        rows = self._conn().execute("SELECT " + _COLUMNS + " FROM payouts WHERE " + where, args).fetchall()
+        return [
+            Payout(
+                id=r[0], game_id=r[1], player_index=r[2], to_addr=r[3], amount_raw=int(r[4]),
+                reason=r[5], status=r[6], attempts=r[7], tx_hash=r[8], last_error=r[9],
+                created_at=r[10], updated_at=r[11], next_attempt_at=r[12],
+                nonce=r[13], from_addr=r[14],
+                tx_hashes=json.loads(r[15]) if r[15] else ([r[8]] if r[8] else []),
+            )
+            for r in rows
+        ]
+
+    # ---------------- game side ----------------
+
+    def enqueue(self, game_id: str, player_index: int, to_addr: str, amount_raw: int, reason: str) -> Payout:
+        now = time.time()
+        p = Payout(
+            id=uuid.uuid4().hex,
+            game_id=game_id,
+            player_index=player_index,
+            to_addr=Web3.to_checksum_address(to_addr),
+            amount_raw=int(amount_raw),
+            reason=reason,
+            created_at=now,
+            next_attempt_at=now,
+        )
+        with self._lock:
+            self._save(p, new=True)
+        self._ensure_started()
+        self._wake.set()
+        return p
+
+    def for_game(self, game_id: str) -> List[Dict]:
+        """Latest payouts of a game (one table read per game, then from memory)."""
+        recent = self._recent.get(game_id)
+        if recent is None:
+            with self._lock:
+                recent = self._recent.get(game_id)
+                if recent is None:
+                    rows = self._load("game_id = ? ORDER BY created_at DESC LIMIT ?", (game_id, RECENT_PAYOUTS))
+                    recent = self._recent[game_id] = deque(reversed(rows), maxlen=RECENT_PAYOUTS)
+        return [p.to_front() for p in recent]
+
+    def forget(self, game_id: str):
+        """Drop a game's cached payouts (it left memory; its rows stay in the table)."""
+        self._recent.pop(game_id, None)
+
+    def export_game(self, game_id: str) -> List[Dict]:
+        """Take a game's payouts out of this queue (the game moves to another shard)."""
+        with self._send_lock, self._lock:
+            rows = self._load("game_id = ? ORDER BY created_at", (game_id,))
+            db = self._conn()
+            db.execute("DELETE FROM payouts WHERE game_id = ?", (game_id,))
+            db.commit()
+            self._recent.pop(game_id, None)
+        return [asdict(p) for p in rows]
+
+    def import_game(self, rows: List[Dict]):
+        """Adopt payouts exported by another shard; queued ones are sent from here."""
+        with self._lock:
+            for d in rows:
+                p = Payout(**d)
+                self._save(p, new=True)
+                self._recent.pop(p.game_id, None)
+        self._ensure_started()
+        self._wake.set()
+
+    def get(self, payout_id: str) -> Optional[Payout]:
+        with self._lock:
+            found = self._load("id = ?", (payout_id,))
+        return found[0] if found else None
+
+    # ---------------- worker ----------------
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="payout-worker", daemon=True)
+                self._thread.start()
+
+    def start(self):
+        # pick up whatever a previous process left queued / in flight
+        with self._lock:
+            self._conn()
+        self._ensure_started()
+
+    def _changed(self, p: Payout):
+        if self.on_change is not None:
+            try:
+                self.on_change(p.game_id)
+            except Exception as e:
+                print(f"payout on_change failed: {e}")
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.backoff_max_sec, self.backoff_base_sec * (2 ** max(0, attempts - 1)))
+
+    def _send_due(self):
+        now = time.time()
+        with self._lock:
+            due = self._load("status = 'queued' AND next_attempt_at <= ? ORDER BY created_at", (now,))
+
+        for p in due:
+            with self._send_lock:
+                self._send_one(p)
+
+    def _send_one(self, p: Payout):
+        with self._lock:
+            if not self._load("id = ? AND status = 'queued'", (p.id,)):
+                return  # exported meanwhile
+            p.status = "sending"
+            p.attempts += 1
+            self._save(p)
+        try:
+            txh = self.client.transfer_from_bank(p.to_addr, p.amount_raw)
+            nonces = self.client.bank_nonces()
+            p.nonce = nonces.nonce_of(txh)
+            p.from_addr = nonces.address
+            p.tx_hash = txh if txh.startswith("0x") else "0x" + txh
+            p.tx_hashes = [p.tx_hash]
+            p.status = "sent"
+            p.last_error = None
+        except Exception as e:
+            p.last_error = str(e)
+            if p.attempts >= self.max_attempts:
+                p.status = "failed"
+            else:
+                p.status = "queued"
+                p.next_attempt_at = time.time() + self._backoff(p.attempts)
+        with self._lock:
+            self._save(p)
+        self._changed(p)
+
+    def _confirm_sent(self):
+        with self._lock:
+            sent = self._load("status = 'sent'")
+        if not sent:
+            return
+
+        nonces = self.client.bank_nonces()
+        try:
+            # read before any receipt: a nonce below it with no receipt seen really was used by another tx
+            used_below = nonces.confirmed_nonce()
+        except Exception:
+            return
+        for p in sent:
+            # the nonce manager may have re-sent it with a higher gas price
+            known = list(dict.fromkeys(p.tx_hashes + nonces.tried(p.tx_hash)))
+            if known != p.tx_hashes:
+                p.tx_hashes = known
+                p.tx_hash = known[-1]
+                with self._lock:
+                    self._save(p)
+            try:
+                outcome = self._outcome(p, nonces.address, used_below)
+            except Exception:
+                continue  # RPC hiccup - check again next round
+            if outcome is None:
+                continue
+            p.status = "confirmed" if outcome == "confirmed" else "failed"
+            if outcome == "reverted":
+                p.last_error = "transfer reverted"
+            elif outcome == "lost":
+                # resending could pay twice, so it needs a manual look
+                p.last_error = "nonce used by another tx, reconcile on-chain"
+            with self._lock:
+                self._save(p)
+            balance_refresher.touch(p.to_addr)
+            self._changed(p)
+
+    def _outcome(self, p: Payout, bank: str, used_below: int) -> Optional[str]:
+        """confirmed / reverted / lost, or None while still pending."""
+        if self._reconciled(p):
+            return "confirmed"
+        for h in p.tx_hashes:
+            try:
+                receipt = self.client.w3.eth.get_transaction_receipt(h)
+            except TransactionNotFound:
+                continue
+            p.tx_hash = h
+            return "confirmed" if receipt.get("status") == 1 else "reverted"
+        # sent from another bank (moved from another shard): its nonce says nothing here
+        if p.nonce is None or p.from_addr != bank or p.nonce >= used_below:
+            return None
+        # mined by a hash we lost track of (e.g. a replacement right before a restart)
+        found = self._unclaimed_transfer(p)
+        if found is not None:
+            p.tx_hash = found
+            p.tx_hashes.append(found)
+            return "confirmed"
+        return "lost"
+
+    def _reconciled(self, p: Payout) -> bool:
+        # the bank -> player Transfer is already in the local index (no RPC needed)
+        confirmed = transfer_index.confirmed_block()
+        if confirmed is None:
+            return False
+        for h in p.tx_hashes:
+            for t in transfer_index.by_tx(h):
+                if t.block_number <= confirmed and t.to_addr == p.to_addr and t.value == p.amount_raw:
+                    p.tx_hash = h
+                    return True
+        return False
+
+    def _unclaimed_transfer(self, p: Payout) -> Optional[str]:
+        for t in transfer_index.history(p.to_addr, limit=200):
+            if t.from_addr != p.from_addr or t.to_addr != p.to_addr or t.value != p.amount_raw:
+                continue
+            with self._lock:
+                taken = self._load("id != ? AND tx_hashes LIKE ?", (p.id, f'%"{t.tx_hash}"%'))
+            if not taken:
+                return t.tx_hash
+        return None
+
+    def _run(self):
+        while True:
+            try:
+                self._send_due()
+                self._confirm_sent()
+                # stuck / gapped bank txs get replaced here
+                if self.client.bank_configured():
+                    self.client.bank_nonces().maintain()
+            except Exception as e:
+                print(f"❌ Payout worker error: {e}")
+            self._wake.wait(self.poll_sec)
+            self._wake.clear()
+
+
+payout_queue = PayoutQueue(fxrp_client)
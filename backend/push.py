@@ -0,0 +1,112 @@
+# push.py
+import asyncio
+import json
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from game import GameView
+
+
+def encode(payload: Dict) -> str:
+    return json.dumps(payload, separators=(",", ":"), default=str)
+
+
+class GameHub:
+    """
+    WebSocket fan-out per game.
+
+    publish() is called by a game's GameActor with every new GameView. Each
+    subscriber remembers the version it was last sent (its full snapshot first,
+    see mark_sent()); a view becomes ONE delta per distinct last-sent version,
+    normally one for everybody, encoded once and handed to those queues on the
+    event loop. A subscriber never gets a delta that is not newer than what it has.
+    A subscriber that falls QUEUE_SIZE updates behind is dropped; it reconnects and
+    gets a full snapshot again.
+    """
+
+    QUEUE_SIZE = 64
+
+    def __init__(self):
+        self._subs: Dict[str, Set[asyncio.Queue]] = {}
+        # version each subscriber was sent last (missing until its snapshot went out)
+        self._sent: Dict[asyncio.Queue, int] = {}
+        self._latest: Dict[str, GameView] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    # ---------------- subscribers (event loop side) ----------------
+
+    def subscribe(self, game_id: str) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        with self._lock:
+            self._subs.setdefault(game_id, set()).add(q)
+        return q
+
+    def mark_sent(self, game_id: str, q: asyncio.Queue, version: int):
+        # q got a full snapshot at `version`; its pushes are deltas from there
+        with self._lock:
+            if q not in self._subs.get(game_id, ()):
+                return
+            self._sent[q] = version
+            # views published while the snapshot was on its way
+            latest = self._latest.get(game_id)
+            if latest is None or latest.version <= version:
+                return
+            payload = latest.to_delta(version)
+            self._sent[q] = payload["version"]
+        self._fan_out(game_id, [(q, encode(payload))])
+
+    def unsubscribe(self, game_id: str, q: asyncio.Queue):
+        with self._lock:
+            self._sent.pop(q, None)
+            subs = self._subs.get(game_id)
+            if subs is None:
+                return
+            subs.discard(q)
+            if not subs:
+                self._subs.pop(game_id, None)
+                self._latest.pop(game_id, None)
+
+    def subscriber_count(self, game_id: Optional[str] = None) -> int:
+        with self._lock:
+            if game_id is not None:
+                return len(self._subs.get(game_id, ()))
+            return sum(len(s) for s in self._subs.values())
+
+    # ---------------- publishing (any thread) ----------------
+
+    def publish(self, view: GameView):
+        if self._loop is None or not self._subs.get(view.game_id):
+            return
+
+        out: List[Tuple[asyncio.Queue, str]] = []
+        encoded: Dict[int, Tuple[int, str]] = {}
+        with self._lock:
+            self._latest[view.game_id] = view
+            for q in self._subs.get(view.game_id, ()):
+                since = self._sent.get(q)
+                if since is None or view.version <= since:
+                    continue
+                if since not in encoded:
+                    payload = view.to_delta(since)
+                    encoded[since] = (payload["version"], encode(payload))
+                self._sent[q], data = encoded[since]
+                out.append((q, data))
+
+        if out:
+            self._loop.call_soon_threadsafe(self._fan_out, view.game_id, out)
+
+    def _fan_out(self, game_id: str, out: List[Tuple[asyncio.Queue, str]]):
+        for q, data in out:
+            try:
+                q.put_nowait(data)
+            except asyncio.QueueFull:
+                # too slow: drop the backlog and tell the sender loop to close
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(None)
+                self.unsubscribe(game_id, q)
+
+
+HUB = GameHub()
@@ -0,0 +1,177 @@
+# replay.py
+# Re-run recorded games from the event log and report where the current rules
+# disagree with what was recorded:
+#   python replay.py [events dir] [--workers N] [--game ID] [--trace]
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from event_log import EventLog, GameEvent
+
+# (game id, snapshot dict or None, events in seq order)
+ReplayJob = Tuple[str, Optional[Dict], List[GameEvent]]
+
+
+class ReplayError(RuntimeError):
+    pass
+
+
+class _NoChain:
+    """Stands in for chain clients / queues: a replay must never reach them."""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        raise ReplayError(f"{self._name}.{attr} used during replay")
+
+
+class _NoBalances:
+    def follow(self, owner: str, addresses):
+        pass
+
+    def touch(self, address: str):
+        pass
+
+    def get(self, address: str):
+        return None, None
+
+
+def _isolate():
+    """Cut the game module off from RPC, the payout queue and the on-disk message and tx-claim stores."""
+    import game
+    import message_log
+    import transactions
+
+    game.fxrp_client = _NoChain("fxrp_client")
+    game.payout_queue = _NoChain("payout_queue")
+    game.verify_proof = _NoChain("verify_proof")
+    game.balance_refresher = _NoBalances()
+    message_log.message_store.db_path = ":memory:"
+    transactions.settled_txs.db_path = ":memory:"
+
+
+def load_jobs(log: EventLog, game_id: Optional[str] = None) -> List[ReplayJob]:
+    """Newest snapshot as the starting point + every event after it, grouped by game."""
+    snap_seq, data = log.latest_snapshot()
+    bases: Dict[str, Dict] = {d["gameId"]: d for d in data["games"]} if data else {}
+
+    events: Dict[str, List[GameEvent]] = {}
+    for ev in log.read_events(snap_seq):
+        if game_id is not None and ev.game_id != game_id:
+            continue
+        base = bases.get(ev.game_id)
+        if base is not None and ev.seq <= base["lastSeq"]:
+            continue
+        events.setdefault(ev.game_id, []).append(ev)
+
+    return [(gid, bases.get(gid), evs) for gid, evs in events.items()]
+
+
+def replay_game(job: ReplayJob, trace: bool = False) -> Dict:
+    from game import GameState
+
+    game_id, base, events = job
+    if base is not None:
+        g = GameState.from_dict(base)
+    else:
+        # created in the log, or the default game that exists from boot
+        create = next((e for e in events if e.kind == "create"), None)
+        g = GameState(players_count=int(create.kwargs["playersCount"]) if create else 3, game_id=game_id)
+        g.reset()
+
+    report = {"gameId": game_id, "events": 0, "checked": 0, "divergence": None, "trace": []}
+    for ev in events:
+        if ev.kind == "create":
+            continue
+        if ev.kind == "evict":
+            break
+        if ev.kind == "park":
+            # left memory idle; the "import" that brings it back carries its state
+            continue
+        if ev.kind == "import":
+            # moved here from another shard: its state up to now is in the event
+            g = GameState.from_dict(ev.kwargs["state"])
+            continue
+        report["events"] += 1
+        try:
+            g.apply_event(ev)
+        except Exception as e:
+            report["divergence"] = {"seq": ev.seq, "kind": ev.kind, "error": f"{type(e).__name__}: {e}"}
+            break
+
+        if ev.outcome is None:
+            continue
+        got = g.outcome()
+        report["checked"] += 1
+        if trace:
+            report["trace"].append({"seq": ev.seq, "kind": ev.kind, **got})
+        if got["digest"] != ev.outcome["digest"]:
+            report["divergence"] = {
+                "seq": ev.seq,
+                "kind": ev.kind,
+                "args": ev.args,
+                "expected": ev.outcome,
+                "actual": got,
+                "fields": [k for k in ("active", "pos", "balances") if got[k] != ev.outcome.get(k)],
+            }
+            break
+    return report
+
+
+def _replay_worker(job: ReplayJob) -> Dict:
+    return replay_game(job)
+
+
+def run(log_dir: Optional[str] = None, workers: Optional[int] = None, game_id: Optional[str] = None, trace: bool = False) -> Dict:
+    import game  # noqa: F401  (web3 import cost stays out of the timing, and forked workers share it)
+
+    log = EventLog(log_dir)
+    jobs = load_jobs(log, game_id)
+    total_events = sum(len(evs) for _, _, evs in jobs)
+
+    t0 = time.perf_counter()
+    if trace or workers == 1 or len(jobs) < 2:
+        _isolate()
+        reports = [replay_game(j, trace) for j in jobs]
+    else:
+        workers = workers or os.cpu_count() or 1
+        chunk = max(1, len(jobs) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_isolate) as pool:
+            reports = list(pool.map(_replay_worker, jobs, chunksize=chunk))
+    dt = time.perf_counter() - t0
+
+    diverged = [r for r in reports if r["divergence"]]
+    return {
+        "games": len(reports),
+        "events": total_events,
+        "diverged": len(diverged),
+        "sec": round(dt, 3),
+        "gamesPerSec": round(len(reports) / dt, 1) if dt else None,
+        "eventsPerSec": round(total_events / dt, 1) if dt else None,
+        "divergences": [{"gameId": r["gameId"], **r["divergence"]} for r in diverged],
+        "trace": reports[0]["trace"] if trace and reports else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay recorded games and report divergences")
+    ap.add_argument("dir", nargs="?", default=None, help="event log dir (default EVENT_LOG_DIR)")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--game", default=None, help="only this game id")
+    ap.add_argument("--trace", action="store_true", help="print the outcome after every event (with --game)")
+    a = ap.parse_args()
+
+    result = run(a.dir, a.workers, a.game, a.trace)
+    if not result["trace"]:
+        result.pop("trace")
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["diverged"] else 0)
+
+
+if __name__ == "__main__":
+    main()
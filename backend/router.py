@@ -0,0 +1,448 @@
+# router.py
+# Front process of a sharded backend:
+#   python router.py [--shards N] [--host 0.0.0.0] [--port 8000]
+#
+# Starts N backend processes (uvicorn main:app, one per core by default), each
+# listening on its own unix socket and owning the game ids that sharding.owner()
+# gives it. Every /games/{id}/... request and websocket is passed to the owning
+# shard; legacy root routes and chain endpoints go to the owner of the default
+# game. GET /games merges all shards, GET /shards shows membership and the last
+# rebalance.
+#
+# Placement is rendezvous hashing over the shard indexes, so changing --shards
+# only moves the games whose owner changed. At startup every game a shard holds
+# but no longer owns is moved (exported, then imported into the owner's journal).
+# Leftover data of shards beyond the new count is drained the same way by
+# temporary shards that own nothing.
+#
+# Each shard keeps its own event log, message/payout/transfer/parked-game databases under
+# data/shard-<i>/; the settled-tx table (SETTLED_TX_DB) is shared, so one transfer
+# settles one purchase across all shards. Env vars SHARD_<i>_<NAME> are passed to
+# shard i as <NAME>. Hot wallets must differ per shard (SHARD_<i>_BANK_PRIVATE_KEY +
+# SHARD_<i>_TREASURY_WALLET, SHARD_<i>_DICE_PRIVATE_KEY): shards sharing one would keep
+# invalidating each other's nonces, so the router refuses to start them.
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import aiohttp
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+
+from sharding import owner
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# every shard loads backend/.env (main.py); so does the router, so its config checks see the same values
+load_dotenv(dotenv_path=os.path.join(BASE_DIR, ".env"))
+
+DEFAULT_GAME_ID = os.getenv("GAME_ID", "local")
+SHARD_SOCKET_DIR = os.getenv("SHARD_SOCKET_DIR", "/tmp/flarepoly-shards")
+SHARD_HEALTH_SEC = float(os.getenv("SHARD_HEALTH_SEC", "2"))
+SHARD_BOOT_TIMEOUT_SEC = float(os.getenv("SHARD_BOOT_TIMEOUT_SEC", "60"))
+
+# per-hop headers, never forwarded
+_HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "upgrade", "host", "content-length", "te", "trailer"}
+
+
+class Shard:
+    def __init__(self, index: int, count: int, draining: bool = False):
+        self.index = index
+        self.count = count
+        # beyond `count`: only started to move its games away, then stopped
+        self.draining = draining
+        self.socket = os.path.join(SHARD_SOCKET_DIR, f"shard-{index}.sock")
+        self.proc: Optional[subprocess.Popen] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.alive = False
+        self.restarts = 0
+        self.requests = 0
+        self.info: Dict = {}
+        self.checked_at: Optional[float] = None
+
+    def env(self) -> Dict[str, str]:
+        env = dict(os.environ)
+        data = os.path.join(BASE_DIR, "data", f"shard-{self.index}")
+        env.setdefault("EVENT_LOG_DIR", os.path.join(data, "events"))
+        env.setdefault("MESSAGE_DB", os.path.join(data, "messages.sqlite3"))
+        env.setdefault("PAYOUT_DB", os.path.join(data, "payouts.sqlite3"))
+        env.setdefault("TRANSFER_INDEX_DB", os.path.join(data, "transfers.sqlite3"))
+        env.setdefault("PARKED_GAMES_DB", os.path.join(data, "parked_games.sqlite3"))
+        env.setdefault("SETTLED_TX_DB", os.path.join(BASE_DIR, "data", "settled_txs.sqlite3"))
+        prefix = f"SHARD_{self.index}_"
+        for k, v in os.environ.items():
+            if k.startswith(prefix):
+                env[k[len(prefix):]] = v
+        env["SHARD_INDEX"] = str(self.index)
+        env["SHARD_COUNT"] = str(self.count)
+        return env
+
+    def signers(self) -> Dict[str, str]:
+        """Hot-wallet keys this shard signs with, by env name."""
+        env = self.env()
+        keys = {}
+        if env.get("BANK_PRIVATE_KEY"):
+            keys["BANK_PRIVATE_KEY"] = env["BANK_PRIVATE_KEY"]
+        if self.rolls_on_chain():
+            keys["DICE_PRIVATE_KEY"] = env.get("DICE_PRIVATE_KEY", "built-in")
+        return {name: k.strip().lower().removeprefix("0x") for name, k in keys.items()}
+
+    def rolls_on_chain(self) -> bool:
+        # pool / direct dice send rollDice txs; a draining shard owns no games, so never rolls
+        return not self.draining and self.env().get("DICE_MODE", "pool").strip().lower() in ("pool", "direct")
+
+    def event_dir(self) -> str:
+        return self.env()["EVENT_LOG_DIR"]
+
+    def has_data(self) -> bool:
+        d = self.event_dir()
+        return os.path.isdir(d) and bool(os.listdir(d))
+
+    def spawn(self):
+        os.makedirs(SHARD_SOCKET_DIR, exist_ok=True)
+        if os.path.exists(self.socket):
+            os.remove(self.socket)
+        self.alive = False
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--uds", self.socket, "--log-level", "warning"],
+            cwd=BASE_DIR,
+            env=self.env(),
+        )
+        print(f"🧩 Shard {self.index} started (pid {self.proc.pid})")
+
+    def url(self, path: str) -> str:
+        # the host part is ignored on a unix socket
+        return "http://shard" + path
+
+    async def check(self) -> bool:
+        try:
+            async with self.session.get(self.url("/shard/info"), timeout=aiohttp.ClientTimeout(total=5)) as r:
+                self.info = await r.json()
+            self.alive = r.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+            self.alive = False
+        self.checked_at = time.time()
+        return self.alive
+
+    def status(self) -> Dict:
+        return {
+            "index": self.index,
+            "draining": self.draining,
+            "socket": self.socket,
+            "pid": self.proc.pid if self.proc else None,
+            "alive": self.alive,
+            "restarts": self.restarts,
+            "requests": self.requests,
+            "games": self.info.get("games"),
+            "misplaced": len(self.info.get("misplaced", [])),
+            "checkedAt": self.checked_at,
+        }
+
+
+class ShardRouter:
+    """Owns the shard processes: placement, health checks / restarts and rebalancing."""
+
+    def __init__(self, count: int):
+        self.shards = [Shard(i, count) for i in range(count)]
+        self.drained: List[Dict] = []
+        self.rebalance_runs = 0
+        self.last_rebalance: Optional[Dict] = None
+        self._monitor: Optional[asyncio.Task] = None
+
+    def owner(self, game_id: str) -> Shard:
+        return self.shards[owner(game_id, range(len(self.shards)))]
+
+    def _leftovers(self) -> List[Shard]:
+        out = []
+        i = len(self.shards)
+        while True:
+            s = Shard(i, len(self.shards), draining=True)
+            if not s.has_data():
+                return out
+            out.append(s)
+            i += 1
+
+    def _check_config(self, shards: List[Shard]):
+        if len({s.env()["SETTLED_TX_DB"] for s in shards}) > 1:
+            raise RuntimeError("All shards must share one SETTLED_TX_DB")
+        seen: Dict[tuple, int] = {}
+        for s in shards:
+            for name, key in s.signers().items():
+                other = seen.setdefault((name, key), s.index)
+                if other != s.index:
+                    raise RuntimeError(f"Shards {other} and {s.index} share one {name}; set SHARD_<i>_{name} per shard")
+
+    def _check_signers(self, shards: List[Shard]):
+        # what the shards really sign with (/shard/info), whatever env or .env they picked it up from
+        seen: Dict[tuple, int] = {}
+        for s in shards:
+            for name, addr in s.info.get("signers", {}).items():
+                if addr is None or (name == "dice" and not s.rolls_on_chain()):
+                    continue
+                other = seen.setdefault((name, addr.lower()), s.index)
+                if other != s.index:
+                    raise RuntimeError(f"Shards {other} and {s.index} both sign {name} txs as {addr}")
+
+    async def _boot(self, shards: List[Shard]):
+        for s in shards:
+            s.spawn()
+            s.session = aiohttp.ClientSession(connector=aiohttp.UnixConnector(path=s.socket))
+        deadline = time.time() + SHARD_BOOT_TIMEOUT_SEC
+        while not all([await s.check() for s in shards]):
+            if time.time() > deadline:
+                raise RuntimeError("Shards did not come up: " + str([s.index for s in shards if not s.alive]))
+            await asyncio.sleep(0.2)
+
+    async def _stop(self, shards: List[Shard]):
+        for s in shards:
+            if s.proc is not None and s.proc.poll() is None:
+                s.proc.terminate()  # shards snapshot their event log on shutdown
+        for s in shards:
+            if s.proc is not None:
+                try:
+                    await asyncio.to_thread(s.proc.wait, 30)
+                except subprocess.TimeoutExpired:
+                    s.proc.kill()
+            if s.session is not None:
+                await s.session.close()
+
+    async def start(self):
+        leftovers = self._leftovers()
+        self._check_config(self.shards + leftovers)
+        await self._boot(self.shards + leftovers)
+        try:
+            self._check_signers(self.shards + leftovers)
+        except RuntimeError:
+            await self._stop(self.shards + leftovers)
+            raise
+        result = await self.rebalance(self.shards + leftovers)
+
+        await self._stop(leftovers)
+        for s in leftovers:
+            failed = [e for e in result["errors"] if e["from"] == s.index]
+            if not failed:
+                # everything moved out; keep the files, but never drain them again
+                os.rename(s.event_dir(), f"{s.event_dir()}.drained-{int(time.time())}")
+            self.drained.append({"index": s.index, "dir": s.event_dir(), "failed": len(failed)})
+
+        self._monitor = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+        await self._stop(self.shards)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(SHARD_HEALTH_SEC)
+            for s in self.shards:
+                if s.proc.poll() is not None:
+                    print(f"❌ Shard {s.index} exited ({s.proc.returncode}), restarting")
+                    s.restarts += 1
+                    s.spawn()
+                    continue
+                await s.check()
+
+    async def _import(self, shard: Shard, payload: bytes):
+        async with shard.session.post(
+            shard.url("/shard/import"), data=payload, headers={"content-type": "application/json"}
+        ) as r:
+            if r.status != 200:
+                raise RuntimeError(f"import into shard {shard.index}: {r.status} {await r.text()}")
+
+    async def _move(self, src: Shard, dst: Shard, game_id: str):
+        async with src.session.post(src.url(f"/shard/export/{game_id}")) as r:
+            if r.status != 200:
+                raise RuntimeError(f"export from shard {src.index}: {r.status} {await r.text()}")
+            payload = await r.read()
+        try:
+            await self._import(dst, payload)
+        except Exception:
+            # the source already let go of it: put it back rather than lose it
+            await self._import(src, payload)
+            raise
+
+    async def rebalance(self, shards: Optional[List[Shard]] = None) -> Dict:
+        """
+        Move games a shard holds but does not own (after the shard count changed)
+        to their owner: export there (released), import here (journaled).
+        """
+        shards = self.shards if shards is None else shards
+        t0 = time.time()
+        moved: List[Dict] = []
+        errors: List[Dict] = []
+        for src in shards:
+            for gid in src.info.get("misplaced", []):
+                dst = self.owner(gid)
+                try:
+                    await self._move(src, dst, gid)
+                    moved.append({"gameId": gid, "from": src.index, "to": dst.index})
+                except Exception as e:
+                    errors.append({"gameId": gid, "from": src.index, "error": str(e)})
+                    print(f"❌ Moving game {gid} from shard {src.index} failed: {e}")
+        for s in shards:
+            await s.check()
+
+        self.rebalance_runs += 1
+        self.last_rebalance = {
+            "at": time.time(),
+            "sec": round(time.time() - t0, 3),
+            "moved": len(moved),
+            "games": moved[:100],
+            "errors": errors,
+        }
+        if moved:
+            print(f"🔀 Rebalanced {len(moved)} games across {len(self.shards)} shards")
+        return self.last_rebalance
+
+    def status(self) -> Dict:
+        return {
+            "count": len(self.shards),
+            "alive": sum(1 for s in self.shards if s.alive),
+            "defaultGameShard": self.owner(DEFAULT_GAME_ID).index,
+            "shards": [s.status() for s in self.shards],
+            "drained": self.drained,
+            "rebalanceRuns": self.rebalance_runs,
+            "lastRebalance": self.last_rebalance,
+        }
+
+
+router = ShardRouter(int(os.getenv("SHARD_COUNT", str(os.cpu_count() or 1))))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await router.start()
+    yield
+    await router.stop()
+
+
+app = FastAPI(title="FlarePoly Router", lifespan=lifespan)
+
+
+def _shard_for(path: str) -> Shard:
+    parts = path.strip("/").split("/")
+    if len(parts) >= 2 and parts[0] == "games" and parts[1]:
+        return router.owner(parts[1])
+    return router.owner(DEFAULT_GAME_ID)
+
+
+async def _forward(shard: Shard, request: Request, path: str, body: Optional[bytes] = None) -> Response:
+    if not shard.alive:
+        raise HTTPException(status_code=503, detail=f"Shard {shard.index} unavailable")
+    shard.requests += 1
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in _HOP_HEADERS}
+    try:
+        async with shard.session.request(
+            request.method,
+            shard.url(path),
+            params=list(request.query_params.multi_items()),
+            data=await request.body() if body is None else body,
+            headers=headers,
+        ) as r:
+            content = await r.read()
+            out = {k: v for k, v in r.headers.items() if k.lower() not in _HOP_HEADERS}
+            return Response(content=content, status_code=r.status, headers=out)
+    except (aiohttp.ClientError, OSError) as e:
+        raise HTTPException(status_code=503, detail=f"Shard {shard.index} unavailable: {e}")
+
+
+# ---------- router's own endpoints ----------
+
+@app.get("/shards")
+def shards_status():
+    return router.status()
+
+
+@app.post("/shards/rebalance")
+async def shards_rebalance():
+    return await router.rebalance()
+
+
+@app.get("/games")
+async def list_games():
+    """Games of every shard (a shard's copy of a game it does not own is left out)."""
+    games = []
+    for s in router.shards:
+        if not s.alive:
+            continue
+        async with s.session.get(s.url("/games")) as r:
+            data = await r.json()
+        games += [g for g in data["games"] if router.owner(g["gameId"]) is s]
+    return {"games": games, "defaultGameId": DEFAULT_GAME_ID}
+
+
+@app.post("/games")
+async def create_game(request: Request):
+    # the id decides the shard, so pick it here when the client did not
+    body = await request.json()
+    if not body.get("gameId"):
+        body["gameId"] = uuid.uuid4().hex[:12]
+    return await _forward(router.owner(body["gameId"]), request, "/games", json.dumps(body).encode())
+
+
+@app.websocket("/ws")
+@app.websocket("/games/{game_id}/ws")
+async def proxy_ws(ws: WebSocket, game_id: Optional[str] = None):
+    shard = router.owner(game_id or DEFAULT_GAME_ID)
+    path = f"/games/{game_id}/ws" if game_id else "/ws"
+    try:
+        upstream = await shard.session.ws_connect(shard.url(path))
+    except (aiohttp.ClientError, OSError):
+        await ws.close(code=1013)
+        return
+    await ws.accept()
+    shard.requests += 1
+
+    async def down():
+        async for msg in upstream:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                await ws.send_text(msg.data)
+            elif msg.type == aiohttp.WSMsgType.BINARY:
+                await ws.send_bytes(msg.data)
+        await ws.close(code=upstream.close_code or 1000)
+
+    async def up():
+        try:
+            while True:
+                await upstream.send_str(await ws.receive_text())
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(down()), asyncio.create_task(up())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await upstream.close()
+
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+async def proxy(path: str, request: Request):
+    return await _forward(_shard_for(path), request, "/" + path)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sharded FlarePoly backend")
+    ap.add_argument("--shards", type=int, default=None, help="backend processes (default SHARD_COUNT or CPU count)")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8000)
+    a = ap.parse_args()
+
+    global router
+    if a.shards is not None:
+        router = ShardRouter(a.shards)
+
+    import uvicorn
+    uvicorn.run(app, host=a.host, port=a.port)
+
+
+if __name__ == "__main__":
+    main()
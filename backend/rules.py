@@ -0,0 +1,10 @@
+# rules.py
+# Rule constants of the board game itself. Kept free of chain/web3 imports so
+# offline tools (simulate.py) use exactly the numbers game.py plays with.
+
+START_TILE_ID = 0
+START_BONUS_FC = 200
+STARTING_BALANCE_FC = 1000
+PRISON_WAIT_TURNS = 1
+PRISON_TILE_ID = 6
+GOTO_PRISON_TILE_ID = 18
@@ -0,0 +1,57 @@
+# session_keys.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Optional
+import hashlib
+import hmac
+import os
+import secrets
+import time
+
+SESSION_TTL_SEC = int(os.getenv("SESSION_TTL_SEC", "1800"))
+
+
+@dataclass
+class SessionKey:
+    """
+    Short-lived HMAC key a player unlocked with one wallet signature
+    (action START_SESSION). Actions can then be authenticated with
+    proof.session = session_id and proof.signature = session_mac(secret, message),
+    where message is the usual nonce-bound build_action_message.
+    """
+    session_id: str
+    player_index: int
+    address: str
+    secret: bytes
+    expires_at: float
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) >= self.expires_at
+
+    def to_front(self) -> Dict:
+        # returned once, to the player who started the session
+        return {
+            "sessionId": self.session_id,
+            "secret": "0x" + self.secret.hex(),
+            "playerIndex": self.player_index,
+            "address": self.address,
+            "expiresAt": self.expires_at,
+        }
+
+
+def new_session(player_index: int, address: str, ttl_sec: int = SESSION_TTL_SEC) -> SessionKey:
+    return SessionKey(
+        session_id=secrets.token_hex(16),
+        player_index=player_index,
+        address=address,
+        secret=secrets.token_bytes(32),
+        expires_at=time.time() + ttl_sec,
+    )
+
+
+def session_mac(secret: bytes, message: str) -> str:
+    return "0x" + hmac.new(secret, message.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_session_mac(session: SessionKey, message: str, mac: str) -> bool:
+    return hmac.compare_digest(session_mac(session.secret, message), mac.lower())
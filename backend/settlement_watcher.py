@@ -0,0 +1,161 @@
+# settlement_watcher.py
+from concurrent.futures import Future, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+import threading
+import time
+
+from web3 import Web3
+
+from chain.transfer_index import TransferIndex, transfer_index
+from game import GameState
+from game_actor import ActorClosed, GameActor
+from game_manager import GameManager
+
+
+class SettlementWatcher:
+    """
+    Follows FXRP Transfer logs and settles pending buys/trades on its own.
+
+    Every SETTLEMENT_POLL_SEC it reads the local transfer index (confirmed blocks
+    only, see MIN_CONFIRMATIONS) for transfers whose recipient is one of the
+    addresses some open PendingSettlement waits on, and hands matches (with their
+    block timestamp, so older payments never count) to
+    GameState.settle_from_transfer. Settlements past their expires_at are
+    cancelled, and so are trade offers past OFFER_TTL_SEC (so they stop
+    blocking turns). /settle with a tx hash keeps working as a fallback.
+    Every change goes through the game's GameActor, like a player action: a
+    pass submits to all the games it touches at once and waits at most
+    SETTLEMENT_CALL_TIMEOUT_SEC, so one busy game never holds up the others.
+    """
+
+    def __init__(self, games: GameManager, index: TransferIndex = transfer_index):
+        self.games = games
+        self.index = index
+        self.poll_sec = float(os.getenv("SETTLEMENT_POLL_SEC", "3"))
+        self.lookback = int(os.getenv("SETTLEMENT_LOOKBACK_BLOCKS", "100"))
+        self.call_timeout_sec = float(os.getenv("SETTLEMENT_CALL_TIMEOUT_SEC", "10"))
+
+        # called with the game after the watcher changed it
+        self.on_change: Optional[Callable[[GameState], None]] = None
+
+        self.cursor: Optional[int] = None  # last block fully scanned
+        self.settled_total = 0
+        self.expired_total = 0
+        self.expired_offers_total = 0
+        self._block_ts: Dict[int, int] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="settlement-watcher", daemon=True)
+        self._thread.start()
+
+    def _open_settlements(self) -> List[GameActor]:
+        return [a for a in self.games.all_actors() if a.game.pending_settlement is not None]
+
+    def _changed(self, game: GameState):
+        if self.on_change is not None:
+            try:
+                self.on_change(game)
+            except Exception as e:
+                print(f"settlement on_change failed: {e}")
+
+    def _each(self, actors: List[GameActor], method: str, *args) -> List[Tuple[GameActor, Any]]:
+        """
+        game.<method>(*args) on every actor at once; (actor, result) of the ones that
+        finished within call_timeout_sec (the rest still run, their result is dropped).
+        """
+        futs: Dict[Future, GameActor] = {}
+        for a in actors:
+            try:
+                futs[a.submit(getattr(a.game, method), *args)] = a
+            except ActorClosed:
+                continue  # parked or moved away in the meantime
+        if not futs:
+            return []
+        done, _ = wait(futs, timeout=self.call_timeout_sec)
+        out = []
+        for f in done:
+            if f.exception() is not None:
+                print(f"❌ Settlement watcher: {method} failed in game {futs[f].game.game_id}: {f.exception()}")
+                continue
+            out.append((futs[f], f.result()))
+        return out
+
+    # ---------------- one pass ----------------
+
+    def expire(self, actors: List[GameActor]) -> List[GameActor]:
+        expired = set()
+        for a, gone in self._each(actors, "expire_settlement", time.time()):
+            if gone:
+                expired.add(a)
+                self.expired_total += 1
+                self._changed(a.game)
+        return [a for a in actors if a not in expired]
+
+    def expire_offers(self):
+        now_ms = int(time.time() * 1000)
+        with_offers = [a for a in self.games.all_actors() if len(a.game.trade_offers)]
+        for a, expired in self._each(with_offers, "expire_offers", now_ms):
+            if expired:
+                self.expired_offers_total += 1
+                self._changed(a.game)
+
+    def _timestamp(self, block_number: int) -> int:
+        ts = self._block_ts.get(block_number)
+        if ts is None:
+            if len(self._block_ts) > 1000:
+                self._block_ts.clear()
+            ts = self._block_ts[block_number] = int(self.index.client.w3.eth.get_block(block_number)["timestamp"])
+        return ts
+
+    def match(self, actors: List[GameActor], transfers: List[Tuple[str, str, str, int, int]]):
+        for tx_hash, frm, to, value, block_ts in transfers:
+            # every waiting game may try it: the tx hash claim lets only one of them settle
+            waiting = [a for a in actors if a.game.pending_settlement is not None]
+            for a, settled in self._each(waiting, "settle_from_transfer", tx_hash, frm, to, value, block_ts):
+                if settled:
+                    self.settled_total += 1
+                    self._changed(a.game)
+
+    def poll_once(self):
+        self.expire_offers()
+        confirmed = self.index.confirmed_block()
+        if confirmed is None:
+            return
+        if self.cursor is None:
+            self.cursor = max(0, confirmed - self.lookback)
+        # the index rolled back over a reorg: look at those blocks again
+        self.cursor = min(self.cursor, confirmed)
+
+        actors = self.expire(self._open_settlements())
+        recipients = list({
+            Web3.to_checksum_address(ps.to_addr)
+            for ps in (a.game.pending_settlement for a in actors) if ps is not None and ps.to_addr
+        })
+        if recipients and self.cursor < confirmed:
+            found = self.index.transfers_to(recipients, self.cursor + 1, confirmed)
+            self.match(actors, [
+                (t.tx_hash, t.from_addr, t.to_addr, t.value, self._timestamp(t.block_number)) for t in found
+            ])
+
+        # nothing to look for otherwise: just move along with the chain
+        self.cursor = confirmed
+
+    def _run(self):
+        while True:
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"❌ Settlement watcher error: {e}")
+            time.sleep(self.poll_sec)
+
+    def status(self) -> Dict:
+        return {
+            "cursor": self.cursor,
+            "settledTotal": self.settled_total,
+            "expiredTotal": self.expired_total,
+            "expiredOffersTotal": self.expired_offers_total,
+        }
@@ -0,0 +1,91 @@
+# shard_api.py
+# Internal endpoints every backend process serves, so router.py can see what a
+# shard holds and move games between shards (see sharding.py).
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import os
+
+from eth_account import Account
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+import crypto_random
+from game_actor import ActorClosed
+from message_log import message_store
+from payouts import payout_queue
+from sharding import SHARD_COUNT, SHARD_INDEX, owns
+from state import GAMES
+
+shard_api = APIRouter(prefix="/shard")
+
+
+class ImportGameBody(BaseModel):
+    state: Dict
+    spilled: List[Tuple[int, int, Dict]] = []
+    payouts: List[Dict] = []
+
+
+def misplaced() -> List[str]:
+    # every process boots the default game; a copy elsewhere only counts once it was played
+    live = [
+        g.game_id for g in GAMES.all_games()
+        if not owns(g.game_id) and (g.game_id != GAMES.default_game_id or g.last_seq > 0)
+    ]
+    # parked games move too (export adopts them back first)
+    return live + [gid for gid in GAMES.parked_ids() if not owns(gid) and gid not in live]
+
+
+def signers() -> Dict[str, Optional[str]]:
+    """Addresses this process signs txs with: router.py refuses shards that share one."""
+    bank_key = os.getenv("BANK_PRIVATE_KEY")
+    return {
+        "bank": Account.from_key(bank_key).address if bank_key else None,
+        "dice": crypto_random.WALLET_ADDRESS,
+    }
+
+
+@shard_api.get("/info")
+def shard_info():
+    return {
+        "index": SHARD_INDEX,
+        "count": SHARD_COUNT,
+        "pid": os.getpid(),
+        "games": len(GAMES),
+        "misplaced": misplaced(),
+        "signers": signers(),
+    }
+
+
+@shard_api.post("/export/{game_id}")
+async def export_game(game_id: str):
+    """
+    Hand a game over: its full state, spilled messages and payouts; it is released here.
+    The state is the actor's final command, so later commands get ActorClosed (503,
+    retried by the client against the new owner) instead of being lost.
+    """
+    actor = GAMES.actor_or_none(game_id)
+    if actor is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    try:
+        state = await asyncio.wrap_future(actor.retire(actor.game.to_dict))
+    except ActorClosed:
+        raise HTTPException(status_code=409, detail="Game is already moving")
+    spilled = message_store.dump(game_id)
+    GAMES.release(game_id)
+    message_store.drop(game_id)
+    # waits for a send in flight; from here on the new owner's bank pays what is still queued
+    payouts = await asyncio.to_thread(payout_queue.export_game, game_id)
+    return {"state": state, "spilled": spilled, "payouts": payouts}
+
+
+@shard_api.post("/import")
+def import_game(body: ImportGameBody):
+    try:
+        game = GAMES.adopt(body.state)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if body.spilled:
+        message_store.spill(game.game_id, body.spilled)
+    if body.payouts:
+        payout_queue.import_game(body.payouts)
+    return {"gameId": game.game_id, "version": game.version}
@@ -0,0 +1,25 @@
+# sharding.py
+# Game id -> shard placement. No game/app imports: router.py uses it too.
+from typing import Sequence
+import hashlib
+import os
+
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+
+
+def _score(game_id: str, shard: int) -> int:
+    return int.from_bytes(hashlib.sha1(f"{shard}:{game_id}".encode()).digest()[:8], "big")
+
+
+def owner(game_id: str, shards: Sequence[int]) -> int:
+    """
+    Rendezvous (highest random weight) hashing: every shard scores the id and the
+    highest score owns it. Adding or removing one shard only moves the games
+    that shard wins or held, about 1/N of them.
+    """
+    return max(shards, key=lambda s: _score(game_id, s))
+
+
+def owns(game_id: str) -> bool:
+    return SHARD_COUNT <= 1 or owner(game_id, range(SHARD_COUNT)) == SHARD_INDEX
@@ -0,0 +1,324 @@
+# simulate.py
+# Headless Monte Carlo of the board economy, many games at once with NumPy:
+#   python simulate.py [--games N] [--players P] [--policy always,random:0.5,...]
+#                      [--rent] [--tax] [--buy-with-fc] [--max-turns T] [--workers W]
+#
+# Uses the tile list from board.py, the constants from rules.py and the chance
+# events of ChanceDeck, and follows GameState.roll/buy/skip_buy:
+#   - passing START pays START_BONUS_FC, landing on it pays it once more
+#   - SYSTEM BUG sends the player to prison, prison skips PRISON_WAIT_TURNS turns
+#   - a chance tile draws one ChanceDeck event (uniform)
+#   - a balance <= 0 eliminates the player, the last one left wins
+# game.py does not charge rent or tax in FC, and buying is paid in FXRP on chain.
+# --rent / --tax / --buy-with-fc switch those on to try out what-if rules.
+# A negative chance event the player cannot cover is rejected by game.py
+# (Wallet.pay raises); here the player pays what they have and goes bankrupt.
+#
+# Trades, signatures and settlements are left out. Buying happens in the same
+# turn, as if the settlement went through immediately.
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from board import BOARD_LEN, BUYABLE_PROPERTY_IDS, CHANCE_IDS, TILES
+from chance import CHANCE_EVENTS
+from rules import (
+    GOTO_PRISON_TILE_ID,
+    PRISON_TILE_ID,
+    PRISON_WAIT_TURNS,
+    START_BONUS_FC,
+    START_TILE_ID,
+    STARTING_BALANCE_FC,
+)
+
+IS_BUYABLE = np.array([t.id in BUYABLE_PROPERTY_IDS for t in TILES])
+IS_CHANCE = np.array([t.id in CHANCE_IDS for t in TILES])
+IS_TAX = np.array([t.type == "tax" for t in TILES])
+# 1 FC == $1, as in GameState._fc_to_fxrp_raw
+PRICE_FC = np.array([math.ceil(t.price) if t.price is not None else 0 for t in TILES], dtype=np.int64)
+RENT_FC = np.array([t.rent or 0 for t in TILES], dtype=np.int64)
+CHANCE_DELTAS = np.array([e.delta for e in CHANCE_EVENTS], dtype=np.int64)
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+@dataclass(frozen=True)
+class Rules:
+    players: int = 3
+    rent: bool = False
+    tax: bool = False
+    buy_with_fc: bool = False
+    max_turns: int = 500
+
+
+@dataclass(frozen=True)
+class Policy:
+    """
+    When a bot buys the tile it landed on:
+      always | never | random:P (with probability P) | budget:F (price <= F * balance)
+    """
+    kind: str = "always"
+    arg: float = 1.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Policy":
+        kind, _, arg = spec.partition(":")
+        if kind not in ("always", "never", "random", "budget"):
+            raise ValueError(f"Unknown policy: {spec}")
+        return cls(kind, float(arg) if arg else 1.0)
+
+    def wants(self, price: np.ndarray, balance: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        if self.kind == "always":
+            return np.ones(price.shape, dtype=bool)
+        if self.kind == "never":
+            return np.zeros(price.shape, dtype=bool)
+        if self.kind == "random":
+            return rng.random(price.shape) < self.arg
+        return price <= self.arg * balance
+
+
+class Batch:
+    """State of `n` games side by side; one row per game."""
+
+    def __init__(self, n: int, rules: Rules):
+        P = rules.players
+        self.pos = np.zeros((n, P), dtype=np.int64)
+        self.bal = np.full((n, P), STARTING_BALANCE_FC, dtype=np.int64)
+        self.alive = np.ones((n, P), dtype=bool)
+        self.skip = np.zeros((n, P), dtype=np.int64)
+        self.owner = np.full((n, BOARD_LEN), -1, dtype=np.int64)
+        self.active = np.zeros(n, dtype=np.int64)
+        self.over = np.zeros(n, dtype=bool)
+        self.turns = np.zeros(n, dtype=np.int64)
+        self.winner = np.full(n, -1, dtype=np.int64)
+        # FC each tile earned its owner over the game
+        self.rent = np.zeros((n, BOARD_LEN), dtype=np.int64)
+        self.landings = np.zeros(BOARD_LEN, dtype=np.int64)
+
+
+def _next_player(b: Batch, g: np.ndarray, p: np.ndarray, players: int):
+    """GameState.next_player(): the first alive seat after p."""
+    alive = b.alive.reshape(-1)
+    nxt = (p + 1) % players
+    for _ in range(players - 1):
+        dead = ~alive[g * players + nxt]
+        if not dead.any():
+            break
+        nxt[dead] = (nxt[dead] + 1) % players
+    b.active[g] = nxt
+
+
+def _charge(bal: np.ndarray, k: np.ndarray, amount: np.ndarray) -> np.ndarray:
+    """Take up to `amount` from the flat seats `k`; returns what was actually paid."""
+    paid = np.minimum(amount, np.maximum(bal[k], 0))
+    # paying less than `amount` leaves the balance at 0, i.e. bankrupt
+    bal[k] -= paid
+    return paid
+
+
+def step(b: Batch, rules: Rules, policies: List[Policy], rng: np.random.Generator) -> bool:
+    """One turn (a roll or a prison skip) in every unfinished game; False once all are over."""
+    g_all = np.flatnonzero(~b.over)
+    if not g_all.size:
+        return False
+    P = rules.players
+    # (game, seat) pairs as flat indices into the (n, P) arrays
+    pos, bal, skip = b.pos.reshape(-1), b.bal.reshape(-1), b.skip.reshape(-1)
+    b.turns[g_all] += 1
+    p_all = b.active[g_all]
+    k = g_all * P + p_all
+
+    skipping = skip[k] > 0
+    skip[k[skipping]] -= 1
+    rolling = ~skipping
+    g, p, k = g_all[rolling], p_all[rolling], k[rolling]
+
+    steps = rng.integers(1, 7, g.size) + rng.integers(1, 7, g.size)
+    raw = pos[k] + steps
+    new = raw % BOARD_LEN
+    bal[k] += START_BONUS_FC * ((raw >= BOARD_LEN).astype(np.int64) + (new == START_TILE_ID))
+    b.landings += np.bincount(new, minlength=BOARD_LEN)
+
+    jailed = (new == GOTO_PRISON_TILE_ID) | (new == PRISON_TILE_ID)
+    pos[k] = np.where(jailed, PRISON_TILE_ID, new)
+    skip[k[jailed]] += PRISON_WAIT_TURNS
+
+    chance = IS_CHANCE[new]
+    if chance.any():
+        kc = k[chance]
+        delta = CHANCE_DELTAS[rng.integers(0, CHANCE_DELTAS.size, kc.size)]
+        bal[kc] += np.maximum(delta, 0)
+        _charge(bal, kc, np.maximum(-delta, 0))
+
+    if rules.tax:
+        taxed = IS_TAX[new]
+        _charge(bal, k[taxed], PRICE_FC[new[taxed]])
+
+    owner = b.owner.reshape(-1)[g * BOARD_LEN + new]
+    if rules.rent:
+        owed = (owner >= 0) & (owner != p)
+        owed[owed] = b.alive.reshape(-1)[g[owed] * P + owner[owed]]
+        rg, rt = g[owed], new[owed]
+        paid = _charge(bal, k[owed], RENT_FC[rt])
+        bal[rg * P + owner[owed]] += paid
+        b.rent.reshape(-1)[rg * BOARD_LEN + rt] += paid
+
+    offer = IS_BUYABLE[new] & (owner < 0)
+    if offer.any():
+        og, op, ot, ok = g[offer], p[offer], new[offer], k[offer]
+        price = PRICE_FC[ot]
+        buys = np.zeros(og.size, dtype=bool)
+        for seat, policy in enumerate(policies):
+            mine = op == seat
+            buys[mine] = policy.wants(price[mine], bal[ok[mine]], rng)
+        if rules.buy_with_fc:
+            buys &= bal[ok] > price
+            bal[ok[buys]] -= price[buys]
+        b.owner.reshape(-1)[og[buys] * BOARD_LEN + ot[buys]] = op[buys]
+
+    # GameState._check_bankruptcy_and_win (only the active player's and, with
+    # rent, an owner's balance moved, and an owner only ever gains)
+    broke = g_all[bal[g_all * P + p_all] <= 0]
+    if broke.size:
+        b.alive[broke] &= b.bal[broke] > 0
+        left = b.alive[broke].sum(axis=1)
+        ended = broke[left <= 1]
+        b.over[ended] = True
+        b.winner[ended] = np.where(left[left <= 1] == 1, np.argmax(b.alive[ended], axis=1), -1)
+
+    going = ~b.over[g_all]
+    _next_player(b, g_all[going], p_all[going], P)
+
+    b.over[g_all[b.turns[g_all] >= rules.max_turns]] = True
+    return True
+
+
+def play(n: int, rules: Rules, policies: List[Policy], seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    b = Batch(n, rules)
+    while step(b, rules, policies, rng):
+        pass
+    return {
+        "turns": b.turns,
+        "finished": b.winner >= 0,
+        "bankrupt": ~b.alive,
+        "winner": b.winner,
+        "balance": b.bal,
+        "owned": b.owner >= 0,
+        "rent": b.rent,
+        "landings": b.landings,
+    }
+
+
+def _play_worker(args) -> Dict[str, np.ndarray]:
+    return play(*args)
+
+
+def _quantiles(x: np.ndarray) -> Dict:
+    if not x.size:
+        return {"n": 0}
+    qs = np.quantile(x, QUANTILES)
+    out = {"n": int(x.size), "mean": round(float(x.mean()), 3)}
+    out.update({f"p{int(q * 100)}": round(float(v), 3) for q, v in zip(QUANTILES, qs)})
+    return out
+
+
+def report(parts: List[Dict[str, np.ndarray]], rules: Rules) -> Dict:
+    r = {k: np.concatenate([p[k] for p in parts]) for k in parts[0] if k != "landings"}
+    landings = sum(p["landings"] for p in parts)
+    n = r["turns"].size
+    finished = r["finished"]
+
+    tiles = []
+    for t in TILES:
+        if t.id not in BUYABLE_PROPERTY_IDS:
+            continue
+        owned = r["owned"][:, t.id]
+        rent = r["rent"][owned, t.id]
+        row = {
+            "tileId": t.id,
+            "name": t.name,
+            "priceFC": int(PRICE_FC[t.id]),
+            "rentFC": t.rent,
+            "landingsPerGame": round(float(landings[t.id]) / n, 3),
+            "boughtPct": round(100 * float(owned.mean()), 2),
+        }
+        if rules.rent:
+            row["rentPerGame"] = _quantiles(rent)
+            row["returnPct"] = _quantiles(100 * rent / max(int(PRICE_FC[t.id]), 1))
+        tiles.append(row)
+
+    return {
+        "games": n,
+        "rules": vars(rules),
+        "length": {
+            "finishedPct": round(100 * float(finished.mean()), 2),
+            "cappedPct": round(100 * float((~finished).mean()), 2),
+            "turns": _quantiles(r["turns"][finished]),
+        },
+        "bankruptcy": {
+            "playerPct": round(100 * float(r["bankrupt"].mean()), 2),
+            "bySeatPct": [round(100 * float(v), 2) for v in r["bankrupt"].mean(axis=0)],
+            "gamesWithAnyPct": round(100 * float(r["bankrupt"].any(axis=1).mean()), 2),
+        },
+        "winsBySeatPct": [round(100 * float((r["winner"] == s).mean()), 2) for s in range(rules.players)],
+        "finalBalance": _quantiles(r["balance"][~r["bankrupt"]]),
+        "tiles": tiles,
+    }
+
+
+def run(games: int, rules: Rules, policies: List[Policy], batch: int = 100_000,
+        workers: Optional[int] = None, seed: Optional[int] = None) -> Dict:
+    sizes = [min(batch, games - i) for i in range(0, games, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(size, rules, policies, s) for size, s in zip(sizes, seeds)]
+
+    t0 = time.perf_counter()
+    if workers == 1 or len(jobs) < 2:
+        parts = [_play_worker(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            parts = list(pool.map(_play_worker, jobs))
+    dt = time.perf_counter() - t0
+
+    out = report(parts, rules)
+    out["policies"] = [f"{p.kind}:{p.arg:g}" for p in policies]
+    out["sec"] = round(dt, 3)
+    out["gamesPerSec"] = round(games / dt, 1) if dt else None
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Monte Carlo simulation of the board economy")
+    ap.add_argument("--games", type=int, default=100_000)
+    ap.add_argument("--players", type=int, default=3)
+    ap.add_argument("--policy", default="always", help="comma separated, one per seat (the last one repeats)")
+    ap.add_argument("--rent", action="store_true", help="charge tile rent in FC")
+    ap.add_argument("--tax", action="store_true", help="charge Gas Fee tiles in FC")
+    ap.add_argument("--buy-with-fc", action="store_true", help="pay tile prices from the FC balance")
+    ap.add_argument("--max-turns", type=int, default=500, help="turns (all players) before a game is cut off")
+    ap.add_argument("--batch", type=int, default=100_000, help="games per batch")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=None)
+    a = ap.parse_args()
+
+    specs = a.policy.split(",")
+    specs += [specs[-1]] * (a.players - len(specs))
+    try:
+        policies = [Policy.parse(s) for s in specs[:a.players]]
+    except ValueError as e:
+        ap.error(str(e))
+
+    rules = Rules(players=a.players, rent=a.rent, tax=a.tax, buy_with_fc=a.buy_with_fc, max_turns=a.max_turns)
+    print(json.dumps(run(a.games, rules, policies, a.batch, a.workers, a.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
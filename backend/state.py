@@ -1,7 +1,18 @@
 # state.py
-from game import GameState
+from typing import Optional
 
-GAME = GameState()
+from game import GameState, GameView
+from game_manager import GameManager
 
-def snapshot():
-    return GAME.to_front()
+GAMES = GameManager()
+
+# Legacy single-table routes keep working against the default game
+GAME: GameState = GAMES.get(GAMES.default_game_id)
+
+
+def snapshot(view: Optional[GameView] = None, since: Optional[int] = None):
+    """Full state, or only the changes after version `since` (see GameView.to_delta)."""
+    view = view or GAMES.actor(GAMES.default_game_id).read()
+    if since is None:
+        return view.to_front()
+    return view.to_delta(since)
@@ -0,0 +1,20 @@
+# Backend modules import each other flat (`import game`), as when run from backend/.
+import os
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+# keep the module-level stores off backend/data
+_DATA = tempfile.mkdtemp(prefix="flarepoly-tests-")
+for _var, _name in (
+    ("MESSAGE_DB", "messages.sqlite3"),
+    ("PAYOUT_DB", "payouts.sqlite3"),
+    ("SETTLED_TX_DB", "settled.sqlite3"),
+    ("PARKED_GAMES_DB", "parked.sqlite3"),
+    ("TRANSFER_INDEX_DB", "transfers.sqlite3"),
+    ("EVENT_LOG_DIR", "events"),
+):
+    os.environ.setdefault(_var, os.path.join(_DATA, _name))
+os.environ.setdefault("REQUIRE_SIG", "0")
@@ -0,0 +1,31 @@
+from fractions import Fraction
+
+import markov
+from board import TILES
+
+
+def test_dice_distribution():
+    assert sum(markov.DICE.values()) == 1
+    assert markov.DICE[7] == Fraction(1, 6)
+
+
+def test_transition_rows_sum_to_one():
+    for row in markov._transitions(len(TILES)).values():
+        assert sum(row.values()) == 1
+
+
+def test_landing_probabilities_sum_to_one():
+    odds = markov.board_odds()
+    assert sum(odds.landing_exact) == 1
+    assert all(p >= 0 for p in odds.landing_exact)
+    assert abs(sum(odds.landing) - 1) < 1e-9
+
+
+def test_prison_skips_are_turns_without_a_roll():
+    odds = markov.board_odds()
+    assert 0 < odds.rolls_per_turn < 1
+
+
+def test_board_odds_are_cached_per_board():
+    assert markov.board_odds() is markov.board_odds(TILES)
+    assert markov.board_odds().board_hash == markov.board_hash(TILES)
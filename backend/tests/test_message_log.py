@@ -0,0 +1,101 @@
+import pytest
+
+from message_log import MessageLog, MessageStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MessageStore(str(tmp_path / "messages.sqlite3"))
+
+
+def _fill(log, count, start_version=1):
+    """`count` messages, one commit (= one version) each."""
+    for i in range(count):
+        log.append({"user": "P1", "text": f"m{log.next_id}"})
+        log.commit(start_version + i)
+
+
+def _ids(messages):
+    return [m["id"] for m in messages]
+
+
+def test_ring_keeps_capacity_and_spills_the_rest(store):
+    log = MessageLog("g", capacity=5, store=store)
+    _fill(log, 12)
+
+    assert len(log) == 5
+    assert _ids(log.tail(10)) == [8, 9, 10, 11, 12]
+    assert [r[0] for r in store.dump("g")] == list(range(1, 8))
+
+
+def test_page_backwards_reaches_into_the_store(store):
+    log = MessageLog("g", capacity=5, store=store)
+    _fill(log, 12)
+
+    assert _ids(log.page(limit=3)) == [10, 11, 12]
+    assert _ids(log.page(before=10, limit=4)) == [6, 7, 8, 9]
+    assert _ids(log.page(before=3, limit=4)) == [1, 2]
+    assert _ids(log.page(before=6, after=2, limit=10)) == [3, 4, 5]
+
+
+def test_page_forwards(store):
+    log = MessageLog("g", capacity=5, store=store)
+    _fill(log, 12)
+
+    assert _ids(log.page(after=0, limit=3)) == [1, 2, 3]
+    assert _ids(log.page(after=6, limit=3)) == [7, 8, 9]
+    assert _ids(log.page(after=10, limit=5)) == [11, 12]
+    assert log.page(after=12) == []
+
+
+def test_since_version(store):
+    log = MessageLog("g", capacity=5, store=store)
+    _fill(log, 3)
+    log.append({"user": "P1", "text": "a"})
+    log.append({"user": "P1", "text": "b"})
+    log.commit(4)
+
+    assert _ids(log.since_version(2)) == [3, 4, 5]
+    assert _ids(log.since_version(3)) == [4, 5]
+    assert log.since_version(4) == []
+
+
+def test_since_version_is_none_once_spilled(store):
+    log = MessageLog("g", capacity=5, store=store)
+    _fill(log, 12)
+
+    # versions 1..7 went to the store
+    assert log.since_version(3) is None
+    assert _ids(log.since_version(7)) == [8, 9, 10, 11, 12]
+
+
+def test_pending_messages_wait_for_commit(store):
+    log = MessageLog("g", capacity=5, store=store)
+    log.append({"user": "P1", "text": "a"})
+
+    assert log.has_pending()
+    assert log.tail() == []
+    log.commit(1)
+    assert _ids(log.tail()) == [1]
+
+
+def test_clear_drops_spilled_rows_and_keeps_counting(store):
+    log = MessageLog("g", capacity=2, store=store)
+    _fill(log, 5)
+    log.clear()
+
+    assert store.dump("g") == []
+    assert log.page(limit=10) == []
+    _fill(log, 1, start_version=6)
+    assert _ids(log.tail()) == [6]
+
+
+def test_dict_round_trip(store):
+    log = MessageLog("g", capacity=5, store=store)
+    _fill(log, 8)
+
+    copy = MessageLog("g", capacity=5, store=store)
+    copy.load_dict(log.to_dict())
+    assert copy.tail(10) == log.tail(10)
+    assert _ids(copy.page(before=6, limit=3)) == [3, 4, 5]
+    assert copy.append({"user": "P1", "text": "next"}) == 9
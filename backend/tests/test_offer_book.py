@@ -0,0 +1,83 @@
+from offer_book import OfferBook, TradeOffer
+
+
+def _offer(oid, tile_id=5, to_player=1, created_at=1000, expires_at=None):
+    return TradeOffer(oid, "sell", 0, to_player, tile_id, 10, created_at, expires_at)
+
+
+def test_expire_removes_only_due_offers():
+    book = OfferBook()
+    book.add(_offer("a", expires_at=2000))
+    book.add(_offer("b", tile_id=6, expires_at=3000))
+    book.add(_offer("c", tile_id=7))
+
+    assert book.expire(now_ms=1999) == []
+    assert [o.id for o in book.expire(now_ms=2000)] == ["a"]
+    assert book.get("a") is None
+    assert {o.id for o in book} == {"b", "c"}
+
+    # never-expiring offers stay
+    assert [o.id for o in book.expire(now_ms=10**12)] == ["b"]
+    assert [o.id for o in book] == ["c"]
+
+
+def test_expire_keeps_offer_under_settlement():
+    book = OfferBook()
+    book.add(_offer("a", expires_at=2000))
+    book.add(_offer("b", tile_id=6, expires_at=2000))
+
+    assert [o.id for o in book.expire(now_ms=2500, keep="a")] == ["b"]
+    assert book.get("a") is not None
+    # still due once it is no longer kept
+    assert [o.id for o in book.expire(now_ms=2500)] == ["a"]
+    assert len(book) == 0
+
+
+def test_expire_skips_stale_heap_entries():
+    book = OfferBook()
+    book.add(_offer("a", expires_at=2000))
+    book.remove("a")
+    book.add(_offer("a", expires_at=5000))
+
+    assert book.expire(now_ms=3000) == []
+    assert book.get("a").expires_at == 5000
+
+
+def test_invalidate_tile():
+    book = OfferBook()
+    book.add(_offer("a", tile_id=5, to_player=1))
+    book.add(_offer("b", tile_id=5, to_player=2))
+    book.add(_offer("c", tile_id=6, to_player=1))
+
+    dropped = book.invalidate_tile(5, keep="b")
+    assert [o.id for o in dropped] == ["a"]
+    assert {o.id for o in book} == {"b", "c"}
+    assert [o.id for o in book.for_recipient(1)] == ["c"]
+
+    assert [o.id for o in book.invalidate_tile(5)] == ["b"]
+    assert not book.has_incoming(2)
+    assert book.invalidate_tile(9) == []
+
+
+def test_recipient_index_and_order():
+    book = OfferBook()
+    book.add(_offer("a", created_at=1000))
+    book.add(_offer("b", tile_id=6, created_at=3000))
+    book.add(_offer("c", tile_id=7, created_at=2000, to_player=2))
+
+    assert [o.id for o in book] == ["c", "b", "a"]
+    assert [o.id for o in book.for_recipient(1)] == ["b", "a"]
+    assert book.has_incoming(2)
+    book.remove("c")
+    assert not book.has_incoming(2)
+
+
+def test_dict_round_trip():
+    book = OfferBook()
+    book.add(_offer("a", expires_at=2000))
+    book.add(_offer("b", tile_id=6))
+
+    copy = OfferBook()
+    copy.load_dict(book.to_dict())
+    assert copy.to_front() == book.to_front()
+    assert [o.id for o in copy.expire(now_ms=2000)] == ["a"]
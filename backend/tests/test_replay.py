@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+import game
+from crypto_random import SrnValue
+from drbg import SrnSeedSource
+from event_log import EventLog
+from game_manager import GameManager
+from parked_games import ParkedGames
+from replay import load_jobs, replay_game
+
+
+@pytest.fixture
+def dice(monkeypatch):
+    # drbg dice from one fixed secure round, so no chain is needed to roll
+    far = int(time.time()) + 10**6
+    src = SrnSeedSource(reader=lambda: SrnValue(0xC0FFEE, True, far))
+    src._thread = object()
+    src.refresh()
+    monkeypatch.setattr(game, "srn_source", src)
+    monkeypatch.setenv("DICE_MODE", "drbg")
+    monkeypatch.setenv("REQUIRE_SIG", "0")
+
+
+@pytest.fixture
+def log(tmp_path):
+    return EventLog(str(tmp_path / "events"))
+
+
+@pytest.fixture
+def games(tmp_path, log):
+    manager = GameManager(default_game_id="default", parked=ParkedGames(str(tmp_path / "parked.sqlite3")))
+    manager.attach_journal(log.append)
+    return manager
+
+
+def _play(g: game.GameState, turns: int):
+    for i in range(turns):
+        if g.game_over:
+            return
+        if i % 5 == 0:
+            g.chat(f"turn {i}")
+        g.roll()
+        if g.buy_prompt is not None:
+            g.skip_buy()
+
+
+def test_journal_replays_without_divergence(games, log, dice):
+    g = games.create("replay-test")
+    _play(g, 40)
+    log.flush()
+
+    jobs = load_jobs(log)
+    assert [j[0] for j in jobs] == ["replay-test"]
+
+    report = replay_game(jobs[0], trace=True)
+    assert report["divergence"] is None
+    assert report["events"] == len([e for e in jobs[0][2] if e.kind != "create"])
+    assert report["checked"] == report["events"]
+    final = report["trace"][-1]
+    assert {k: final[k] for k in ("active", "pos", "balances", "digest")} == g.outcome()
+
+
+def test_replay_reports_a_changed_outcome(games, log, dice):
+    g = games.create("replay-test")
+    _play(g, 10)
+    log.flush()
+
+    game_id, base, events = load_jobs(log)[0]
+    rolled = next(e for e in events if e.kind == "roll" and "dice" in e.tape)
+    d1, d2, proof = rolled.tape["dice"]
+    rolled.tape["dice"] = [d1 % 6 + 1, d2, proof]
+
+    report = replay_game((game_id, base, events))
+    assert report["divergence"]["seq"] == rolled.seq
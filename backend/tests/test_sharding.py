@@ -0,0 +1,27 @@
+import sharding
+
+GAME_IDS = [f"game-{i}" for i in range(2000)]
+
+
+def test_owner_is_deterministic():
+    for gid in GAME_IDS[:50]:
+        assert sharding.owner(gid, range(4)) == sharding.owner(gid, [3, 1, 0, 2])
+
+
+def test_adding_a_shard_only_moves_games_to_it():
+    before = {gid: sharding.owner(gid, range(3)) for gid in GAME_IDS}
+    after = {gid: sharding.owner(gid, range(4)) for gid in GAME_IDS}
+
+    moved = [gid for gid in GAME_IDS if before[gid] != after[gid]]
+    assert all(after[gid] == 3 for gid in moved)
+    # about 1/4 of the games, not a reshuffle
+    assert 0.15 < len(moved) / len(GAME_IDS) < 0.35
+
+
+def test_removing_a_shard_only_moves_its_games():
+    before = {gid: sharding.owner(gid, range(4)) for gid in GAME_IDS}
+    after = {gid: sharding.owner(gid, [0, 1, 3]) for gid in GAME_IDS}
+
+    for gid in GAME_IDS:
+        if before[gid] != 2:
+            assert after[gid] == before[gid]
@@ -1,7 +1,10 @@
 # backend/transactions.py
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Optional, Literal
 import os
+import sqlite3
+import threading
+import time
 
 from web3 import Web3
 from web3._utils.events import get_event_data
@@ -9,9 +12,20 @@ from hexbytes import HexBytes
 
 # IMPORTANT: correct import for your repo structure
 from chain.chain_fxrp import fxrp_client
+from chain.transfer_index import transfer_index
+from chain.chain_cache import CachedReceipt, receipt_cache
 
 SettlementKind = Literal["buy", "trade"]
 
+# Computed once: used for every verification
+_TRANSFER_TOPIC = HexBytes(Web3.keccak(text="Transfer(address,address,uint256)"))
+_TRANSFER_ABI = fxrp_client.contract.events.Transfer._get_event_abi()
+_FXRP_ADDR = Web3.to_checksum_address(fxrp_client.contract.address)
+
+
+def settlement_ttl_sec() -> float:
+    return float(os.getenv("SETTLEMENT_TTL_SEC", "600"))
+
 
 @dataclass
 class PendingSettlement:
@@ -21,6 +35,18 @@ class PendingSettlement:
     amount_raw: int
     tile_id: int
     offer_id: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    expires_at: float = field(default_factory=lambda: time.time() + settlement_ttl_sec())
+
+    def matches(self, from_addr: str, to_addr: str, amount_raw: int) -> bool:
+        # from_addr is unknown when signatures are disabled: accept any sender then.
+        # Hex addresses compare case-insensitively (checksumming costs a keccak each).
+        if self.from_addr and from_addr.lower() != self.from_addr.lower():
+            return False
+        return to_addr.lower() == self.to_addr.lower() and int(amount_raw) == int(self.amount_raw)
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) >= self.expires_at
 
     def to_front(self) -> Dict:
         return {
@@ -30,9 +56,60 @@ class PendingSettlement:
             "amountRaw": int(self.amount_raw),
             "tileId": int(self.tile_id),
             "offerId": self.offer_id,
+            "expiresAt": int(self.expires_at * 1000),
         }
 
 
+def _settled_db_path() -> str:
+    base = os.path.dirname(os.path.abspath(__file__))
+    return os.getenv("SETTLED_TX_DB", os.path.join(base, "data", "settled_txs.sqlite3"))
+
+
+class SettledTxs:
+    """
+    Tx hashes already used to settle something (one payment settles one thing).
+    Kept in SQLite rather than memory: event-log snapshots drop the settle events
+    that used to rebuild it, and the settlement watcher rescans recent blocks at boot.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or _settled_db_path()
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS settled (tx_hash TEXT PRIMARY KEY, claimed_at REAL)")
+            db.commit()
+            self._db = db
+        return self._db
+
+    @staticmethod
+    def _key(tx_hash: str) -> str:
+        key = tx_hash.lower()
+        return key if key.startswith("0x") else "0x" + key
+
+    def claim(self, tx_hash: str) -> bool:
+        with self._lock:
+            db = self._conn()
+            fresh = db.execute("INSERT OR IGNORE INTO settled VALUES (?, ?)", (self._key(tx_hash), time.time())).rowcount == 1
+            db.commit()
+        return fresh
+
+    def release(self, tx_hash: str):
+        """Give a claim back (the settlement it was claimed for did not go through)."""
+        with self._lock:
+            db = self._conn()
+            db.execute("DELETE FROM settled WHERE tx_hash = ?", (self._key(tx_hash),))
+            db.commit()
+
+
+settled_txs = SettledTxs()
+
+
 class TxVerifier:
     """All on-chain FXRP settlement verification."""
 
@@ -40,49 +117,82 @@ class TxVerifier:
         self,
         *,
         tx_hash: str,
-        expected_from: str,
+        expected_from: Optional[str],
         expected_to: str,
         expected_amount_raw: int,
     ) -> None:
-        w3 = fxrp_client.w3
-        receipt = w3.eth.get_transaction_receipt(tx_hash)
+        # expected_from is None when signatures are disabled: any sender (as in PendingSettlement.matches)
+        ef = Web3.to_checksum_address(expected_from) if expected_from else None
+        et = Web3.to_checksum_address(expected_to)
+        ev_amt = int(expected_amount_raw)
 
-        if receipt is None:
-            raise ValueError("tx not found / not mined")
-        if receipt.get("status") != 1:
+        # Fast path: the transfer is already in the local index with enough confirmations
+        confirmed = transfer_index.confirmed_block()
+        if confirmed is not None:
+            for t in transfer_index.by_tx(tx_hash):
+                if (
+                    t.block_number <= confirmed
+                    and (ef is None or t.from_addr == ef)
+                    and t.to_addr == et
+                    and t.value == ev_amt
+                ):
+                    return
+
+        receipt = self._receipt(tx_hash)
+        if receipt.status != 1:
             raise ValueError("tx failed")
 
+        # the only thing that still needs a fresh chain read
         min_conf = int(os.getenv("MIN_CONFIRMATIONS", "1"))
-        conf = w3.eth.block_number - receipt["blockNumber"] + 1
+        conf = fxrp_client.head.block_number() - receipt.block_number + 1
         if conf < min_conf:
             raise ValueError(f"not enough confirmations ({conf}/{min_conf})")
 
-        contract = fxrp_client.contract
-        fxrp_addr = Web3.to_checksum_address(contract.address)
+        for frm, to, value in receipt.transfers:
+            if (ef is None or frm == ef) and to == et and value == ev_amt:
+                return
 
-        transfer_topic = Web3.keccak(text="Transfer(address,address,uint256)")
-        event_abi = contract.events.Transfer._get_event_abi()
+        raise ValueError("no matching FXRP Transfer found in tx")
 
-        ef = Web3.to_checksum_address(expected_from)
-        et = Web3.to_checksum_address(expected_to)
-        ev_amt = int(expected_amount_raw)
+    def _receipt(self, tx_hash: str) -> CachedReceipt:
+        cached = receipt_cache.get(tx_hash)
+        if cached is not None:
+            return cached
 
+        w3 = fxrp_client.w3
+        receipt = w3.eth.get_transaction_receipt(tx_hash)
+        if receipt is None:
+            raise ValueError("tx not found / not mined")
+
+        transfers = []
         for log in receipt.get("logs", []):
-            if Web3.to_checksum_address(log["address"]) != fxrp_addr:
+            if Web3.to_checksum_address(log["address"]) != _FXRP_ADDR:
                 continue
 
             topics = log.get("topics", [])
-            if not topics or HexBytes(topics[0]) != HexBytes(transfer_topic):
+            if not topics or HexBytes(topics[0]) != _TRANSFER_TOPIC:
                 continue
 
-            decoded = get_event_data(w3.codec, event_abi, log)
-            args = decoded["args"]
-
-            if (
-                Web3.to_checksum_address(args["from"]) == ef
-                and Web3.to_checksum_address(args["to"]) == et
-                and int(args["value"]) == ev_amt
-            ):
-                return
-
-        raise ValueError("no matching FXRP Transfer found in tx")
+            args = get_event_data(w3.codec, _TRANSFER_ABI, log)["args"]
+            transfers.append((
+                Web3.to_checksum_address(args["from"]),
+                Web3.to_checksum_address(args["to"]),
+                int(args["value"]),
+            ))
+
+        result = CachedReceipt(
+            tx_hash=Web3.to_hex(receipt["transactionHash"]),
+            status=int(receipt.get("status", 0)),
+            block_number=int(receipt["blockNumber"]),
+            transfers=tuple(transfers),
+        )
+
+        # receipts deep enough can't change any more: keep them (memory + disk)
+        finality = int(os.getenv("CACHE_FINALITY_BLOCKS", "3"))
+        if fxrp_client.head.block_number() - result.block_number + 1 >= finality:
+            receipt_cache.put(result)
+        return result
+
+
+# stateless: one instance serves every game
+tx_verifier = TxVerifier()
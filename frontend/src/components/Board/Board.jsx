@@ -167,7 +167,7 @@
 
     // ===== CHANCE CARD UI =====
     const [chanceCard, setChanceCard] = useState(null); // { text, delta, key }
-    const lastMsgCountRef = useRef(0);
+    const lastMsgIdRef = useRef(0);
     const closeChance = () => setChanceCard(null);
 
     // ===== GAME OVER / BANKRUPT UI =====
@@ -221,17 +221,18 @@
     useEffect(() => {
       if (!gameState) return;
 
-      const prevCount = lastMsgCountRef.current;
-      const nextCount = messages.length;
+      // сообщения несут стабильный id (в снапшоте только последние N)
+      const prevId = lastMsgIdRef.current;
+      const nextId = messages.length ? messages[messages.length - 1].id : 0;
 
       // При первом подключении синхронизируемся, чтобы не открыть модалки на "Welcome..."
-      if (prevCount === 0 && nextCount > 0) {
-        lastMsgCountRef.current = nextCount;
+      if (prevId === 0 && nextId > 0) {
+        lastMsgIdRef.current = nextId;
         return;
       }
 
-      if (nextCount > prevCount) {
-        const newSlice = messages.slice(prevCount);
+      if (nextId > prevId) {
+        const newSlice = messages.filter((m) => m.id > prevId);
         const newsMsg = [...newSlice].reverse().find((m) => m.type === "news");
 
         if (newsMsg) {
@@ -243,7 +244,7 @@
         }
       }
 
-      lastMsgCountRef.current = nextCount;
+      lastMsgIdRef.current = Math.max(prevId, nextId);
     }, [messages, gameState]);
 
     // ===== BANKRUPT / GAME OVER реакция (из backend eliminated/gameOver/winner) =====
@@ -451,7 +452,7 @@
         setChanceCard(null);
         setWinnerModalOpen(false);
         setBankruptModal(null);
-        lastMsgCountRef.current = 0;
+        lastMsgIdRef.current = 0;
         lastEliminatedRef.current = [false, false, false, false];
       }
     };
@@ -692,7 +693,7 @@
                     }}
                   >
                     {messages.map((m, i) => (
-                      <div key={i} className="chat-msg-row">
+                      <div key={m.id ?? i} className="chat-msg-row">
                         <span
                           className="chat-user"
                           style={{